@@ -3,10 +3,9 @@ API endpoints для рассылок.
 """
 
 import json
-import asyncio
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -27,12 +26,12 @@ from bot.services.broadcast import (
     get_broadcast,
     update_broadcast,
     delete_broadcast,
-    start_broadcast,
+    enqueue_broadcast,
     pause_broadcast,
-    resume_broadcast,
     cancel_broadcast,
     get_broadcasts_list,
     count_broadcast_recipients,
+    count_remaining_recipients,
     quick_broadcast,
     BroadcastNotFoundError,
     BroadcastInvalidStateError,
@@ -49,6 +48,7 @@ def broadcast_to_response(broadcast: Broadcast) -> BroadcastResponse:
         message_text=broadcast.message_text,
         message_photo=broadcast.message_photo,
         buttons_json=broadcast.buttons_json,
+        variants_json=broadcast.variants_json,
         filter_type=broadcast.filter_type,
         filter_language=broadcast.filter_language,
         total_users=broadcast.total_users,
@@ -63,9 +63,38 @@ def broadcast_to_response(broadcast: Broadcast) -> BroadcastResponse:
     )
 
 
+def variants_to_json(variants: dict | None) -> str | None:
+    """Конвертировать языковые варианты в JSON."""
+    if not variants:
+        return None
+    return json.dumps(
+        {lang: variant.model_dump(exclude_none=True) for lang, variant in variants.items()},
+        ensure_ascii=False,
+    )
+
+
+def broadcast_to_status(
+    broadcast: Broadcast,
+    remaining: int | None = None,
+) -> BroadcastStatusResponse:
+    """Конвертировать модель в ответ со статусом."""
+    return BroadcastStatusResponse(
+        id=broadcast.id,
+        status=broadcast.status,
+        sent_count=broadcast.sent_count,
+        failed_count=broadcast.failed_count,
+        total_users=broadcast.total_users,
+        progress_percent=broadcast.progress_percent,
+        last_recipient_id=broadcast.last_recipient_id,
+        remaining=remaining,
+        worker_id=broadcast.worker_id,
+        heartbeat_at=broadcast.heartbeat_at,
+    )
+
+
 @router.get("", response_model=BroadcastListResponse)
 async def list_broadcasts(
-    status: Literal["draft", "running", "paused", "completed", "cancelled"] | None = None,
+    status: Literal["draft", "scheduled", "queued", "running", "paused", "completed", "cancelled"] | None = None,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_session),
@@ -106,6 +135,7 @@ async def create_new_broadcast(
         filter_type=data.filter_type,
         filter_language=data.filter_language,
         scheduled_at=data.scheduled_at,
+        variants_json=variants_to_json(data.variants),
     )
     
     return broadcast_to_response(broadcast)
@@ -160,6 +190,11 @@ async def update_broadcast_by_id(
                 update_data["buttons_json"] = None
             del update_data["buttons"]
         
+        # Конвертируем языковые варианты
+        if "variants" in update_data:
+            update_data["variants_json"] = variants_to_json(data.variants)
+            del update_data["variants"]
+        
         broadcast = await update_broadcast(session, broadcast_id, **update_data)
         return broadcast_to_response(broadcast)
     except BroadcastNotFoundError:
@@ -186,41 +221,16 @@ async def delete_broadcast_by_id(
 @router.post("/{broadcast_id}/start", response_model=BroadcastStatusResponse)
 async def start_broadcast_by_id(
     broadcast_id: int,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
-    """Запустить рассылку в фоне."""
+    """Поставить рассылку в очередь воркера рассылок."""
     try:
-        broadcast = await get_broadcast(session, broadcast_id)
-        
-        if broadcast.status not in ("draft", "paused"):
-            raise HTTPException(status_code=400, detail=f"Cannot start broadcast in {broadcast.status} state")
-        
-        # Обновляем статус
-        broadcast.status = "running"
-        if not broadcast.started_at:
-            from datetime import datetime
-            broadcast.started_at = datetime.utcnow()
-        await session.commit()
-        
-        # Запускаем в фоне
-        async def run_broadcast():
-            from admin.database import async_session_factory
-            async with async_session_factory() as bg_session:
-                await start_broadcast(bg_session, bot, broadcast_id)
-        
-        background_tasks.add_task(asyncio.create_task, run_broadcast())
-        
-        return BroadcastStatusResponse(
-            id=broadcast.id,
-            status=broadcast.status,
-            sent_count=broadcast.sent_count,
-            failed_count=broadcast.failed_count,
-            total_users=broadcast.total_users,
-            progress_percent=broadcast.progress_percent,
-        )
+        broadcast = await enqueue_broadcast(session, broadcast_id)
+        return broadcast_to_status(broadcast)
     except BroadcastNotFoundError:
         raise HTTPException(status_code=404, detail="Broadcast not found")
+    except BroadcastInvalidStateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/{broadcast_id}/pause", response_model=BroadcastStatusResponse)
@@ -231,14 +241,7 @@ async def pause_broadcast_by_id(
     """Поставить рассылку на паузу."""
     try:
         broadcast = await pause_broadcast(session, broadcast_id)
-        return BroadcastStatusResponse(
-            id=broadcast.id,
-            status=broadcast.status,
-            sent_count=broadcast.sent_count,
-            failed_count=broadcast.failed_count,
-            total_users=broadcast.total_users,
-            progress_percent=broadcast.progress_percent,
-        )
+        return broadcast_to_status(broadcast)
     except BroadcastNotFoundError:
         raise HTTPException(status_code=404, detail="Broadcast not found")
     except BroadcastInvalidStateError as e:
@@ -248,36 +251,17 @@ async def pause_broadcast_by_id(
 @router.post("/{broadcast_id}/resume", response_model=BroadcastStatusResponse)
 async def resume_broadcast_by_id(
     broadcast_id: int,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
-    """Возобновить рассылку."""
+    """Возобновить рассылку (снова в очередь, продолжит с курсора)."""
     try:
         broadcast = await get_broadcast(session, broadcast_id)
         
         if broadcast.status != "paused":
             raise HTTPException(status_code=400, detail="Can only resume paused broadcasts")
         
-        # Обновляем статус
-        broadcast.status = "running"
-        await session.commit()
-        
-        # Запускаем в фоне
-        async def run_broadcast():
-            from admin.database import async_session_factory
-            async with async_session_factory() as bg_session:
-                await start_broadcast(bg_session, bot, broadcast_id)
-        
-        background_tasks.add_task(asyncio.create_task, run_broadcast())
-        
-        return BroadcastStatusResponse(
-            id=broadcast.id,
-            status=broadcast.status,
-            sent_count=broadcast.sent_count,
-            failed_count=broadcast.failed_count,
-            total_users=broadcast.total_users,
-            progress_percent=broadcast.progress_percent,
-        )
+        broadcast = await enqueue_broadcast(session, broadcast_id)
+        return broadcast_to_status(broadcast)
     except BroadcastNotFoundError:
         raise HTTPException(status_code=404, detail="Broadcast not found")
 
@@ -290,14 +274,7 @@ async def cancel_broadcast_by_id(
     """Отменить рассылку."""
     try:
         broadcast = await cancel_broadcast(session, broadcast_id)
-        return BroadcastStatusResponse(
-            id=broadcast.id,
-            status=broadcast.status,
-            sent_count=broadcast.sent_count,
-            failed_count=broadcast.failed_count,
-            total_users=broadcast.total_users,
-            progress_percent=broadcast.progress_percent,
-        )
+        return broadcast_to_status(broadcast)
     except BroadcastNotFoundError:
         raise HTTPException(status_code=404, detail="Broadcast not found")
     except BroadcastInvalidStateError as e:
@@ -312,13 +289,9 @@ async def get_broadcast_status(
     """Получить статус рассылки."""
     try:
         broadcast = await get_broadcast(session, broadcast_id)
-        return BroadcastStatusResponse(
-            id=broadcast.id,
-            status=broadcast.status,
-            sent_count=broadcast.sent_count,
-            failed_count=broadcast.failed_count,
-            total_users=broadcast.total_users,
-            progress_percent=broadcast.progress_percent,
+        return broadcast_to_status(
+            broadcast,
+            remaining=await count_remaining_recipients(session, broadcast),
         )
     except BroadcastNotFoundError:
         raise HTTPException(status_code=404, detail="Broadcast not found")
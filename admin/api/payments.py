@@ -18,6 +18,7 @@ from admin.schemas.payment import (
     TariffShort,
 )
 from bot.models import Payment, User, Tariff, Subscription
+from bot.services.subscription_checker import mark_deadlines_changed
 
 router = APIRouter()
 
@@ -294,6 +295,7 @@ async def create_manual_payment(
         paid_at=now
     )
     session.add(payment)
+    await mark_deadlines_changed(session)
     
     await session.commit()
     await session.refresh(payment)
@@ -344,6 +346,7 @@ async def confirm_payment(
         await session.flush()
         
         payment.subscription_id = subscription.id
+        await mark_deadlines_changed(session)
     
     # Update payment
     payment.status = "paid"
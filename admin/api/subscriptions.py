@@ -16,7 +16,8 @@ from admin.schemas.subscription import (
     UserShort,
     TariffShort,
 )
-from bot.models import Subscription, User, Tariff
+from bot.models import Subscription, User, Tariff, TariffChannel, Channel
+from bot.services.task_queue import TASK_KICK, enqueue_for_channels
 
 router = APIRouter()
 
@@ -257,6 +258,23 @@ async def deactivate_subscription(
         raise HTTPException(status_code=404, detail="Subscription not found")
     
     subscription.is_active = False
+    
+    # Кик из каналов тарифа выполнит userbot через очередь
+    user = await session.get(User, subscription.user_id)
+    channels = await session.execute(
+        select(Channel.channel_id).join(TariffChannel).where(
+            TariffChannel.tariff_id == subscription.tariff_id,
+            Channel.is_active == True,
+        )
+    )
+    if user:
+        enqueue_for_channels(
+            session,
+            TASK_KICK,
+            user.telegram_id,
+            channels.scalars().all(),
+            payload={'subscription_id': subscription.id},
+        )
     await session.commit()
     
     return {"status": "ok", "message": "Subscription deactivated"}
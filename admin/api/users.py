@@ -18,6 +18,7 @@ from admin.schemas.user import (
     PaymentShort,
 )
 from bot.models import User, Subscription, Payment, Tariff
+from bot.services.subscription_checker import mark_deadlines_changed
 
 router = APIRouter()
 
@@ -49,6 +50,8 @@ async def _build_user_response(session: AsyncSession, user: User) -> UserRespons
         language=user.language,
         is_banned=user.is_banned,
         ban_reason=user.ban_reason,
+        is_unreachable=user.is_unreachable,
+        unreachable_at=user.unreachable_at,
         created_at=user.created_at,
         last_activity=user.last_activity,
         active_subscriptions_count=active_subs or 0,
@@ -311,6 +314,7 @@ async def grant_access(
         granted_by=admin_telegram_id
     )
     session.add(subscription)
+    await mark_deadlines_changed(session)
     await session.commit()
     
     return {
@@ -15,6 +15,13 @@ class ButtonItem(BaseModel):
     callback_data: str | None = Field(None, max_length=64)
 
 
+class BroadcastVariant(BaseModel):
+    """Вариант сообщения для одного языка."""
+    message_text: str = Field(..., min_length=1, max_length=4096)
+    message_photo: str | None = Field(None, max_length=255)
+    buttons: list[list[ButtonItem]] | None = None
+
+
 class BroadcastCreate(BaseModel):
     """Создание рассылки."""
     message_text: str = Field(..., min_length=1, max_length=4096)
@@ -23,6 +30,7 @@ class BroadcastCreate(BaseModel):
     filter_type: str = Field("all", pattern=r"^(all|active|inactive|tariff_\d+)$")
     filter_language: Literal["all", "ru", "en"] = "all"
     scheduled_at: datetime | None = None
+    variants: dict[Literal["ru", "en"], BroadcastVariant] | None = None  # по языкам
     
     @field_validator("buttons")
     @classmethod
@@ -45,6 +53,7 @@ class BroadcastUpdate(BaseModel):
     filter_type: str | None = Field(None, pattern=r"^(all|active|inactive|tariff_\d+)$")
     filter_language: Literal["all", "ru", "en"] | None = None
     scheduled_at: datetime | None = None
+    variants: dict[Literal["ru", "en"], BroadcastVariant] | None = None
     
     @field_validator("buttons")
     @classmethod
@@ -65,6 +74,7 @@ class BroadcastResponse(BaseModel):
     message_text: str
     message_photo: str | None
     buttons_json: str | None
+    variants_json: str | None = None
     filter_type: str
     filter_language: str
     total_users: int
@@ -94,6 +104,8 @@ class BroadcastStats(BaseModel):
     """Статистика рассылок."""
     total: int
     draft: int
+    scheduled: int
+    queued: int
     running: int
     paused: int
     completed: int
@@ -117,6 +129,10 @@ class BroadcastStatusResponse(BaseModel):
     failed_count: int
     total_users: int
     progress_percent: float
+    last_recipient_id: int | None = None  # курсор доставки
+    remaining: int | None = None  # ещё не обработано получателей
+    worker_id: str | None = None  # воркер, выполняющий рассылку
+    heartbeat_at: datetime | None = None  # последний heartbeat воркера
 
 
 class QuickBroadcastRequest(BaseModel):
@@ -131,3 +147,4 @@ class QuickBroadcastResponse(BaseModel):
     sent: int
     failed: int
     total: int
+    rate: float = 0.0  # сообщений в секунду
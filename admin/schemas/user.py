@@ -37,6 +37,8 @@ class UserResponse(UserBase):
     id: int
     is_banned: bool
     ban_reason: str | None
+    is_unreachable: bool = False
+    unreachable_at: datetime | None = None
     created_at: datetime
     last_activity: datetime
     active_subscriptions_count: int = 0
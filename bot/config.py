@@ -22,6 +22,7 @@ class Config(BaseSettings):
     userbot_api_hash: str = ""
     userbot_phone: str = ""
     userbot_session_string: str = ""
+    userbot_auto_invite: bool = True  # Ставить инвайты в очередь при создании подписки
     
     # Admin IDs
     admin_ids: str = ""
@@ -33,6 +34,24 @@ class Config(BaseSettings):
     # Database
     database_path: str = "./data/bot.db"
     backup_dir: str = "./data/backups"
+    db_pool_size: int = 5  # Постоянных соединений в пуле процесса
+    db_max_overflow: int = 5  # Дополнительных соединений при пиках
+    db_pool_timeout: float = 30.0  # Ожидание свободного соединения (сек)
+    db_busy_timeout: float = 15.0  # Ожидание блокировки SQLite (сек)
+    
+    # Bot API HTTP session
+    bot_http_pool_size: int = 100  # Keep-alive соединений к Bot API на процесс
+    
+    # Broadcasts
+    broadcast_workers: int = 8  # Параллельных отправителей
+    broadcast_rate_limit: float = 25.0  # Сообщений в секунду (лимит Bot API ~30)
+    broadcast_chat_interval: float = 1.0  # Минимальный интервал для одного чата (сек)
+    broadcast_flush_every: int = 100  # Сохранять прогресс каждые N сообщений
+    broadcast_flush_interval: float = 2.0  # ...или каждые T секунд
+    broadcast_max_concurrent: int = 3  # Одновременных рассылок в воркере
+    
+    # Subscriptions
+    subscription_notice_hours: str = "72,24"  # За сколько часов до окончания напоминать
     
     # Server
     backend_host: str = "0.0.0.0"
@@ -49,6 +68,14 @@ class Config(BaseSettings):
             return []
         return [int(x.strip()) for x in self.admin_ids.split(",") if x.strip()]
     
+    @property
+    def subscription_notice_hours_list(self) -> List[int]:
+        """Get reminder horizons in hours, largest first."""
+        if not self.subscription_notice_hours:
+            return []
+        hours = {int(x.strip()) for x in self.subscription_notice_hours.split(",") if x.strip()}
+        return sorted(hours, reverse=True)
+    
     @property
     def database_url(self) -> str:
         """Get SQLite database URL."""
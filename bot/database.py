@@ -3,36 +3,129 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import Connection, event, inspect, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from bot.config import config
 from bot.models import Base
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune every new SQLite connection of the pool."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers work while another process (bot, userbot, admin) writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.db_busy_timeout * 1000)}")
+    cursor.close()
+
+
+def make_engine(database_url: str | None = None) -> AsyncEngine:
+    """
+    Create an async engine with the shared connection-pool policy.
+    
+    Every process should normally have one engine (the module-level
+    `engine` below) and pass its session factory to the services it runs.
+    """
+    url = database_url or config.database_url
+    pool_args = {}
+    if ":memory:" not in url:
+        # In-memory SQLite uses a single static connection without a queue.
+        # File SQLite defaults to NullPool, which rejects the sizing options,
+        # so the queue pool is requested explicitly
+        pool_args = dict(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_pre_ping=True,
+        )
+    new_engine = create_async_engine(
+        url,
+        echo=config.debug,
+        future=True,
+        connect_args={"timeout": config.db_busy_timeout},
+        **pool_args,
+    )
+    if url.startswith("sqlite"):
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+def make_session_factory(bind: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    """Create a session factory with the project-wide session settings."""
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+
+
 # Create async engine
-engine = create_async_engine(
-    config.database_url,
-    echo=config.debug,
-    future=True,
-)
+engine = make_engine()
 
 # Session factory
-async_session_factory = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-)
+async_session_factory = make_session_factory(engine)
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    """
+    Add columns that exist in models but not in an older database file.
+    
+    create_all() only creates missing tables, so new nullable/defaulted
+    columns are added with ALTER TABLE ADD COLUMN.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+            if not column.nullable and default is not None:
+                ddl += " NOT NULL"
+            conn.execute(text(ddl))
+
+
+def _add_missing_indexes(conn: Connection) -> None:
+    """Create model indexes that an older database file does not have yet."""
+    inspector = inspect(conn)
+    created = False
+    
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                created = True
+    
+    # Refresh planner statistics so SQLite starts using the new indexes
+    if created:
+        conn.execute(text("ANALYZE"))
 
 
 async def init_db() -> None:
-    """Initialize database - create all tables."""
+    """Initialize database - create all tables, add missing columns and indexes."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_add_missing_indexes)
 
 
 async def close_db() -> None:
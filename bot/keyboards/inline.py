@@ -217,6 +217,29 @@ def renew_subscription_keyboard(tariff_id: int, lang: str) -> InlineKeyboardMark
     return builder.as_markup()
 
 
+def renew_subscriptions_keyboard(tariffs: list, lang: str) -> InlineKeyboardMarkup:
+    """Клавиатура продления нескольких подписок (кнопка на тариф)."""
+    builder = InlineKeyboardBuilder()
+    
+    _ = lambda key: get_text(key, lang)
+    
+    for tariff in tariffs:
+        name = tariff.name_ru if lang == 'ru' else tariff.name_en
+        builder.button(
+            text=_('subscription.renew_tariff_button').format(tariff_name=name),
+            callback_data=f"buy:{tariff.id}"
+        )
+    
+    # В меню
+    builder.button(
+        text=_('menu.back'),
+        callback_data="menu:main"
+    )
+    
+    builder.adjust(1)
+    return builder.as_markup()
+
+
 def subscriptions_keyboard(
     subscriptions: list,
     lang: str,
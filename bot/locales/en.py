@@ -120,6 +120,7 @@ TEXTS = {
     # Subscription (for notifications)
     'subscription': {
         'renew_button': '🔄 Renew subscription',
+        'renew_tariff_button': '🔄 Renew "{tariff_name}"',
         'back_to_list': '◀️ Back to list',
     },
     
@@ -136,12 +137,25 @@ TEXTS = {
         '📅 Expiration date: {expires_at}\n\n'
         '👇 Renew now.'
     ),
+    'subscription_expires_soon': (
+        '⏰ <b>Reminder</b>\n\n'
+        'Your subscription "{tariff_name}" expires soon.\n'
+        '📅 Expiration date: {expires_at}\n\n'
+        '👇 Renew to keep your access.'
+    ),
     'subscription_expired': (
         '❌ <b>Subscription expired</b>\n\n'
         'Your subscription "{tariff_name}" has ended.\n'
         'Channel access has been revoked.\n\n'
         '👇 Get a new subscription to restore access.'
     ),
+    'subscription_digest': (
+        '🔔 <b>Your subscriptions</b>\n\n'
+        '{items}\n\n'
+        '👇 Renew to keep your access.'
+    ),
+    'subscription_digest_expiring': '⏰ "{tariff_name}" — until {expires_at}',
+    'subscription_digest_expired': '❌ "{tariff_name}" — ended, channel access revoked',
     
     # Promocodes
     'promocode': {
@@ -120,6 +120,7 @@ TEXTS = {
     # Subscription (для уведомлений)
     'subscription': {
         'renew_button': '🔄 Продлить подписку',
+        'renew_tariff_button': '🔄 Продлить «{tariff_name}»',
         'back_to_list': '◀️ К списку подписок',
     },
     
@@ -136,12 +137,25 @@ TEXTS = {
         '📅 Дата окончания: {expires_at}\n\n'
         '👇 Продлите подписку сейчас.'
     ),
+    'subscription_expires_soon': (
+        '⏰ <b>Напоминание</b>\n\n'
+        'Ваша подписка «{tariff_name}» скоро истекает.\n'
+        '📅 Дата окончания: {expires_at}\n\n'
+        '👇 Продлите подписку, чтобы не потерять доступ.'
+    ),
     'subscription_expired': (
         '❌ <b>Подписка истекла</b>\n\n'
         'Ваша подписка «{tariff_name}» закончилась.\n'
         'Доступ к каналам был закрыт.\n\n'
         '👇 Оформите новую подписку, чтобы вернуть доступ.'
     ),
+    'subscription_digest': (
+        '🔔 <b>Ваши подписки</b>\n\n'
+        '{items}\n\n'
+        '👇 Продлите подписки, чтобы не потерять доступ.'
+    ),
+    'subscription_digest_expiring': '⏰ «{tariff_name}» — до {expires_at}',
+    'subscription_digest_expired': '❌ «{tariff_name}» — закончилась, доступ к каналам закрыт',
     
     # Промокоды
     'promocode': {
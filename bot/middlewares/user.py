@@ -65,6 +65,11 @@ class UserMiddleware(BaseMiddleware):
             user.first_name = tg_user.first_name
             user.last_name = tg_user.last_name
             user.last_activity = datetime.utcnow()
+            # Пользователь пишет боту - значит снова доступен для рассылок
+            if user.is_unreachable:
+                user.is_unreachable = False
+                user.unreachable_at = None
+                user.unreachable_reason = None
         
         # Передаём пользователя в data
         data['user'] = user
@@ -1,7 +1,7 @@
 """Broadcast model."""
 
 from datetime import datetime
-from sqlalchemy import Integer, String, Text, DateTime
+from sqlalchemy import Integer, BigInteger, String, Text, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot.models.base import Base, TimestampMixin
@@ -11,11 +11,18 @@ class Broadcast(Base, TimestampMixin):
     """Broadcast message campaign."""
     
     __tablename__ = "broadcasts"
+    __table_args__ = (
+        # Планировщик и воркер выбирают рассылки по статусу
+        Index("ix_broadcasts_status_scheduled_at", "status", "scheduled_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     message_text: Mapped[str] = mapped_column(Text, nullable=False)
-    message_photo: Mapped[str | None] = mapped_column(String(255), nullable=True)  # file_id
+    message_photo: Mapped[str | None] = mapped_column(String(255), nullable=True)  # file_id, URL или путь
+    photo_file_id: Mapped[str | None] = mapped_column(String(255), nullable=True)  # file_id после загрузки
     buttons_json: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON buttons
+    # JSON вариантов по языкам: {"en": {"message_text", "message_photo", "buttons", "photo_file_id"}}
+    variants_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     filter_type: Mapped[str] = mapped_column(
         String(20),
         default="all",
@@ -29,12 +36,18 @@ class Broadcast(Base, TimestampMixin):
     total_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     sent_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     failed_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Курсор доставки: все получатели с telegram_id <= курсора обработаны
+    last_recipient_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     status: Mapped[str] = mapped_column(
         String(20),
         default="draft",
         nullable=False
-    )  # draft, running, paused, completed, cancelled
+    )  # draft, scheduled, queued, running, paused, completed, cancelled
+    scheduled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # UTC
     started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Воркер рассылок, который выполняет рассылку, и его последний heartbeat
+    worker_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     
     @property
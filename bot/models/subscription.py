@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from sqlalchemy import (
     Integer, BigInteger, String, Boolean, DateTime, 
-    ForeignKey, func
+    ForeignKey, Index, func, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +20,19 @@ class Subscription(Base, TimestampMixin):
     """User subscription to a package."""
     
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Checker: только активные и ещё не обработанные подписки по сроку
+        # окончания - индекс не растёт с архивом истекших
+        Index(
+            "ix_subscriptions_pending_expires_at",
+            "expires_at",
+            sqlite_where=text("status IN ('active', 'trial') AND auto_kicked = 0"),
+        ),
+        # Дашборд и админка: активные подписки по статусу и сроку
+        Index("ix_subscriptions_status_expires_at", "status", "expires_at"),
+        # Подписки пользователя (новые первыми)
+        Index("ix_subscriptions_user_id_created_at", "user_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
@@ -51,6 +64,12 @@ class Subscription(Base, TimestampMixin):
     auto_kicked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     notified_3days: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     notified_1day: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Наименьший горизонт напоминания (часы до окончания), о котором уже уведомили
+    notice_horizon: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Маркеры обработки истечения: шаг с заполненным маркером не повторяется
+    # (kicked_at - кики поставлены в очередь задач userbot)
+    kicked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    expired_notified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     granted_by: Mapped[int | None] = mapped_column(BigInteger, nullable=True)  # Admin telegram_id
     
     # Relationships
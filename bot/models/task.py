@@ -1,7 +1,7 @@
 """Task model for userbot queue."""
 
 from datetime import datetime
-from sqlalchemy import Integer, BigInteger, String, Text, DateTime, func
+from sqlalchemy import Integer, BigInteger, String, Text, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot.models.base import Base, TimestampMixin
@@ -11,6 +11,10 @@ class Task(Base, TimestampMixin):
     """Task queue for userbot (invite/kick)."""
     
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Воркер: готовые к выполнению задачи по приоритету
+        Index("ix_tasks_status_priority_available_at", "status", "priority", "available_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     type: Mapped[str] = mapped_column(String(20), nullable=False)  # invite / kick
@@ -21,9 +25,13 @@ class Task(Base, TimestampMixin):
         String(20),
         default="pending",
         nullable=False
-    )  # pending, processing, completed, failed
+    )  # pending, processing, completed, failed (dead letter)
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # Меньше - раньше
     attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Не раньше (backoff)
+    locked_by: Mapped[str | None] = mapped_column(String(36), nullable=True)  # Воркер, взявший задачу
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Конец аренды
     processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     
     def __repr__(self) -> str:
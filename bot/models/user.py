@@ -28,6 +28,10 @@ class User(Base, TimestampMixin):
     is_banned: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     ban_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
     last_activity: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Бот не может писать пользователю (заблокировал бота, удалён аккаунт)
+    is_unreachable: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    unreachable_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    unreachable_reason: Mapped[str | None] = mapped_column(String(50), nullable=True)
     
     # Relationships
     subscriptions: Mapped[List["Subscription"]] = relationship(
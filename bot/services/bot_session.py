@@ -0,0 +1,44 @@
+"""
+Общий на процесс экземпляр Bot.
+
+Все сервисы процесса (checker подписок, рассылки) отправляют
+сообщения через один Bot и одну HTTP-сессию с keep-alive пулом,
+а не открывают каждый свой.
+"""
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from bot.config import config
+
+_bot: Bot | None = None
+
+
+def create_bot(token: str | None = None) -> Bot:
+    """
+    Создать Bot с общими настройками HTTP-пула.
+    
+    parse_mode по умолчанию не задаётся: тексты рассылок уходят как
+    есть, разметку указывает тот, кому она нужна.
+    """
+    session = AiohttpSession()
+    # aiogram 3.3 не принимает limit в конструкторе сессии - размер
+    # keep-alive пула передаём в параметры коннектора
+    session._connector_init["limit"] = config.bot_http_pool_size
+    return Bot(token=token or config.bot_token, session=session)
+
+
+def get_bot() -> Bot:
+    """Получить общий Bot процесса (создаётся при первом вызове)."""
+    global _bot
+    if _bot is None:
+        _bot = create_bot()
+    return _bot
+
+
+async def close_bot() -> None:
+    """Закрыть HTTP-сессию общего Bot."""
+    global _bot
+    if _bot is not None:
+        await _bot.session.close()
+        _bot = None
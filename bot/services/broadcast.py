@@ -3,23 +3,33 @@
 
 Поддерживает:
 - Создание рассылок с фильтрами
-- Отправка с фото и кнопками
-- Пауза, отмена, возобновление
-- Фоновая отправка
+- Отправка с фото и кнопками (фото загружается один раз)
+- Пауза, отмена, возобновление с места остановки
+- Фоновая отправка отдельным воркером (очередь в БД)
+- Отложенная отправка по scheduled_at
+- Варианты сообщения по языкам в одной рассылке
+- Параллельная отправка с общим лимитом Bot API
+- Исключение недоступных пользователей (заблокировали бота, удалены)
 """
 
+import os
 import json
+import time
+from collections import deque
 import asyncio
 import logging
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 from aiogram import Bot
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select, func
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile, URLInputFile
+from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.config import config
 from bot.models import User, Subscription, Broadcast
+from bot.services.rate_limiter import TokenBucket, KeyedRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -75,72 +85,686 @@ def parse_buttons(buttons_json: str | None) -> InlineKeyboardMarkup | None:
         return None
 
 
-async def get_broadcast_recipients(
-    session: AsyncSession,
-    filter_type: str = "all",
-    filter_language: str = "all",
-) -> list[User]:
+# Фрагменты ошибок Bot API, после которых писать пользователю бесполезно
+UNREACHABLE_ERRORS = {
+    "bot was blocked by the user": "blocked",
+    "user is deactivated": "deactivated",
+    "chat not found": "chat_not_found",
+    "bot can't initiate conversation": "not_started",
+}
+
+
+def classify_send_error(error: Exception | None) -> str | None:
     """
-    Получить список получателей по фильтрам.
+    Определить, означает ли ошибка отправки недоступного получателя.
+    
+    Returns:
+        Причина ("blocked", "deactivated", ...) или None для временных ошибок
+    """
+    if not isinstance(error, (TelegramForbiddenError, TelegramBadRequest)):
+        return None
+    
+    message = str(error).lower()
+    for fragment, reason in UNREACHABLE_ERRORS.items():
+        if fragment in message:
+            return reason
+    return None
+
+
+async def mark_unreachable(session: AsyncSession, reasons: dict[int, str]) -> None:
+    """
+    Пометить пользователей недоступными.
     
     Args:
         session: Сессия БД
-        filter_type: "all", "active", "inactive", "tariff_X"
-        filter_language: "all", "ru", "en"
+        reasons: {telegram_id: причина}
+    """
+    if not reasons:
+        return
     
-    Returns:
-        Список пользователей
+    now = datetime.utcnow()
+    by_reason: dict[str, list[int]] = {}
+    for telegram_id, reason in reasons.items():
+        by_reason.setdefault(reason, []).append(telegram_id)
+    
+    for reason, telegram_ids in by_reason.items():
+        await session.execute(
+            update(User)
+            .where(User.telegram_id.in_(telegram_ids))
+            .values(is_unreachable=True, unreachable_at=now, unreachable_reason=reason)
+        )
+    
+    logger.info(f"Marked {len(reasons)} users as unreachable")
+
+
+def _is_uploadable(photo: str | None) -> bool:
+    """Фото задано URL или локальным файлом, а не file_id."""
+    if not photo:
+        return False
+    return photo.startswith(("http://", "https://")) or os.path.isfile(photo)
+
+
+class BroadcastMessage:
+    """
+    Подготовленное сообщение рассылки.
+    
+    Клавиатура собирается один раз. Фото из URL или файла загружается
+    при первой отправке, дальше всем уходит полученный file_id.
+    """
+    
+    def __init__(
+        self,
+        text: str,
+        photo: str | None = None,
+        buttons_json: str | None = None,
+        photo_file_id: str | None = None,
+    ):
+        """
+        Args:
+            text: Текст (подпись к фото)
+            photo: file_id, URL или путь к файлу
+            buttons_json: JSON кнопок
+            photo_file_id: Уже известный file_id загруженного фото
+        """
+        self.text = text
+        self.photo = photo
+        self.keyboard = parse_buttons(buttons_json)
+        self.photo_file_id = photo_file_id or (None if _is_uploadable(photo) else photo)
+        self._upload_lock = asyncio.Lock()
+    
+    def _input_file(self) -> FSInputFile | URLInputFile:
+        """Файл для первой загрузки."""
+        if self.photo.startswith(("http://", "https://")):
+            return URLInputFile(self.photo)
+        return FSInputFile(self.photo)
+    
+    async def send(self, bot: Bot, telegram_id: int) -> None:
+        """Отправить сообщение одному получателю."""
+        if not self.photo:
+            await bot.send_message(telegram_id, self.text, reply_markup=self.keyboard)
+            return
+        
+        if self.photo_file_id is None:
+            # Загружает первый воркер, остальные ждут file_id
+            async with self._upload_lock:
+                if self.photo_file_id is None:
+                    message = await bot.send_photo(
+                        telegram_id,
+                        self._input_file(),
+                        caption=self.text,
+                        reply_markup=self.keyboard,
+                    )
+                    self.photo_file_id = message.photo[-1].file_id
+                    logger.info(f"Uploaded broadcast photo {self.photo}, file_id cached")
+                    return
+        
+        await bot.send_photo(
+            telegram_id,
+            self.photo_file_id,
+            caption=self.text,
+            reply_markup=self.keyboard,
+        )
+
+
+def parse_variants(variants_json: str | None) -> dict[str, dict]:
+    """
+    Парсинг языковых вариантов рассылки из JSON.
+    
+    Формат JSON:
+    {
+        "en": {"message_text": "...", "message_photo": "...", "buttons": [[...]]}
+    }
+    """
+    if not variants_json:
+        return {}
+    
+    try:
+        data = json.loads(variants_json)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    
+    if not isinstance(data, dict):
+        return {}
+    return {
+        lang: variant for lang, variant in data.items()
+        if isinstance(variant, dict) and variant.get("message_text")
+    }
+
+
+class LocalizedBroadcast:
+    """
+    Сообщения рассылки по языкам.
+    
+    Каждый вариант (текст, клавиатура, file_id фото) готовится один раз
+    и используется для всех получателей своего языка. Языки без
+    варианта получают основное сообщение.
+    """
+    
+    def __init__(self, broadcast: Broadcast):
+        self.default = BroadcastMessage(
+            broadcast.message_text,
+            photo=broadcast.message_photo,
+            buttons_json=broadcast.buttons_json,
+            photo_file_id=broadcast.photo_file_id,
+        )
+        self._variants_data = parse_variants(broadcast.variants_json)
+        self.variants = {
+            lang: BroadcastMessage(
+                variant["message_text"],
+                photo=variant.get("message_photo"),
+                buttons_json=json.dumps(variant["buttons"]) if variant.get("buttons") else None,
+                photo_file_id=variant.get("photo_file_id"),
+            )
+            for lang, variant in self._variants_data.items()
+        }
+    
+    def for_language(self, language: str | None) -> BroadcastMessage:
+        """Сообщение для языка получателя."""
+        return self.variants.get(language, self.default)
+    
+    def variants_json(self) -> str | None:
+        """JSON вариантов с file_id загруженных фото."""
+        if not self._variants_data:
+            return None
+        
+        data = {}
+        for lang, variant in self._variants_data.items():
+            data[lang] = dict(variant)
+            file_id = self.variants[lang].photo_file_id
+            if file_id and variant.get("message_photo"):
+                data[lang]["photo_file_id"] = file_id
+        return json.dumps(data, ensure_ascii=False)
+
+
+_global_bucket: TokenBucket | None = None
+
+
+def get_global_bucket() -> TokenBucket:
+    """
+    Общий на процесс бюджет отправки.
+    
+    Все рассылки процесса делят один бакет, поэтому параллельные
+    рассылки вместе не превышают лимит Bot API.
+    """
+    global _global_bucket
+    if _global_bucket is None:
+        _global_bucket = TokenBucket(rate=config.broadcast_rate_limit)
+    return _global_bucket
+
+
+class BroadcastStats:
+    """Статистика отправки."""
+    
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+    
+    @property
+    def processed(self) -> int:
+        """Обработано получателей."""
+        return self.sent + self.failed
+    
+    @property
+    def elapsed(self) -> float:
+        """Прошло секунд с начала отправки."""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+    
+    @property
+    def rate(self) -> float:
+        """Фактическая скорость, сообщений в секунду."""
+        if self.elapsed <= 0:
+            return 0.0
+        return round(self.processed / self.elapsed, 2)
+
+
+class BroadcastSender:
+    """
+    Параллельный отправитель рассылок.
+    
+    Пул воркеров забирает получателей из ограниченной очереди.
+    Перед каждой отправкой воркер берёт токен из глобального бакета
+    и ждёт лимит на чат. TelegramRetryAfter ставит на паузу весь бакет.
+    """
+    
+    def __init__(
+        self,
+        workers: int | None = None,
+        bucket: TokenBucket | None = None,
+        chat_interval: float | None = None,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            workers: Количество воркеров (по умолчанию из конфига)
+            bucket: Бакет лимита (по умолчанию общий на процесс)
+            chat_interval: Минимальный интервал для одного чата (сек)
+            max_retries: Повторов после RetryAfter
+        """
+        self.workers = workers or config.broadcast_workers
+        self.bucket = bucket or get_global_bucket()
+        self.chat_limiter = KeyedRateLimiter(
+            config.broadcast_chat_interval if chat_interval is None else chat_interval
+        )
+        self.max_retries = max_retries
+        self.stats = BroadcastStats()
+        self._stopped = False
+        self._result_lock = asyncio.Lock()
+        
+        # Журнал доставки: получатели в порядке постановки в очередь
+        self.acknowledged: int | None = None
+        self._in_order: deque[int] = deque()
+        self._done: set[int] = set()
+    
+    def stop(self) -> None:
+        """Остановить отправку (уже начатые запросы завершатся)."""
+        self._stopped = True
+    
+    @property
+    def is_stopped(self) -> bool:
+        return self._stopped
+    
+    def _acknowledge(self, telegram_id: int) -> None:
+        """
+        Отметить получателя обработанным и сдвинуть курсор.
+        
+        Воркеры завершают отправки не по порядку, поэтому курсор -
+        последний получатель, до которого включительно обработаны все.
+        """
+        self._done.add(telegram_id)
+        while self._in_order and self._in_order[0] in self._done:
+            self.acknowledged = self._in_order.popleft()
+            self._done.discard(self.acknowledged)
+    
+    async def _deliver(
+        self,
+        telegram_id: int,
+        send: Callable[[int], Awaitable[Any]],
+    ) -> tuple[bool, Exception | None]:
+        """Отправить одному получателю с учётом лимитов."""
+        error: Exception | None = None
+        
+        for _ in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            await self.chat_limiter.acquire(telegram_id)
+            
+            try:
+                await send(telegram_id)
+                return True, None
+            except TelegramRetryAfter as e:
+                logger.warning(f"RetryAfter {e.retry_after}s, pausing broadcast bucket")
+                self.bucket.pause(e.retry_after)
+                error = e
+            except Exception as e:
+                return False, e
+        
+        return False, error
+    
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        send: Callable[[int], Awaitable[Any]],
+        on_result: Callable[[int, bool, Exception | None], Awaitable[None]] | None,
+    ) -> None:
+        """Воркер: отправляет получателей из очереди."""
+        while True:
+            telegram_id = await queue.get()
+            try:
+                if telegram_id is None:
+                    return
+                if self._stopped:
+                    continue
+                
+                ok, error = await self._deliver(telegram_id, send)
+                if ok:
+                    self.stats.sent += 1
+                else:
+                    self.stats.failed += 1
+                self._acknowledge(telegram_id)
+                
+                if on_result:
+                    # Колбэки последовательно: им можно работать с одной сессией
+                    async with self._result_lock:
+                        try:
+                            await on_result(telegram_id, ok, error)
+                        except Exception as e:
+                            # Сбой учёта (например, "database is locked" при сбросе) не
+                            # должен убивать воркер: без воркеров run() повиснет на queue.put
+                            logger.error(f"Broadcast result callback failed for {telegram_id}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+    
+    async def run(
+        self,
+        recipients: AsyncIterator[list[int]],
+        send: Callable[[int], Awaitable[Any]],
+        on_result: Callable[[int, bool, Exception | None], Awaitable[None]] | None = None,
+    ) -> BroadcastStats:
+        """
+        Отправить всем получателям.
+        
+        Args:
+            recipients: Пачки telegram_id (см. iter_broadcast_recipients)
+            send: Корутина отправки одному получателю
+            on_result: Колбэк (telegram_id, ok, error) после каждой отправки
+        
+        Returns:
+            Статистика отправки
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        workers = [
+            asyncio.create_task(self._worker(queue, send, on_result))
+            for _ in range(self.workers)
+        ]
+        
+        try:
+            while not self._stopped:
+                # Выборка пачки и колбэки не пересекаются: обычно они делят одну сессию
+                async with self._result_lock:
+                    chunk = await anext(recipients, None)
+                if chunk is None:
+                    break
+                
+                for telegram_id in chunk:
+                    if self._stopped:
+                        break
+                    self._in_order.append(telegram_id)
+                    await queue.put(telegram_id)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            self.stats.finished_at = time.monotonic()
+        
+        return self.stats
+
+
+class BroadcastControl:
+    """
+    Управление запущенной рассылкой внутри процесса.
+    
+    pause/cancel сигналят сюда, и отправка останавливается сразу,
+    без опроса строки рассылки на каждом сообщении.
+    """
+    
+    def __init__(self, broadcast_id: int, sender: BroadcastSender):
+        self.broadcast_id = broadcast_id
+        self.sender = sender
+        self.status = "running"
+    
+    def signal(self, status: str) -> None:
+        """Сменить статус и остановить отправку."""
+        self.status = status
+        self.sender.stop()
+    
+    @property
+    def is_running(self) -> bool:
+        return self.status == "running"
+
+
+# Запуски рассылок в этом процессе: broadcast_id -> управление каждого запуска.
+# После паузы и возобновления старый запуск может ещё дорабатывать очередь,
+# поэтому у одной рассылки бывает больше одного запуска
+_controls: dict[int, list[BroadcastControl]] = {}
+
+
+def get_broadcast_controls(broadcast_id: int) -> list[BroadcastControl]:
+    """Управление запусками рассылки в этом процессе."""
+    return list(_controls.get(broadcast_id, ()))
+
+
+def signal_broadcast(broadcast_id: int, status: str) -> None:
+    """Передать новый статус всем ещё идущим запускам рассылки."""
+    for control in get_broadcast_controls(broadcast_id):
+        if control.is_running:
+            control.signal(status)
+
+
+class BroadcastProgress:
+    """
+    Накопитель прогресса рассылки.
+    
+    Счётчики копятся в памяти и сбрасываются в БД одним UPDATE
+    раз в flush_every сообщений или flush_interval секунд.
+    При сбросе заодно читается статус - на случай, если рассылку
+    поставили на паузу из другого процесса.
+    """
+    
+    def __init__(
+        self,
+        session: AsyncSession,
+        control: BroadcastControl,
+        flush_every: int | None = None,
+        flush_interval: float | None = None,
+    ):
+        self.session = session
+        self.control = control
+        self.flush_every = flush_every or config.broadcast_flush_every
+        self.flush_interval = (
+            config.broadcast_flush_interval if flush_interval is None else flush_interval
+        )
+        self.pending_sent = 0
+        self.pending_failed = 0
+        self.unreachable: dict[int, str] = {}
+        self._last_flush = time.monotonic()
+    
+    @property
+    def pending(self) -> int:
+        return self.pending_sent + self.pending_failed
+    
+    async def add(self, telegram_id: int, ok: bool, error: Exception | None = None) -> None:
+        """Учесть результат отправки и при необходимости сбросить."""
+        if ok:
+            self.pending_sent += 1
+        else:
+            self.pending_failed += 1
+            reason = classify_send_error(error)
+            if reason:
+                self.unreachable[telegram_id] = reason
+        
+        if (
+            self.pending >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+    
+    async def flush(self) -> None:
+        """Записать счётчики, курсор и недоступных получателей, сверить статус."""
+        broadcast_id = self.control.broadcast_id
+        cursor = self.control.sender.acknowledged
+        
+        sent, failed, unreachable = self.pending_sent, self.pending_failed, self.unreachable
+        self.pending_sent = 0
+        self.pending_failed = 0
+        self.unreachable = {}
+        
+        try:
+            if sent or failed or cursor is not None:
+                values = {
+                    "sent_count": Broadcast.sent_count + sent,
+                    "failed_count": Broadcast.failed_count + failed,
+                }
+                if cursor is not None:
+                    values["last_recipient_id"] = cursor
+                
+                await self.session.execute(
+                    update(Broadcast).where(Broadcast.id == broadcast_id).values(**values)
+                )
+            
+            await mark_unreachable(self.session, unreachable)
+            
+            status = await self.session.scalar(
+                select(Broadcast.status).where(Broadcast.id == broadcast_id)
+            )
+            await self.session.commit()
+        except Exception:
+            # Несохранённое вернётся в следующий сброс
+            await self.session.rollback()
+            self.pending_sent += sent
+            self.pending_failed += failed
+            self.unreachable = {**unreachable, **self.unreachable}
+            self._last_flush = time.monotonic()
+            raise
+        self._last_flush = time.monotonic()
+        
+        if status != "running" and self.control.is_running:
+            self.control.signal(status)
+
+
+def _recipients_conditions(
+    filter_type: str = "all",
+    filter_language: str = "all",
+    after: int | None = None,
+    include_unreachable: bool = False,
+) -> list:
+    """
+    Собрать SQL-условия выборки получателей по фильтрам.
+    
+    Фильтры по подпискам компилируются в EXISTS / NOT EXISTS,
+    чтобы вся выборка выполнялась одним запросом.
     """
     now = datetime.utcnow()
     
-    # Базовый запрос - не забаненные юзеры
-    stmt = select(User).where(User.is_banned == False)
+    # Базовое условие - не забаненные юзеры
+    conditions = [User.is_banned == False]
+    
+    # Недоступных (заблокировали бота и т.п.) пропускаем
+    if not include_unreachable:
+        conditions.append(User.is_unreachable == False)
     
     # Фильтр по языку
     if filter_language != "all":
-        stmt = stmt.where(User.language == filter_language)
+        conditions.append(User.language == filter_language)
     
-    result = await session.execute(stmt)
-    users = result.scalars().all()
+    # Продолжение с курсора
+    if after is not None:
+        conditions.append(User.telegram_id > after)
     
-    # Если нужен фильтр по подпискам
     if filter_type == "all":
-        return list(users)
+        return conditions
     
-    filtered_users = []
+    # Активная подписка пользователя
+    active_sub = select(Subscription.id).where(
+        Subscription.user_id == User.id,
+        Subscription.is_active == True,
+        (Subscription.expires_at == None) | (Subscription.expires_at > now),
+    )
     
-    for user in users:
-        # Проверяем активную подписку
-        sub_stmt = select(Subscription).where(
-            Subscription.user_id == user.id,
-            Subscription.is_active == True,
-            (Subscription.expires_at == None) | (Subscription.expires_at > now)
-        )
-        sub_result = await session.execute(sub_stmt)
-        active_sub = sub_result.scalar_one_or_none()
+    if filter_type == "active":
+        conditions.append(active_sub.exists())
+    elif filter_type == "inactive":
+        conditions.append(~active_sub.exists())
+    elif filter_type.startswith("tariff_"):
+        tariff_id = int(filter_type.split("_")[1])
+        conditions.append(active_sub.where(Subscription.tariff_id == tariff_id).exists())
+    
+    return conditions
+
+
+async def iter_broadcast_recipients(
+    session: AsyncSession,
+    filter_type: str = "all",
+    filter_language: str = "all",
+    chunk_size: int = 1000,
+    after: int | None = None,
+    include_unreachable: bool = False,
+    with_language: bool = False,
+) -> AsyncIterator[list]:
+    """
+    Потоковая выборка получателей пачками.
+    
+    Пагинация по telegram_id (keyset), поэтому каждая пачка -
+    отдельный короткий запрос по уникальному индексу.
+    
+    Args:
+        session: Сессия БД
+        filter_type: "all", "active", "inactive", "tariff_X"
+        filter_language: "all", "ru", "en"
+        chunk_size: Размер пачки
+        after: Начать после этого telegram_id (курсор рассылки)
+        include_unreachable: Включать недоступных пользователей
+        with_language: Возвращать пары (telegram_id, language)
+    
+    Yields:
+        Списки telegram_id (или пар с языком)
+    """
+    conditions = _recipients_conditions(
+        filter_type, filter_language, include_unreachable=include_unreachable
+    )
+    last_id = after
+    
+    columns = (User.telegram_id, User.language) if with_language else (User.telegram_id,)
+    
+    while True:
+        stmt = select(*columns).where(*conditions)
+        if last_id is not None:
+            stmt = stmt.where(User.telegram_id > last_id)
+        stmt = stmt.order_by(User.telegram_id).limit(chunk_size)
+        
+        result = await session.execute(stmt)
+        if with_language:
+            chunk = [tuple(row) for row in result.all()]
+        else:
+            chunk = list(result.scalars().all())
         
-        if filter_type == "active":
-            if active_sub:
-                filtered_users.append(user)
-        elif filter_type == "inactive":
-            if not active_sub:
-                filtered_users.append(user)
-        elif filter_type.startswith("tariff_"):
-            tariff_id = int(filter_type.split("_")[1])
-            if active_sub and active_sub.tariff_id == tariff_id:
-                filtered_users.append(user)
+        if not chunk:
+            return
+        
+        yield chunk
+        
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0] if with_language else chunk[-1]
+
+
+async def get_broadcast_recipients(
+    session: AsyncSession,
+    filter_type: str = "all",
+    filter_language: str = "all",
+) -> list[int]:
+    """
+    Получить список получателей по фильтрам.
     
-    return filtered_users
+    Args:
+        session: Сессия БД
+        filter_type: "all", "active", "inactive", "tariff_X"
+        filter_language: "all", "ru", "en"
+    
+    Returns:
+        Список telegram_id
+    """
+    recipients: list[int] = []
+    async for chunk in iter_broadcast_recipients(session, filter_type, filter_language):
+        recipients.extend(chunk)
+    return recipients
 
 
 async def count_broadcast_recipients(
     session: AsyncSession,
     filter_type: str = "all",
     filter_language: str = "all",
+    after: int | None = None,
+    include_unreachable: bool = False,
 ) -> int:
-    """Подсчёт количества получателей."""
-    recipients = await get_broadcast_recipients(session, filter_type, filter_language)
-    return len(recipients)
+    """Подсчёт количества получателей (COUNT(*) без выборки строк)."""
+    stmt = select(func.count()).select_from(User).where(
+        *_recipients_conditions(filter_type, filter_language, after, include_unreachable)
+    )
+    return await session.scalar(stmt) or 0
+
+
+async def count_remaining_recipients(session: AsyncSession, broadcast: Broadcast) -> int:
+    """Сколько получателей рассылки ещё не обработано (после курсора)."""
+    if broadcast.status in ("completed", "cancelled"):
+        return 0
+    return await count_broadcast_recipients(
+        session,
+        broadcast.filter_type,
+        broadcast.filter_language,
+        after=broadcast.last_recipient_id,
+    )
 
 
 async def create_broadcast(
@@ -151,6 +775,7 @@ async def create_broadcast(
     filter_type: str = "all",
     filter_language: str = "all",
     scheduled_at: datetime | None = None,
+    variants_json: str | None = None,
 ) -> Broadcast:
     """
     Создать новую рассылку.
@@ -158,14 +783,15 @@ async def create_broadcast(
     Args:
         session: Сессия БД
         message_text: Текст сообщения
-        message_photo: file_id фото (опционально)
+        message_photo: file_id, URL или путь к фото (опционально)
         buttons_json: JSON кнопок (опционально)
         filter_type: Тип фильтра
         filter_language: Фильтр языка
-        scheduled_at: Время запланированной отправки
+        scheduled_at: Время запланированной отправки (UTC)
+        variants_json: JSON вариантов по языкам (опционально)
     
     Returns:
-        Созданная рассылка
+        Созданная рассылка (scheduled, если указано время)
     """
     # Подсчёт получателей
     total_users = await count_broadcast_recipients(session, filter_type, filter_language)
@@ -174,10 +800,11 @@ async def create_broadcast(
         message_text=message_text,
         message_photo=message_photo,
         buttons_json=buttons_json,
+        variants_json=variants_json,
         filter_type=filter_type,
         filter_language=filter_language,
         total_users=total_users,
-        status="draft",
+        status="scheduled" if scheduled_at else "draft",
         scheduled_at=scheduled_at,
     )
     
@@ -205,13 +832,21 @@ async def update_broadcast(
     """Обновить рассылку."""
     broadcast = await get_broadcast(session, broadcast_id)
     
-    if broadcast.status != "draft":
+    if broadcast.status not in ("draft", "scheduled"):
         raise BroadcastInvalidStateError("Can only update draft broadcasts")
     
     for key, value in kwargs.items():
         if hasattr(broadcast, key):
             setattr(broadcast, key, value)
     
+    # Время отправки определяет, ждёт ли рассылка планировщика
+    if "scheduled_at" in kwargs:
+        broadcast.status = "scheduled" if broadcast.scheduled_at else "draft"
+    
+    # Новое фото - сбрасываем закешированный file_id
+    if "message_photo" in kwargs:
+        broadcast.photo_file_id = None
+    
     # Пересчитываем получателей если изменились фильтры
     if "filter_type" in kwargs or "filter_language" in kwargs:
         broadcast.total_users = await count_broadcast_recipients(
@@ -227,7 +862,7 @@ async def delete_broadcast(session: AsyncSession, broadcast_id: int) -> None:
     """Удалить рассылку."""
     broadcast = await get_broadcast(session, broadcast_id)
     
-    if broadcast.status in ("running",):
+    if broadcast.status in ("queued", "running"):
         raise BroadcastInvalidStateError("Cannot delete running broadcast")
     
     await session.delete(broadcast)
@@ -239,7 +874,7 @@ async def start_broadcast(
     session: AsyncSession,
     bot: Bot,
     broadcast_id: int,
-    delay: float = 0.05,
+    sender: BroadcastSender | None = None,
 ) -> Broadcast:
     """
     Запустить рассылку.
@@ -248,14 +883,14 @@ async def start_broadcast(
         session: Сессия БД
         bot: Telegram Bot
         broadcast_id: ID рассылки
-        delay: Задержка между сообщениями (сек)
+        sender: Отправитель (по умолчанию - с настройками из конфига)
     
     Returns:
         Обновлённая рассылка
     """
     broadcast = await get_broadcast(session, broadcast_id)
     
-    if broadcast.status not in ("draft", "paused"):
+    if broadcast.status not in ("draft", "queued", "paused", "running"):
         raise BroadcastInvalidStateError(f"Cannot start broadcast in {broadcast.status} state")
     
     # Обновляем статус
@@ -264,66 +899,101 @@ async def start_broadcast(
         broadcast.started_at = datetime.utcnow()
     await session.commit()
     
-    # Получаем получателей
-    recipients = await get_broadcast_recipients(
-        session, broadcast.filter_type, broadcast.filter_language
-    )
+    sender = sender or BroadcastSender()
+    control = BroadcastControl(broadcast_id, sender)
+    progress = BroadcastProgress(session, control)
+    _controls.setdefault(broadcast_id, []).append(control)
+    
+    # Сообщения по языкам готовятся один раз на всю рассылку
+    messages = LocalizedBroadcast(broadcast)
+    languages: dict[int, str] = {}
     
-    # Парсим кнопки
-    keyboard = parse_buttons(broadcast.buttons_json)
+    async def recipients() -> AsyncIterator[list[int]]:
+        # Один проход: язык запоминается до отправки, отправитель видит только telegram_id
+        async for chunk in iter_broadcast_recipients(
+            session,
+            broadcast.filter_type,
+            broadcast.filter_language,
+            after=broadcast.last_recipient_id,
+            with_language=True,
+        ):
+            for telegram_id, language in chunk:
+                languages[telegram_id] = language
+            yield [telegram_id for telegram_id, _ in chunk]
+    
+    async def send(telegram_id: int) -> None:
+        await messages.for_language(languages.get(telegram_id)).send(bot, telegram_id)
+    
+    async def on_result(telegram_id: int, ok: bool, error: Exception | None) -> None:
+        languages.pop(telegram_id, None)
+        if not ok:
+            logger.warning(f"Failed to send broadcast #{broadcast_id} to user {telegram_id}: {error}")
+        await progress.add(telegram_id, ok, error)
     
     # Отправка
-    for user in recipients:
-        # Проверяем статус (могли поставить на паузу или отменить)
-        await session.refresh(broadcast)
-        if broadcast.status != "running":
-            break
-        
-        try:
-            if broadcast.message_photo:
-                await bot.send_photo(
-                    user.telegram_id,
-                    broadcast.message_photo,
-                    caption=broadcast.message_text,
-                    reply_markup=keyboard,
-                )
-            else:
-                await bot.send_message(
-                    user.telegram_id,
-                    broadcast.message_text,
-                    reply_markup=keyboard,
-                )
-            broadcast.sent_count += 1
-        except Exception as e:
-            logger.warning(f"Failed to send broadcast #{broadcast_id} to user {user.telegram_id}: {e}")
-            broadcast.failed_count += 1
+    try:
+        stats = await sender.run(recipients(), send, on_result)
+    finally:
+        runs = _controls.get(broadcast_id, [])
+        if control in runs:
+            runs.remove(control)
+        if not runs:
+            _controls.pop(broadcast_id, None)
+        await progress.flush()
         
+        # Кешируем file_id, чтобы при возобновлении не загружать фото снова
+        photo_file_id = messages.default.photo_file_id
+        variants_json = messages.variants_json()
+        if photo_file_id and photo_file_id != broadcast.photo_file_id:
+            broadcast.photo_file_id = photo_file_id
+        if variants_json != broadcast.variants_json and variants_json is not None:
+            broadcast.variants_json = variants_json
         await session.commit()
-        await asyncio.sleep(delay)
     
-    # Завершение
+    # Завершение. Запуск, остановленный паузой или отменой, рассылку не
+    # завершает: после возобновления "running" принадлежит уже новому запуску
     await session.refresh(broadcast)
-    if broadcast.status == "running":
+    if broadcast.status == "running" and control.is_running:
         broadcast.status = "completed"
         broadcast.completed_at = datetime.utcnow()
         await session.commit()
     
     logger.info(
-        f"Broadcast #{broadcast_id} finished: sent={broadcast.sent_count}, failed={broadcast.failed_count}"
+        f"Broadcast #{broadcast_id} finished: sent={broadcast.sent_count}, "
+        f"failed={broadcast.failed_count}, rate={stats.rate} msg/s"
     )
     
     return broadcast
 
 
+async def enqueue_broadcast(session: AsyncSession, broadcast_id: int) -> Broadcast:
+    """
+    Поставить рассылку в очередь воркера рассылок.
+    
+    Отправку выполняет отдельный процесс (bot.services.broadcast_worker).
+    """
+    broadcast = await get_broadcast(session, broadcast_id)
+    
+    if broadcast.status not in ("draft", "scheduled", "paused"):
+        raise BroadcastInvalidStateError(f"Cannot start broadcast in {broadcast.status} state")
+    
+    broadcast.status = "queued"
+    await session.commit()
+    
+    logger.info(f"Broadcast #{broadcast_id} queued")
+    return broadcast
+
+
 async def pause_broadcast(session: AsyncSession, broadcast_id: int) -> Broadcast:
     """Поставить рассылку на паузу."""
     broadcast = await get_broadcast(session, broadcast_id)
     
-    if broadcast.status != "running":
+    if broadcast.status not in ("queued", "running"):
         raise BroadcastInvalidStateError("Can only pause running broadcasts")
     
     broadcast.status = "paused"
     await session.commit()
+    signal_broadcast(broadcast_id, "paused")
     
     logger.info(f"Broadcast #{broadcast_id} paused")
     return broadcast
@@ -340,7 +1010,7 @@ async def resume_broadcast(
     if broadcast.status != "paused":
         raise BroadcastInvalidStateError("Can only resume paused broadcasts")
     
-    # start_broadcast уже поддерживает возобновление
+    # start_broadcast продолжает с курсора last_recipient_id
     return await start_broadcast(session, bot, broadcast_id)
 
 
@@ -348,11 +1018,12 @@ async def cancel_broadcast(session: AsyncSession, broadcast_id: int) -> Broadcas
     """Отменить рассылку."""
     broadcast = await get_broadcast(session, broadcast_id)
     
-    if broadcast.status not in ("draft", "running", "paused"):
+    if broadcast.status not in ("draft", "scheduled", "queued", "running", "paused"):
         raise BroadcastInvalidStateError(f"Cannot cancel broadcast in {broadcast.status} state")
     
     broadcast.status = "cancelled"
     await session.commit()
+    signal_broadcast(broadcast_id, "cancelled")
     
     logger.info(f"Broadcast #{broadcast_id} cancelled")
     return broadcast
@@ -389,19 +1060,31 @@ async def quick_broadcast(
     Используется для админ-панели в боте.
     
     Returns:
-        {"sent": int, "failed": int, "total": int}
+        {"sent": int, "failed": int, "total": int, "rate": float}
     """
-    recipients = await get_broadcast_recipients(session, filter_type, filter_language)
+    sender = BroadcastSender()
+    unreachable: dict[int, str] = {}
     
-    sent = 0
-    failed = 0
+    async def send(telegram_id: int) -> None:
+        await bot.send_message(telegram_id, message_text)
     
-    for user in recipients:
-        try:
-            await bot.send_message(user.telegram_id, message_text)
-            sent += 1
-        except:
-            failed += 1
-        await asyncio.sleep(0.05)
+    async def on_result(telegram_id: int, ok: bool, error: Exception | None) -> None:
+        reason = None if ok else classify_send_error(error)
+        if reason:
+            unreachable[telegram_id] = reason
+    
+    stats = await sender.run(
+        iter_broadcast_recipients(session, filter_type, filter_language),
+        send,
+        on_result,
+    )
+    
+    await mark_unreachable(session, unreachable)
+    await session.commit()
     
-    return {"sent": sent, "failed": failed, "total": len(recipients)}
+    return {
+        "sent": stats.sent,
+        "failed": stats.failed,
+        "total": stats.processed,
+        "rate": stats.rate,
+    }
@@ -0,0 +1,147 @@
+"""
+Планировщик отложенных рассылок.
+
+Держит в памяти кучу (scheduled_at, id) запланированных рассылок и спит
+ровно до ближайшей. Наступившую рассылку переводит scheduled -> queued
+условным UPDATE, дальше её выполняет воркер рассылок. Статус в БД -
+единственный источник правды, поэтому после рестарта ничего не
+отправляется дважды.
+
+Перечитывание дочитывает только рассылки раньше головы кучи (по индексу
+status, scheduled_at): всё, что позже, сработает не раньше головы и
+будет дочитано, когда голова снимется. Отменённые и перенесённые
+рассылки отсеивает условный UPDATE.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models import Broadcast
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastScheduler:
+    """Запуск рассылок по scheduled_at."""
+    
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        refresh_interval: float = 30.0,
+        on_fired: Optional[Callable[[int], None]] = None,
+        batch_size: int = 100,
+    ):
+        """
+        Args:
+            session_maker: Фабрика сессий БД
+            refresh_interval: Как часто проверять, не запланировали ли в админке
+                рассылку раньше ближайшей известной (сек)
+            on_fired: Колбэк с ID рассылки, поставленной в очередь
+            batch_size: Сколько ближайших рассылок дочитывать за раз
+        """
+        self._session_maker = session_maker
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self._on_fired = on_fired
+        self._heap: list[tuple[datetime, int]] = []
+        self._next_reload = 0.0
+        self._running = False
+    
+    async def reload(self) -> None:
+        """
+        Дочитать запланированные рассылки раньше головы кучи.
+        
+        Строк раньше головы в куче нет по определению, поэтому дубликатов
+        не бывает; обычно выборка пустая.
+        """
+        stmt = select(Broadcast.scheduled_at, Broadcast.id).where(
+            Broadcast.status == "scheduled",
+            Broadcast.scheduled_at != None,
+        )
+        if self._heap:
+            stmt = stmt.where(Broadcast.scheduled_at < self._heap[0][0])
+        
+        async with self._session_maker() as session:
+            result = await session.execute(
+                stmt.order_by(Broadcast.scheduled_at).limit(self.batch_size)
+            )
+            rows = result.all()
+        
+        for scheduled_at, broadcast_id in rows:
+            heapq.heappush(self._heap, (scheduled_at, broadcast_id))
+        self._next_reload = time.monotonic() + self.refresh_interval
+    
+    async def fire_due(self) -> list[int]:
+        """
+        Поставить в очередь все наступившие рассылки.
+        
+        Returns:
+            ID поставленных в очередь рассылок
+        """
+        now = datetime.utcnow()
+        fired: list[int] = []
+        popped = False
+        
+        while self._heap and self._heap[0][0] <= now:
+            scheduled_at, broadcast_id = heapq.heappop(self._heap)
+            popped = True
+            
+            async with self._session_maker() as session:
+                # Рассылку могли отменить или перенести - тогда UPDATE ничего не изменит
+                result = await session.execute(
+                    update(Broadcast)
+                    .where(
+                        Broadcast.id == broadcast_id,
+                        Broadcast.status == "scheduled",
+                        Broadcast.scheduled_at == scheduled_at,
+                    )
+                    .values(status="queued")
+                )
+                await session.commit()
+            
+            if result.rowcount == 1:
+                logger.info(f"Scheduled broadcast #{broadcast_id} queued (due {scheduled_at})")
+                fired.append(broadcast_id)
+                if self._on_fired:
+                    self._on_fired(broadcast_id)
+        
+        if popped:
+            # Голова сдвинулась - дочитываем то, что раньше новой головы
+            self._next_reload = 0.0
+        return fired
+    
+    def _seconds_until_next(self) -> float:
+        """Сколько спать до ближайшего события (рассылка или перечитывание)."""
+        until_reload = self._next_reload - time.monotonic()
+        if not self._heap:
+            return max(0.0, until_reload)
+        
+        until_due = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+        return max(0.0, min(until_due, until_reload))
+    
+    async def run_forever(self) -> None:
+        """Бесконечный цикл планировщика."""
+        self._running = True
+        logger.info("Broadcast scheduler started")
+        
+        while self._running:
+            try:
+                if time.monotonic() >= self._next_reload:
+                    await self.reload()
+                await self.fire_due()
+            except Exception as e:
+                logger.error(f"Error in broadcast scheduler: {e}", exc_info=True)
+                self._next_reload = time.monotonic() + self.refresh_interval
+            
+            await asyncio.sleep(self._seconds_until_next())
+    
+    def stop(self) -> None:
+        """Остановить планировщик."""
+        self._running = False
@@ -0,0 +1,228 @@
+"""
+Воркер рассылок.
+
+Отдельный процесс, который забирает рассылки из очереди в БД:
+- Захват queued рассылок атомарным UPDATE
+- Перехват running рассылок с протухшим heartbeat (упавший воркер)
+- Собственная сессия Bot и БД
+- Heartbeat и проверка паузы/отмены, выставленных из админки
+- Несколько рассылок одновременно на общем бюджете отправки
+- Планировщик отложенных рассылок (BroadcastScheduler)
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models import Broadcast
+from bot.services.broadcast import start_broadcast, signal_broadcast
+from bot.services.broadcast_scheduler import BroadcastScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastWorker:
+    """Выполнение рассылок из очереди в БД."""
+    
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        bot,
+        poll_interval: float = 5.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+        max_concurrent: int = 3,
+    ):
+        """
+        Args:
+            session_maker: Фабрика сессий БД
+            bot: Экземпляр aiogram Bot
+            poll_interval: Как часто проверять очередь (сек)
+            heartbeat_interval: Как часто обновлять heartbeat (сек)
+            stale_after: Через сколько секунд без heartbeat рассылка считается брошенной
+            max_concurrent: Сколько рассылок выполнять одновременно
+        """
+        self._session_maker = session_maker
+        self._bot = bot
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_concurrent = max_concurrent
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = False
+        self._active: dict[int, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self.scheduler = BroadcastScheduler(session_maker, on_fired=lambda _: self._wakeup.set())
+    
+    async def claim_next(self) -> Optional[int]:
+        """
+        Захватить следующую рассылку.
+        
+        Returns:
+            ID захваченной рассылки или None
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.stale_after)
+        claimable = or_(
+            Broadcast.status == "queued",
+            and_(
+                Broadcast.status == "running",
+                or_(Broadcast.heartbeat_at == None, Broadcast.heartbeat_at < stale_before),
+            ),
+        )
+        
+        async with self._session_maker() as session:
+            # Рассылку, чей прошлый запуск ещё дорабатывает очередь (пауза и
+            # сразу возобновление), берём только после его завершения
+            candidates = select(Broadcast.id).where(claimable)
+            if self._active:
+                candidates = candidates.where(Broadcast.id.notin_(list(self._active)))
+            broadcast_id = await session.scalar(
+                candidates.order_by(Broadcast.id).limit(1)
+            )
+            if broadcast_id is None:
+                return None
+            
+            # Условие повторяется в UPDATE: захватит только один воркер
+            result = await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, claimable)
+                .values(status="running", worker_id=self.worker_id, heartbeat_at=now)
+            )
+            await session.commit()
+            
+            if result.rowcount != 1:
+                return None
+        
+        logger.info(f"Worker {self.worker_id} claimed broadcast #{broadcast_id}")
+        return broadcast_id
+    
+    async def _heartbeat(self, broadcast_id: int) -> None:
+        """Обновлять heartbeat и передавать паузу/отмену из БД в рассылку."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            
+            async with self._session_maker() as session:
+                await session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.worker_id == self.worker_id)
+                    .values(heartbeat_at=datetime.utcnow())
+                )
+                status = await session.scalar(
+                    select(Broadcast.status).where(Broadcast.id == broadcast_id)
+                )
+                await session.commit()
+            
+            if status != "running":
+                signal_broadcast(broadcast_id, status)
+    
+    async def run_broadcast(self, broadcast_id: int) -> None:
+        """Выполнить захваченную рассылку."""
+        heartbeat = asyncio.create_task(self._heartbeat(broadcast_id))
+        try:
+            async with self._session_maker() as session:
+                await start_broadcast(session, self._bot, broadcast_id)
+        except Exception as e:
+            logger.error(f"Broadcast #{broadcast_id} failed: {e}", exc_info=True)
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+    
+    async def run_forever(self) -> None:
+        """
+        Бесконечный цикл: захват и выполнение рассылок.
+        
+        Одновременно выполняется до max_concurrent рассылок. Все они
+        отправляют через общий бакет процесса, поэтому вместе
+        не превышают лимит Bot API, а делят его.
+        """
+        self._running = True
+        scheduler_task = asyncio.create_task(self.scheduler.run_forever())
+        logger.info(f"Broadcast worker {self.worker_id} started")
+        
+        try:
+            while self._running:
+                broadcast_id = None
+                if len(self._active) < self.max_concurrent:
+                    try:
+                        broadcast_id = await self.claim_next()
+                    except Exception as e:
+                        logger.error(f"Error claiming broadcast: {e}", exc_info=True)
+                
+                if broadcast_id is not None:
+                    task = asyncio.create_task(self.run_broadcast(broadcast_id))
+                    self._active[broadcast_id] = task
+                    task.add_done_callback(lambda _, bid=broadcast_id: self._on_done(bid))
+                    continue
+                
+                # Ждём опроса очереди, срабатывания планировщика или освобождения слота
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.scheduler.stop()
+            scheduler_task.cancel()
+            try:
+                await scheduler_task
+            except asyncio.CancelledError:
+                pass
+            if self._active:
+                await asyncio.gather(*self._active.values(), return_exceptions=True)
+    
+    def _on_done(self, broadcast_id: int) -> None:
+        """Рассылка завершилась - освобождаем слот."""
+        self._active.pop(broadcast_id, None)
+        self._wakeup.set()
+    
+    def stop(self) -> None:
+        """Остановить после текущих рассылок."""
+        self._running = False
+        self._wakeup.set()
+
+
+async def main() -> None:
+    """Точка входа процесса воркера."""
+    from bot.config import config
+    from bot.database import async_session_factory, init_db, close_db
+    from bot.services.bot_session import get_bot, close_bot
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    
+    config.ensure_dirs()
+    await init_db()
+    
+    bot = get_bot()
+    worker = BroadcastWorker(
+        async_session_factory,
+        bot,
+        max_concurrent=config.broadcast_max_concurrent,
+    )
+    
+    try:
+        await worker.run_forever()
+    finally:
+        await close_bot()
+        await close_db()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
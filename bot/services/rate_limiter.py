@@ -0,0 +1,189 @@
+"""
+Ограничители частоты запросов к Telegram API.
+
+- TokenBucket: глобальный бюджет запросов в секунду с общей паузой
+- KeyedRateLimiter: минимальный интервал между запросами по ключу (чат, канал)
+- WindowQuota: не больше N событий по ключу за скользящее окно
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket с общей паузой.
+    
+    Все вызывающие делят один бюджет: пока бакет на паузе
+    (например, после RetryAfter/FloodWait), ждут все.
+    """
+    
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        Args:
+            rate: Пополнение, токенов в секунду
+            capacity: Максимальный запас токенов (по умолчанию = rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float) -> None:
+        """Пополнить токены за прошедшее время."""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+    
+    @property
+    def paused_for(self) -> float:
+        """Сколько секунд осталось до конца паузы."""
+        return max(0.0, self._paused_until - time.monotonic())
+    
+    def set_rate(self, rate: float) -> None:
+        """
+        Изменить скорость пополнения.
+        
+        Накопленное до сих пор считается по старой скорости. Ёмкость по
+        умолчанию (= rate) меняется вместе со скоростью.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        
+        self._refill(time.monotonic())
+        if self.capacity == self.rate:
+            self.capacity = rate
+            self._tokens = min(self._tokens, self.capacity)
+        self.rate = rate
+    
+    def pause(self, seconds: float) -> None:
+        """
+        Приостановить выдачу токенов для всех.
+        
+        Повторная пауза продлевает, но не сокращает текущую.
+        """
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        # После паузы стартуем с пустым бакетом, без всплеска
+        self._tokens = 0.0
+        self._updated = self._paused_until
+    
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Дождаться и забрать токены."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class KeyedRateLimiter:
+    """
+    Минимальный интервал между запросами к одному ключу.
+    
+    Используется для лимитов "на чат" / "на канал". Хранит только
+    последние max_keys ключей, чтобы не расти на больших рассылках.
+    """
+    
+    def __init__(self, interval: float, max_keys: int = 10000):
+        """
+        Args:
+            interval: Минимальный интервал между запросами к ключу (сек)
+            max_keys: Сколько ключей помнить
+        """
+        self.interval = interval
+        self.max_keys = max_keys
+        self._next_at: OrderedDict[int, float] = OrderedDict()
+    
+    def delay(self, key: int, seconds: float) -> None:
+        """Отложить следующий запрос к ключу минимум на seconds."""
+        next_at = time.monotonic() + seconds
+        self._next_at[key] = max(self._next_at.get(key, 0.0), next_at)
+        self._next_at.move_to_end(key)
+    
+    async def acquire(self, key: int, interval: Optional[float] = None) -> None:
+        """
+        Дождаться своей очереди для ключа.
+        
+        Args:
+            key: Ключ (чат, канал)
+            interval: Интервал после этого запроса, если у ключа он свой
+        """
+        if interval is None:
+            interval = self.interval
+        if interval <= 0 and key not in self._next_at:
+            return
+        
+        now = time.monotonic()
+        slot = max(now, self._next_at.get(key, 0.0))
+        
+        # Бронируем слот до ожидания, чтобы параллельные вызовы встали в очередь
+        self._next_at[key] = slot + interval
+        self._next_at.move_to_end(key)
+        while len(self._next_at) > self.max_keys:
+            self._next_at.popitem(last=False)
+        
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class WindowQuota:
+    """
+    Квота событий по ключу за скользящее окно.
+    
+    Не ждёт, а только отвечает, осталась ли квота: вызывающий сам
+    решает, отложить ли работу. Хранит только последние max_keys ключей.
+    """
+    
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        """
+        Args:
+            limit: Событий по ключу за окно (0 - без ограничений)
+            window: Длина окна (сек)
+            max_keys: Сколько ключей помнить
+        """
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events: OrderedDict[int, deque[float]] = OrderedDict()
+    
+    def remaining(self, key: int) -> float:
+        """Сколько событий по ключу ещё можно в текущем окне."""
+        if self.limit <= 0:
+            return float('inf')
+        
+        events = self._events.get(key)
+        if not events:
+            return self.limit
+        
+        expired_before = time.monotonic() - self.window
+        while events and events[0] <= expired_before:
+            events.popleft()
+        return max(0, self.limit - len(events))
+    
+    def take(self, key: int) -> None:
+        """Учесть событие по ключу (даже сверх квоты)."""
+        if self.limit <= 0:
+            return
+        
+        self._events.setdefault(key, deque()).append(time.monotonic())
+        self._events.move_to_end(key)
+        while len(self._events) > self.max_keys:
+            self._events.popitem(last=False)
@@ -7,11 +7,14 @@
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from bot.config import config
 from bot.models import User, Tariff, TariffChannel, Channel, Subscription, Payment
+from bot.services.subscription_checker import mark_deadlines_changed, nudge_subscription_checker
+from bot.services.task_queue import TASK_INVITE, enqueue_for_channels
 
 
 async def create_subscription(
@@ -82,11 +85,32 @@ async def create_subscription(
     if payment:
         payment.subscription_id = subscription.id
     
+    # Инвайты в каналы тарифа - через очередь userbot, в той же транзакции
+    if config.userbot_auto_invite:
+        channels = await get_tariff_channels(session, tariff)
+        enqueue_for_channels(
+            session,
+            TASK_INVITE,
+            user.telegram_id,
+            [channel.channel_id for channel in channels],
+            payload={'subscription_id': subscription.id},
+        )
+    
+    # Новый дедлайн - отметка для checker'а в процессе userbot
+    await mark_deadlines_changed(session)
     await session.commit()
     
+    # Checker в этом процессе будим сразу
+    nudge_subscription_checker(expires_at)
+    
     return subscription
 
 
+def _not_expired(now: datetime):
+    """Условие: срок подписки не истёк (бессрочные тоже подходят)."""
+    return or_(Subscription.expires_at == None, Subscription.expires_at > now)
+
+
 async def get_active_subscription(
     session: AsyncSession,
     user_id: int,
@@ -95,6 +119,9 @@ async def get_active_subscription(
     """
     Получить активную подписку пользователя.
     
+    Только чтение: истекшие подписки отсекаются условием, а
+    деактивирует их checker подписок.
+    
     Args:
         session: Сессия БД
         user_id: ID пользователя в БД
@@ -106,28 +133,16 @@ async def get_active_subscription(
     stmt = select(Subscription).where(
         Subscription.user_id == user_id,
         Subscription.is_active == True,
+        _not_expired(datetime.utcnow()),
     ).options(
         selectinload(Subscription.tariff).selectinload(Tariff.tariff_channels).selectinload(TariffChannel.channel)
-    )
+    ).limit(1)
     
     if tariff_id:
         stmt = stmt.where(Subscription.tariff_id == tariff_id)
     
     result = await session.execute(stmt)
-    subscriptions = result.scalars().all()
-    
-    now = datetime.utcnow()
-    
-    for sub in subscriptions:
-        # Проверяем не истекла ли
-        if sub.expires_at is None or sub.expires_at > now:
-            return sub
-        else:
-            # Деактивируем истекшую
-            sub.is_active = False
-    
-    await session.commit()
-    return None
+    return result.scalar_one_or_none()
 
 
 async def get_user_subscriptions(
@@ -141,7 +156,7 @@ async def get_user_subscriptions(
     Args:
         session: Сессия БД
         user_id: ID пользователя в БД
-        active_only: Только активные
+        active_only: Только активные (без истекших, без записи в БД)
         
     Returns:
         Список подписок
@@ -153,26 +168,13 @@ async def get_user_subscriptions(
     ).order_by(Subscription.created_at.desc())
     
     if active_only:
-        stmt = stmt.where(Subscription.is_active == True)
+        stmt = stmt.where(
+            Subscription.is_active == True,
+            _not_expired(datetime.utcnow()),
+        )
     
     result = await session.execute(stmt)
-    subscriptions = result.scalars().all()
-    
-    if active_only:
-        # Фильтруем по дате истечения
-        now = datetime.utcnow()
-        active_subs = []
-        
-        for sub in subscriptions:
-            if sub.expires_at is None or sub.expires_at > now:
-                active_subs.append(sub)
-            else:
-                sub.is_active = False
-        
-        await session.commit()
-        return active_subs
-    
-    return list(subscriptions)
+    return list(result.scalars().all())
 
 
 async def deactivate_subscription(
@@ -274,6 +276,14 @@ async def extend_subscription(
     subscription.is_active = True
     subscription.notified_3days = False
     subscription.notified_1day = False
+    subscription.notice_horizon = None
+    # Срок сдвинулся вперёд - маркеры обработки прошлого истечения больше не
+    # действуют, иначе checker пропустит следующее уведомление и кик
+    subscription.auto_kicked = False
+    subscription.kicked_at = None
+    subscription.expired_notified_at = None
     
+    await mark_deadlines_changed(session)
     await session.commit()
+    nudge_subscription_checker(subscription.expires_at)
     return subscription
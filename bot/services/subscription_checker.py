@@ -1,66 +1,318 @@
 """
 Сервис проверки подписок.
 
-Периодически проверяет истекающие и истекшие подписки:
-- Уведомляет за 3 дня до окончания
-- Уведомляет за 1 день до окончания  
-- Автоматически кикает при истечении
+Проверяет истекающие и истекшие подписки:
+- Напоминает об окончании (по умолчанию за 3 дня и за 1 день,
+  горизонты задаются SUBSCRIPTION_NOTICE_HOURS)
+- Ставит кики истекших в очередь задач userbot (после отсрочки,
+  растягивая пики истечений квотой киков на канал)
+
+Вместо опроса по таймеру держит в памяти кучу ближайших дедлайнов
+(истечение, уведомления) и спит ровно до следующего. Создание и
+продление подписки отмечают изменение в settings
+(mark_deadlines_changed): отдельная задача checker'а в процессе userbot
+читает эту строку и при новой отметке будит цикл, чтобы тот перечитал
+дедлайны; в своём процессе его сразу будит nudge_subscription_checker().
 """
 
 import asyncio
+import heapq
 import logging
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
 
-from sqlalchemy import select, and_
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from aiogram.enums import ParseMode
+from sqlalchemy import select, and_, or_, bindparam, case, func
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import selectinload
 
-from bot.models import Subscription, User, Tariff, TariffChannel, Channel
+from bot.models import Subscription, Package, PackageChannel, Channel, Settings
+from bot.services.rate_limiter import WindowQuota
+from bot.services.task_queue import TASK_KICK, enqueue_for_channels
 
 logger = logging.getLogger(__name__)
 
+# Горизонты напоминаний (часы), для которых есть отдельный текст
+NOTICE_TEXT_KEYS = {
+    72: 'subscription_expires_3days',
+    24: 'subscription_expires_1day',
+}
+
+# Статусы подписок, дающих доступ к каналам
+ACTIVE_STATUSES = ('active', 'trial')
+
+# Ключ settings: отметка последнего изменения сроков подписок
+DEADLINES_CHANGED_KEY = 'subscription_deadlines_changed_at'
+
+# Checker, запущенный в этом процессе (для nudge)
+_active_checker: Optional['SubscriptionChecker'] = None
+
+
+async def mark_deadlines_changed(session: AsyncSession) -> None:
+    """
+    Отметить, что сроки подписок изменились.
+    
+    Вызывается до коммита изменения, в той же транзакции. Checker
+    читает строку раз в change_poll_interval и при новой отметке
+    перечитывает дедлайны - так изменения из бота и админки доходят до
+    процесса userbot.
+    """
+    await session.merge(Settings(key=DEADLINES_CHANGED_KEY, value=datetime.utcnow().isoformat()))
+
+
+def nudge_subscription_checker(expires_at: Optional[datetime]) -> None:
+    """
+    Разбудить checker, запущенный в этом же процессе.
+    
+    Другие процессы узнают об изменении по mark_deadlines_changed().
+    """
+    if _active_checker is not None and expires_at is not None:
+        _active_checker.add_deadline(expires_at)
+
+
+def _unprocessed():
+    """
+    SQL-условие: подписка даёт доступ, и её истечение ещё не обработано.
+    
+    Совпадает с условием частичного индекса ix_subscriptions_pending_expires_at.
+    Статусы подставляются в SQL литералами: с параметрами SQLite не
+    может доказать условие индекса и не использует его.
+    """
+    return and_(
+        Subscription.status.in_(
+            bindparam('active_statuses', ACTIVE_STATUSES, expanding=True, literal_execute=True)
+        ),
+        Subscription.auto_kicked == False,
+    )
+
+
+def _kick_channels(sub: Subscription) -> list[Channel]:
+    """Каналы пакета подписки, из которых удаляем при истечении."""
+    if sub.package is None:
+        return []
+    return [
+        pc.channel
+        for pc in sub.package.package_channels
+        if pc.channel.is_active and not pc.channel.is_deleted
+    ]
+
+
+class CheckPlan:
+    """План проверки подписок (dry-run) с разбивкой по времени."""
+    
+    def __init__(self, now: datetime):
+        from userbot.config import userbot_config
+        
+        self.now = now
+        # MTProto-запросов на одно удаление из канала: один ban_chat_member,
+        # в режиме unban ещё и unban_chat_member (разбан сверки в план не входит)
+        self.kick_api_calls = 2 if userbot_config.KICK_MODE == 'unban' else 1
+        self.chunks = 0
+        self.reminders: list[tuple[int, int, int]] = []  # (подписка, telegram_id, горизонт)
+        self.expired: list[tuple[int, int, list[int]]] = []  # (подписка, telegram_id, каналы)
+        self.deferred = 0
+        self.messages = 0
+        self.channel_kicks: Counter[int] = Counter()
+        self.query_time = 0.0
+        self.relations_time = 0.0
+        self.total_time = 0.0
+        self.message_drain = 0.0
+        self.kick_drain = 0.0
+    
+    def add_chunk(
+        self,
+        expired: list[Subscription],
+        reminders: list[tuple[Subscription, int]],
+        deferred: int = 0,
+    ) -> None:
+        """Учесть порцию так же, как её обработала бы проверка."""
+        self.chunks += 1
+        self.deferred += deferred
+        users: set[int] = set()
+        
+        for sub, hours in reminders:
+            self.reminders.append((sub.id, sub.user.telegram_id, hours))
+            users.add(sub.user_id)
+        
+        for sub in expired:
+            channels = []
+            if sub.kicked_at is None:
+                channels = [channel.channel_id for channel in _kick_channels(sub)]
+                self.channel_kicks.update(channels)
+            self.expired.append((sub.id, sub.user.telegram_id, channels))
+            if sub.expired_notified_at is None:
+                users.add(sub.user_id)
+        
+        # Одно сообщение на пользователя в порции
+        self.messages += len(users)
+    
+    @property
+    def kicks(self) -> int:
+        """Удалений из каналов."""
+        return sum(self.channel_kicks.values())
+    
+    @property
+    def api_calls(self) -> dict[str, int]:
+        """Запланированные запросы к Telegram."""
+        return {
+            'bot_messages': self.messages,
+            'userbot_calls': self.kicks * self.kick_api_calls,
+        }
+    
+    def project_drain(self, message_rate: float, kick_rate: float, channel_interval: float) -> None:
+        """
+        Оценить время выполнения плана при заданных лимитах.
+        
+        Киков не быстрее общего лимита аккаунта и не чаще channel_interval
+        в одном канале; сообщения - по общему лимиту Bot API. Кики порции
+        идут до её уведомлений, поэтому времена складываются.
+        """
+        self.message_drain = self.messages / message_rate if message_rate > 0 else 0.0
+        busiest = max(self.channel_kicks.values(), default=0)
+        self.kick_drain = max(
+            self.kicks / kick_rate if kick_rate > 0 else 0.0,
+            busiest * channel_interval,
+        )
+    
+    @property
+    def drain_time(self) -> float:
+        """Прогноз времени выполнения плана, сек."""
+        return self.kick_drain + self.message_drain
+    
+    def report(self) -> dict:
+        """Сводка плана для вывода."""
+        return {
+            'now': self.now.isoformat(),
+            'chunks': self.chunks,
+            'reminders': len(self.reminders),
+            'expired': len(self.expired),
+            'deferred': self.deferred,
+            'api_calls': self.api_calls,
+            'timing': {
+                'query_ms': round(self.query_time * 1000, 2),
+                'relations_ms': round(self.relations_time * 1000, 2),
+                'total_ms': round(self.total_time * 1000, 2),
+                'kick_drain_s': round(self.kick_drain, 2),
+                'message_drain_s': round(self.message_drain, 2),
+                'drain_s': round(self.drain_time, 2),
+            },
+        }
+
 
 class SubscriptionChecker:
-    """Периодическая проверка подписок."""
+    """Проверка подписок по ближайшим дедлайнам."""
     
     def __init__(
         self,
         check_interval: int = 300,  # 5 минут
+        change_poll_interval: int = 10,
         database_url: Optional[str] = None,
+        deadlines_limit: int = 100,
+        chunk_size: int = 100,
+        retry_interval: int = 60,
+        notice_hours: Optional[list[int]] = None,
+        kick_grace_minutes: Optional[int] = None,
+        kick_sla_minutes: Optional[int] = None,
+        kick_channel_quota: Optional[int] = None,
+        engine: Optional[AsyncEngine] = None,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        bot=None,
+        on_tasks: Optional[Callable[[], None]] = None,
     ):
         """
         Инициализация checker'а.
         
         Args:
-            check_interval: Интервал проверки в секундах
+            check_interval: Максимальный сон между перечитываниями дедлайнов (сек)
+            change_poll_interval: Как часто читать отметку изменения сроков (сек) -
+                только подсказка разбудить цикл, сон цикла от неё не зависит
             database_url: URL базы данных (если не указан, берётся из конфига)
+            deadlines_limit: Сколько ближайших дедлайнов каждого вида держать в памяти
+            chunk_size: Сколько подписок обрабатывать и коммитить за раз
+            retry_interval: Через сколько секунд повторять необработанные подписки
+            notice_hours: За сколько часов до окончания напоминать
+                (по умолчанию SUBSCRIPTION_NOTICE_HOURS из конфига)
+            kick_grace_minutes: Отсрочка кика после истечения (мин)
+            kick_sla_minutes: За сколько минут после отсрочки кик гарантирован
+            kick_channel_quota: Киков в минуту на канал, сверх - откладываются
+            engine: Engine процесса (сессии создаются по нему)
+            session_factory: Фабрика сессий процесса
+            bot: Bot процесса для уведомлений
+            on_tasks: Вызывается после коммита новых задач кика
+                (например, TaskWorker.nudge воркера этого процесса)
+        
+        Без engine/session_factory/database_url используется общий пул
+        процесса из bot.database, без bot - общий Bot из bot_session.
+        Переданные извне engine и bot checker не закрывает.
         """
+        from bot.config import config
+        from userbot.config import userbot_config
+        
         self.check_interval = check_interval
+        self.change_poll_interval = change_poll_interval
+        self.deadlines_limit = deadlines_limit
+        self.chunk_size = chunk_size
+        self.retry_interval = retry_interval
+        self.notice_hours = sorted(
+            set(notice_hours if notice_hours is not None else config.subscription_notice_hours_list),
+            reverse=True,
+        )
         self._running = False
         self._task: Optional[asyncio.Task] = None
         
-        # Настраиваем подключение к БД
-        if database_url is None:
-            from bot.config import config
-            database_url = f"sqlite+aiosqlite:///{config.DATABASE_PATH}"
-        
-        self._engine = create_async_engine(database_url, echo=False)
-        self._session_maker = async_sessionmaker(
-            self._engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
+        # Куча ближайших дедлайнов: (момент, id подписки)
+        self._deadlines: list[tuple[datetime, int]] = []
+        # Дальше этого момента дедлайны не загружены (None - загружены все)
+        self._horizon: Optional[datetime] = None
+        # Начало последней проверки: более ранние дедлайны она уже пыталась обработать
+        self._last_check: Optional[datetime] = None
+        # Когда дедлайны последний раз перечитывались из БД (monotonic)
+        self._refilled_at = 0.0
+        # Отметка mark_deadlines_changed на момент перечитывания
+        self._changes_mark: Optional[str] = None
+        # Наблюдатель за отметкой увидел новую - пора перечитать
+        self._changes_pending = False
+        self._watcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        
+        # Растягивание киков: отсрочка, окно гарантии и квота на канал
+        self.kick_grace = timedelta(minutes=(
+            userbot_config.KICK_GRACE_MINUTES if kick_grace_minutes is None else kick_grace_minutes
+        ))
+        self.kick_sla = timedelta(minutes=(
+            userbot_config.KICK_SLA_MINUTES if kick_sla_minutes is None else kick_sla_minutes
+        ))
+        self.kick_channel_quota = (
+            userbot_config.KICK_CHANNEL_QUOTA if kick_channel_quota is None else kick_channel_quota
         )
-        
-        # Bot для отправки уведомлений
-        self._bot = None
+        self._channel_quota = self._new_channel_quota()
+        
+        # Подключение к БД: по умолчанию общий пул процесса
+        from bot.database import make_engine, make_session_factory
+        
+        # Собственный engine (только для отдельного database_url) закрываем в stop()
+        self._own_engine: Optional[AsyncEngine] = None
+        if session_factory is None:
+            if engine is None and database_url is not None:
+                engine = self._own_engine = make_engine(database_url)
+            if engine is None:
+                from bot.database import async_session_factory
+                session_factory = async_session_factory
+            else:
+                session_factory = make_session_factory(engine)
+        self._session_maker = session_factory
+        
+        # Bot для отправки уведомлений (None - общий Bot процесса)
+        self._bot = bot
+        self._on_tasks = on_tasks
     
     async def _get_bot(self):
         """Получить экземпляр бота для отправки сообщений."""
         if self._bot is None:
-            from aiogram import Bot
-            from bot.config import config
-            self._bot = Bot(token=config.BOT_TOKEN)
+            from bot.services.bot_session import get_bot
+            self._bot = get_bot()
         return self._bot
     
     async def start(self) -> None:
@@ -69,12 +321,19 @@ class SubscriptionChecker:
             logger.warning("Checker is already running")
             return
         
+        global _active_checker
         self._running = True
+        _active_checker = self
         logger.info("Subscription checker started")
     
     async def stop(self) -> None:
         """Остановить checker."""
+        global _active_checker
         self._running = False
+        self._wakeup.set()
+        if _active_checker is self:
+            _active_checker = None
+        await self._stop_watcher()
         if self._task:
             self._task.cancel()
             try:
@@ -82,252 +341,677 @@ class SubscriptionChecker:
             except asyncio.CancelledError:
                 pass
         
-        # Закрываем сессию бота
-        if self._bot:
-            await self._bot.session.close()
-            self._bot = None
+        # Общий Bot и пул процесса закрывает их владелец
+        if self._own_engine is not None:
+            await self._own_engine.dispose()
+            self._own_engine = None
         
         logger.info("Subscription checker stopped")
     
+    def add_deadline(self, expires_at: datetime) -> None:
+        """Добавить дедлайны подписки (уведомления и истечение) и разбудить checker."""
+        for moment in self._deadlines_for(expires_at):
+            heapq.heappush(self._deadlines, (moment, 0))
+        self._wakeup.set()
+    
+    def _deadlines_for(self, expires_at: datetime) -> list[datetime]:
+        """Моменты, когда подписке потребуется обработка."""
+        return (
+            [expires_at - timedelta(hours=hours) for hours in self.notice_hours]
+            + [expires_at + self.kick_grace]
+        )
+    
+    @staticmethod
+    def _notified_hours():
+        """
+        SQL-выражение: наименьший горизонт, о котором уже напомнили.
+        
+        Для строк, отмеченных до появления notice_horizon, берётся
+        значение из notified_1day / notified_3days.
+        """
+        return func.coalesce(
+            Subscription.notice_horizon,
+            case(
+                (Subscription.notified_1day == True, 24),
+                (Subscription.notified_3days == True, 72),
+            ),
+        )
+    
+    @staticmethod
+    def _sent_horizon(sub: Subscription) -> Optional[int]:
+        """То же, что _notified_hours(), для загруженной подписки."""
+        if sub.notice_horizon is not None:
+            return sub.notice_horizon
+        if sub.notified_1day:
+            return 24
+        if sub.notified_3days:
+            return 72
+        return None
+    
+    def _notice_pending(self, now: datetime):
+        """SQL-условие: подписке пора отправить очередное напоминание."""
+        notified = self._notified_hours()
+        return or_(*(
+            and_(
+                Subscription.expires_at <= now + timedelta(hours=hours),
+                or_(notified == None, notified > hours),
+            )
+            for hours in self.notice_hours
+        ))
+    
+    def _due_notice(self, sub: Subscription, now: datetime) -> Optional[int]:
+        """
+        Горизонт напоминания, которое нужно отправить подписке.
+        
+        Берётся ближайший к окончанию наступивший горизонт: пропущенные
+        более ранние напоминания (например, подписка куплена за день до
+        конца) не отправляются.
+        """
+        left = sub.expires_at - now
+        reached = [hours for hours in self.notice_hours if left <= timedelta(hours=hours)]
+        if not reached:
+            return None
+        
+        hours = min(reached)
+        sent = self._sent_horizon(sub)
+        if sent is not None and sent <= hours:
+            return None
+        return hours
+    
+    async def _refill_deadlines(self) -> None:
+        """
+        Загрузить ближайшие дедлайны из БД.
+        
+        По каждому виду (истечение, уведомления) берётся не больше
+        deadlines_limit строк по частичному индексу необработанных подписок.
+        """
+        now = datetime.utcnow()
+        limit = self.deadlines_limit
+        # Сбрасываем до чтения отметки: более новую наблюдатель увидит снова
+        self._changes_pending = False
+        
+        queries = [
+            # Истечение (кик - после отсрочки)
+            (-self.kick_grace, and_(
+                _unprocessed(),
+                Subscription.expires_at != None,
+            )),
+        ]
+        notified = self._notified_hours()
+        for hours in self.notice_hours:
+            queries.append((timedelta(hours=hours), and_(
+                _unprocessed(),
+                Subscription.expires_at > now,
+                or_(notified == None, notified > hours),
+            )))
+        
+        deadlines: list[tuple[datetime, int]] = []
+        horizon: Optional[datetime] = None
+        
+        async with self._session_maker() as session:
+            # Отметку читаем до выборки, чтобы не пропустить изменение во время неё
+            self._changes_mark = await self._read_changes_mark(session)
+            for offset, condition in queries:
+                result = await session.execute(
+                    select(Subscription.expires_at, Subscription.id)
+                    .where(condition)
+                    .order_by(Subscription.expires_at)
+                    .limit(limit)
+                )
+                rows = result.all()
+                deadlines.extend((expires_at - offset, sub_id) for expires_at, sub_id in rows)
+                
+                # Выборка обрезана - дальше последнего дедлайна ничего не знаем
+                if len(rows) == limit:
+                    last = rows[-1][0] - offset
+                    horizon = last if horizon is None else min(horizon, last)
+        
+        # Подписки, которые последняя проверка не смогла обработать,
+        # повторяем через retry_interval, а не в цикле без пауз
+        floor = now
+        if self._last_check is not None:
+            retry_at = self._last_check + timedelta(seconds=self.retry_interval)
+            deadlines = [
+                (retry_at if moment <= self._last_check else moment, sub_id)
+                for moment, sub_id in deadlines
+            ]
+            floor = max(now, retry_at)
+        
+        # Если вся выборка - необработанные подписки, горизонт оказался бы
+        # в прошлом и перечитывание шло бы без пауз. Всё, что уже наступило,
+        # обработает проверка в retry_at, поэтому раньше горизонт не нужен
+        if horizon is not None:
+            horizon = max(horizon, floor)
+        
+        heapq.heapify(deadlines)
+        self._deadlines = deadlines
+        self._horizon = horizon
+        self._refilled_at = time.monotonic()
+    
+    def _seconds_until_next(self) -> float:
+        """Сколько спать: до ближайшего дедлайна, горизонта или планового перечитывания."""
+        now = datetime.utcnow()
+        candidates = [self.check_interval - (time.monotonic() - self._refilled_at)]
+        if self._deadlines:
+            candidates.append((self._deadlines[0][0] - now).total_seconds())
+        if self._horizon is not None:
+            candidates.append((self._horizon - now).total_seconds())
+        return max(0.0, min(candidates))
+    
+    @staticmethod
+    async def _read_changes_mark(session: AsyncSession) -> Optional[str]:
+        """Текущая отметка mark_deadlines_changed."""
+        return await session.scalar(
+            select(Settings.value).where(Settings.key == DEADLINES_CHANGED_KEY)
+        )
+    
+    def _refill_needed(self) -> bool:
+        """
+        Нужно ли перечитать дедлайны из БД.
+        
+        Раньше головы кучи новый дедлайн может оказаться, только если
+        сроки подписок менялись (наблюдатель увидел новую отметку в
+        settings), дошли до горизонта загруженных или пора плановое
+        перечитывание (check_interval) - иначе куча уже знает ближайшее
+        событие.
+        """
+        if self._changes_pending:
+            return True
+        if self._horizon is not None and self._horizon <= datetime.utcnow():
+            return True
+        return time.monotonic() - self._refilled_at >= self.check_interval
+    
+    async def _watch_changes(self) -> None:
+        """
+        Следить за отметкой mark_deadlines_changed из других процессов.
+        
+        Одно чтение строки settings по ключу раз в change_poll_interval.
+        Новая отметка только будит цикл: сон цикла задаёт голова кучи,
+        а не этот опрос.
+        """
+        while self._running:
+            await asyncio.sleep(self.change_poll_interval)
+            try:
+                async with self._session_maker() as session:
+                    mark = await self._read_changes_mark(session)
+            except Exception as e:
+                logger.warning(f"Failed to read subscription changes mark: {e}")
+                continue
+            if mark != self._changes_mark and not self._changes_pending:
+                self._changes_pending = True
+                self._wakeup.set()
+    
+    async def _stop_watcher(self) -> None:
+        """Остановить наблюдатель за отметкой изменений."""
+        if self._watcher is None:
+            return
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except asyncio.CancelledError:
+            pass
+        self._watcher = None
+    
+    def _pop_due(self) -> bool:
+        """Снять с кучи наступившие дедлайны."""
+        now = datetime.utcnow()
+        due = False
+        while self._deadlines and self._deadlines[0][0] <= now:
+            heapq.heappop(self._deadlines)
+            due = True
+        return due
+    
     async def run_forever(self) -> None:
-        """Запустить бесконечный цикл проверки."""
+        """Бесконечный цикл: спим до ближайшего дедлайна и обрабатываем."""
         await self.start()
+        self._watcher = asyncio.create_task(self._watch_changes())
         
+        try:
+            await self._run_loop()
+        finally:
+            await self._stop_watcher()
+    
+    async def _run_loop(self) -> None:
+        """Цикл checker'а: перечитать при необходимости, обработать наступившее, спать до головы кучи."""
+        refill = True
         while self._running:
             try:
-                await self.check_subscriptions()
+                if refill or self._refill_needed():
+                    await self._refill_deadlines()
+                    refill = False
+                
+                if self._pop_due():
+                    self._last_check = datetime.utcnow()
+                    await self.check_subscriptions()
+                    # Состояние подписок изменилось - перечитаем дедлайны
+                    refill = True
+                    continue
             except Exception as e:
                 logger.error(f"Error in subscription check: {e}", exc_info=True)
+                # Перечитаем дедлайны не позже чем через retry_interval
+                refill = True
             
-            # Ждём до следующей проверки
-            await asyncio.sleep(self.check_interval)
+            # Спим до головы кучи (или горизонта / планового перечитывания);
+            # раньше будят только nudge и наблюдатель за отметкой изменений
+            self._wakeup.clear()
+            if not self._running:
+                # stop() во время обработки: его сигнал стёрт clear()
+                break
+            if self._changes_pending:
+                # Наблюдатель сработал во время обработки
+                continue
+            timeout = self._seconds_until_next()
+            if refill:
+                timeout = min(timeout, self.retry_interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
     
     async def check_subscriptions(self) -> None:
         """Выполнить проверку всех подписок."""
         logger.info("Running subscription check...")
         
         async with self._session_maker() as session:
-            # 1. Уведомления за 3 дня
-            await self._notify_expiring_soon(session, days=3)
-            
-            # 2. Уведомления за 1 день
-            await self._notify_expiring_soon(session, days=1)
-            
-            # 3. Обработка истекших подписок
-            await self._handle_expired_subscriptions(session)
+            await self._process_due_subscriptions(session)
         
         logger.info("Subscription check completed")
     
-    async def _notify_expiring_soon(
+    async def _process_due_subscriptions(
         self,
         session: AsyncSession,
-        days: int,
     ) -> None:
         """
-        Отправить уведомления об истекающих подписках.
+        Отправить напоминания и обработать истекшие подписки.
         
         Args:
             session: Сессия БД
-            days: За сколько дней до истечения уведомлять
         """
         now = datetime.utcnow()
-        target_date = now + timedelta(days=days)
+        bot = await self._get_bot()
+        noticed = 0
+        expired_total = 0
+        
+        # Порциями по chunk_size с коммитом после каждой: короткие транзакции
+        # и чекпоинт, после которого обработанные подписки не повторяются.
+        deferred_total = 0
+        async for expired, reminders in self._iter_due_chunks(session, now):
+            expired, deferred = self._schedule_kicks(expired, now, self._channel_quota)
+            deferred_total += deferred
+            
+            # Кики - задачи в очереди userbot, в одной транзакции с отметкой
+            kicks = self._enqueue_kicks(session, expired, now)
+            expired_total += len(expired)
+            
+            # Уведомления порции: одно сообщение на пользователя
+            noticed += await self._send_chunk_notices(bot, reminders, expired)
+            
+            await session.commit()
+            if kicks and self._on_tasks is not None:
+                self._on_tasks()
+        
+        if noticed or expired_total:
+            logger.info(f"Sent {noticed} reminders, processed {expired_total} expired subscriptions")
+        if deferred_total:
+            logger.info(f"Deferred {deferred_total} expired subscriptions over channel kick quotas")
+    
+    @staticmethod
+    def _enqueue_kicks(
+        session: AsyncSession,
+        expired: list[Subscription],
+        now: datetime,
+    ) -> int:
+        """
+        Поставить в очередь кики истекших подписок из их каналов.
         
-        # Поле для проверки "уже уведомлён"
-        notified_field = 'notified_3days' if days == 3 else 'notified_1day'
+        kicked_at отмечает, что задачи созданы: он коммитится вместе с
+        ними, поэтому после сбоя кики не ставятся повторно. Выполняет
+        их TaskWorker с общими темпом и повторами очереди.
         
-        # Находим подписки, истекающие в указанный период
-        stmt = select(Subscription).where(
-            and_(
-                Subscription.is_active == True,
-                Subscription.expires_at != None,
-                Subscription.expires_at <= target_date,
-                Subscription.expires_at > now,
-                getattr(Subscription, notified_field) == False,
+        Returns:
+            Сколько задач добавлено
+        """
+        added = 0
+        for sub in expired:
+            if sub.kicked_at is not None:
+                continue
+            channels = [channel.channel_id for channel in _kick_channels(sub)]
+            enqueue_for_channels(
+                session,
+                TASK_KICK,
+                sub.user.telegram_id,
+                channels,
+                payload={'subscription_id': sub.id},
             )
-        ).options(
-            selectinload(Subscription.user),
-            selectinload(Subscription.tariff),
-        )
+            sub.kicked_at = now
+            added += len(channels)
+        return added
+    
+    def _new_channel_quota(self) -> WindowQuota:
+        """Квота киков на канал за минуту."""
+        return WindowQuota(limit=self.kick_channel_quota, window=60)
+    
+    def _schedule_kicks(
+        self,
+        expired: list[Subscription],
+        now: datetime,
+        quota: WindowQuota,
+    ) -> tuple[list[Subscription], int]:
+        """
+        Выбрать истекшие подписки, которые кикаем в этой проверке.
         
-        result = await session.execute(stmt)
-        subscriptions = result.scalars().all()
+        Сначала дольше всех истекшие. Подписка откладывается, если в
+        одном из её каналов исчерпана квота киков за минуту, и берётся
+        сверх квоты, если следующая попытка (через retry_interval)
+        вышла бы за окно гарантии. Так пик истечений растягивается на
+        окно kick_sla, но каждый пользователь удаляется в его пределах.
         
-        if not subscriptions:
-            return
+        Returns:
+            (подписки для обработки, сколько отложено)
+        """
+        scheduled: list[Subscription] = []
+        deferred = 0
+        retry_at = now + timedelta(seconds=self.retry_interval)
+        
+        for sub in sorted(expired, key=lambda sub: (sub.expires_at, sub.id)):
+            # Кик уже выполнен - осталось уведомить и деактивировать
+            if sub.kicked_at is not None:
+                scheduled.append(sub)
+                continue
+            
+            channels = [channel.channel_id for channel in _kick_channels(sub)]
+            overdue = retry_at >= sub.expires_at + self.kick_grace + self.kick_sla
+            
+            if not overdue and any(quota.remaining(channel) < 1 for channel in channels):
+                deferred += 1
+                continue
+            
+            for channel in channels:
+                quota.take(channel)
+            scheduled.append(sub)
         
-        logger.info(f"Found {len(subscriptions)} subscriptions expiring in {days} days")
+        return scheduled, deferred
+    
+    async def _iter_due_chunks(
+        self,
+        session: AsyncSession,
+        now: datetime,
+    ) -> AsyncIterator[tuple[list[Subscription], list[tuple[Subscription, int]]]]:
+        """
+        Порции подписок, которым что-то нужно на момент now.
         
-        bot = await self._get_bot()
+        Один проход по подпискам: истекшие и те, у которых наступил
+        неотправленный горизонт напоминания. Каждая порция загружается
+        одним запросом со связями и раскладывается по видам в памяти,
+        поэтому число горизонтов не влияет на количество запросов.
+        Курсор (expires_at, id) идёт по частичному индексу необработанных
+        и не зависит от того, закоммичены ли изменения порции.
         
-        for sub in subscriptions:
-            try:
-                await self._send_expiration_notice(
-                    bot=bot,
-                    subscription=sub,
-                    days_left=days,
-                )
-                
-                # Отмечаем как уведомлённого
-                setattr(sub, notified_field, True)
+        Yields:
+            (истекшие подписки, [(подписка, горизонт напоминания)])
+        """
+        after: Optional[tuple[datetime, int]] = None
+        
+        # Верхняя граница по expires_at держит выборку в диапазоне индекса
+        upper = now + timedelta(hours=max(self.notice_hours, default=0))
+        due = Subscription.expires_at <= now - self.kick_grace
+        if self.notice_hours:
+            due = or_(due, self._notice_pending(now))
+        
+        while True:
+            conditions = [
+                _unprocessed(),
+                Subscription.expires_at <= upper,
+                due,
+            ]
+            if after is not None:
+                last_expires_at, last_id = after
+                conditions.append(or_(
+                    Subscription.expires_at > last_expires_at,
+                    and_(Subscription.expires_at == last_expires_at, Subscription.id > last_id),
+                ))
+            
+            stmt = select(Subscription).where(and_(*conditions)).options(
+                selectinload(Subscription.user),
+                selectinload(Subscription.package).selectinload(
+                    Package.package_channels
+                ).selectinload(PackageChannel.channel),
+            ).order_by(Subscription.expires_at, Subscription.id).limit(self.chunk_size)
+            
+            result = await session.execute(stmt)
+            subscriptions = result.scalars().all()
+            
+            if not subscriptions:
+                return
+            after = (subscriptions[-1].expires_at, subscriptions[-1].id)
+            
+            expired: list[Subscription] = []
+            reminders: list[tuple[Subscription, int]] = []
+            for sub in subscriptions:
+                if sub.expires_at <= now:
+                    # В отсрочке подписку не трогаем: ни напоминаний, ни кика
+                    if sub.expires_at + self.kick_grace <= now:
+                        expired.append(sub)
+                    continue
                 
-            except Exception as e:
-                logger.error(f"Error notifying user {sub.user.telegram_id}: {e}")
-        
-        await session.commit()
+                hours = self._due_notice(sub, now)
+                if hours is not None:
+                    reminders.append((sub, hours))
+            
+            yield expired, reminders
     
-    async def _send_expiration_notice(
-        self,
-        bot,
-        subscription: Subscription,
-        days_left: int,
-    ) -> None:
+    async def plan_check(self, now: Optional[datetime] = None) -> 'CheckPlan':
         """
-        Отправить уведомление о скором истечении подписки.
+        Dry-run: спланировать проверку без Telegram и без записи в БД.
+        
+        Выборка и раскладка идут тем же кодом, что и в настоящей
+        проверке. Время SQL делится на основной запрос порций и
+        загрузку связей (selectinload) по таблице запроса.
         
         Args:
-            bot: Экземпляр бота
-            subscription: Подписка
-            days_left: Дней до истечения
+            now: Момент, на который планировать (по умолчанию сейчас) -
+                для повтора проверки на копии БД в прошлом или будущем
+        
+        Returns:
+            План с действиями и разбивкой по времени
         """
-        from bot.locales import get_text
-        from bot.keyboards.inline import renew_subscription_keyboard
+        from sqlalchemy import event
+        from bot.config import config
+        from userbot.config import userbot_config
         
-        user = subscription.user
-        tariff = subscription.tariff
-        lang = user.language or 'ru'
+        plan = CheckPlan(now or datetime.utcnow())
+        started_at: dict[int, float] = {}
         
-        # Формируем сообщение
-        if days_left == 3:
-            text = get_text('subscription_expires_3days', lang).format(
-                tariff_name=tariff.name_ru if lang == 'ru' else tariff.name_en,
-                expires_at=subscription.expires_at.strftime('%d.%m.%Y %H:%M'),
-            )
-        else:
-            text = get_text('subscription_expires_1day', lang).format(
-                tariff_name=tariff.name_ru if lang == 'ru' else tariff.name_en,
-                expires_at=subscription.expires_at.strftime('%d.%m.%Y %H:%M'),
-            )
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            started_at[id(cursor)] = time.perf_counter()
         
-        try:
-            await bot.send_message(
-                chat_id=user.telegram_id,
-                text=text,
-                reply_markup=renew_subscription_keyboard(tariff.id, lang),
-            )
-            logger.info(f"Sent {days_left}-day notice to user {user.telegram_id}")
-        except Exception as e:
-            logger.error(f"Failed to send notice to {user.telegram_id}: {e}")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - started_at.pop(id(cursor), time.perf_counter())
+            if 'FROM subscriptions' in statement:
+                plan.query_time += elapsed
+            else:
+                plan.relations_time += elapsed
+        
+        started = time.perf_counter()
+        async with self._session_maker() as session:
+            sync_engine = session.bind.sync_engine
+            event.listen(sync_engine, 'before_cursor_execute', before_execute)
+            event.listen(sync_engine, 'after_cursor_execute', after_execute)
+            try:
+                # Квота плана своя: dry-run не расходует квоту checker'а
+                quota = self._new_channel_quota()
+                async for expired, reminders in self._iter_due_chunks(session, plan.now):
+                    expired, deferred = self._schedule_kicks(expired, plan.now, quota)
+                    plan.add_chunk(expired, reminders, deferred)
+            finally:
+                event.remove(sync_engine, 'before_cursor_execute', before_execute)
+                event.remove(sync_engine, 'after_cursor_execute', after_execute)
+                # Ничего не пишем: dry-run
+                await session.rollback()
+        plan.total_time = time.perf_counter() - started
+        
+        plan.project_drain(
+            message_rate=config.broadcast_rate_limit,
+            kick_rate=userbot_config.MTPROTO_RATE_LIMIT * len(userbot_config.accounts()),
+            channel_interval=userbot_config.KICK_DELAY,
+        )
+        return plan
     
-    async def _handle_expired_subscriptions(
+    async def _send_chunk_notices(
         self,
-        session: AsyncSession,
-    ) -> None:
+        bot,
+        reminders: list[tuple[Subscription, int]],
+        expired: list[Subscription],
+    ) -> int:
         """
-        Обработать истекшие подписки.
+        Отправить уведомления порции, сгруппировав их по пользователям.
         
-        - Деактивировать подписку
-        - Кикнуть из каналов
-        - Уведомить пользователя
-        """
-        now = datetime.utcnow()
+        Все напоминания и сообщения об истечении одного пользователя
+        уходят одним сообщением с общей клавиатурой продления (кики к
+        этому моменту уже в очереди). Затем
+        подписки отмечаются как уведомлённые (даже если отправка не
+        удалась), истекшие - деактивируются.
         
-        # Находим истекшие активные подписки
-        stmt = select(Subscription).where(
-            and_(
-                Subscription.is_active == True,
-                Subscription.expires_at != None,
-                Subscription.expires_at <= now,
-                Subscription.auto_kicked == False,
-            )
-        ).options(
-            selectinload(Subscription.user),
-            selectinload(Subscription.tariff).selectinload(
-                Tariff.tariff_channels
-            ).selectinload(TariffChannel.channel),
-        )
-        
-        result = await session.execute(stmt)
-        subscriptions = result.scalars().all()
-        
-        if not subscriptions:
-            return
-        
-        logger.info(f"Found {len(subscriptions)} expired subscriptions to process")
-        
-        from userbot.actions.kick import kick_from_channels
-        
-        bot = await self._get_bot()
+        Args:
+            bot: Экземпляр бота
+            reminders: Подписки с горизонтом напоминания
+            expired: Истекшие подписки порции
         
-        for sub in subscriptions:
+        Returns:
+            Количество отправленных напоминаний
+        """
+        notices: dict[int, list[tuple[Subscription, Optional[int]]]] = {}
+        for sub, hours in reminders:
+            notices.setdefault(sub.user_id, []).append((sub, hours))
+        
+        for sub in expired:
+            if sub.expired_notified_at is None:
+                notices.setdefault(sub.user_id, []).append((sub, None))
+            else:
+                # Уведомление уже отправлено до сбоя - осталось деактивировать
+                self._deactivate(sub)
+        
+        noticed = 0
+        for items in notices.values():
             try:
-                # Собираем каналы для кика
-                channels = [tc.channel for tc in sub.tariff.tariff_channels if tc.channel.is_active]
-                
-                if channels:
-                    # Кикаем из каналов
-                    results = await kick_from_channels(
-                        user_telegram_id=sub.user.telegram_id,
-                        channels=channels,
-                    )
-                    
-                    # Логируем результаты
-                    success_count = sum(1 for s, _ in results.values() if s)
-                    logger.info(
-                        f"Kicked user {sub.user.telegram_id} from {success_count}/{len(channels)} channels"
-                    )
-                
-                # Деактивируем подписку
-                sub.is_active = False
-                sub.auto_kicked = True
-                
-                # Уведомляем пользователя
-                await self._send_expired_notice(bot, sub)
-                
+                await self._send_user_notice(bot, items)
             except Exception as e:
-                logger.error(
-                    f"Error processing expired subscription {sub.id}: {e}",
-                    exc_info=True,
-                )
-        
-        await session.commit()
+                # Недоступного пользователя не уведомляем повторно, как и раньше
+                logger.error(f"Failed to send notice to {items[0][0].user.telegram_id}: {e}")
+            
+            for sub, hours in items:
+                if hours is None:
+                    sub.expired_notified_at = datetime.utcnow()
+                    self._deactivate(sub)
+                    continue
+                
+                # Отмечаем как уведомлённого (старые флаги - для админки)
+                sub.notice_horizon = hours
+                if hours <= 72:
+                    sub.notified_3days = True
+                if hours <= 24:
+                    sub.notified_1day = True
+                noticed += 1
+        
+        return noticed
+    
+    @staticmethod
+    def _deactivate(sub: Subscription) -> None:
+        """Деактивировать истекшую подписку после кика и уведомления."""
+        sub.status = 'expired'
+        sub.auto_kicked = True
     
-    async def _send_expired_notice(
+    async def _send_user_notice(
         self,
         bot,
-        subscription: Subscription,
+        items: list[tuple[Subscription, Optional[int]]],
     ) -> None:
         """
-        Отправить уведомление об истечении подписки.
+        Отправить пользователю одно сообщение обо всех его подписках.
+        
+        Для одной подписки используется обычный текст напоминания или
+        истечения, для нескольких - сводка со строкой на подписку и
+        кнопкой продления для каждого пакета.
         
         Args:
             bot: Экземпляр бота
-            subscription: Подписка
+            items: (подписка, горизонт напоминания или None для истекшей)
         """
         from bot.locales import get_text
-        from bot.keyboards.inline import renew_subscription_keyboard
+        from bot.keyboards.inline import renew_subscription_keyboard, renew_subscriptions_keyboard
+        from bot.services.broadcast import get_global_bucket
         
-        user = subscription.user
-        tariff = subscription.tariff
+        user = items[0][0].user
         lang = user.language or 'ru'
         
-        text = get_text('subscription_expired', lang).format(
-            tariff_name=tariff.name_ru if lang == 'ru' else tariff.name_en,
-        )
+        def package_name(sub: Subscription) -> str:
+            if sub.package is None:
+                return ''
+            return sub.package.name_ru if lang == 'ru' else sub.package.name_en
         
-        try:
-            await bot.send_message(
-                chat_id=user.telegram_id,
-                text=text,
-                reply_markup=renew_subscription_keyboard(tariff.id, lang),
-            )
-            logger.info(f"Sent expiration notice to user {user.telegram_id}")
-        except Exception as e:
-            logger.error(f"Failed to send expiration notice to {user.telegram_id}: {e}")
+        if len(items) == 1:
+            sub, hours = items[0]
+            if hours is None:
+                text = get_text('subscription_expired', lang).format(
+                    tariff_name=package_name(sub),
+                )
+            else:
+                text_key = NOTICE_TEXT_KEYS.get(hours, 'subscription_expires_soon')
+                text = get_text(text_key, lang).format(
+                    tariff_name=package_name(sub),
+                    expires_at=sub.expires_at.strftime('%d.%m.%Y %H:%M'),
+                )
+            keyboard = renew_subscription_keyboard(sub.package_id, lang)
+        else:
+            # Сначала истекшие, затем по дате окончания
+            items = sorted(items, key=lambda item: (item[1] is not None, item[0].expires_at))
+            lines = []
+            for sub, hours in items:
+                if hours is None:
+                    lines.append(get_text('subscription_digest_expired', lang).format(
+                        tariff_name=package_name(sub),
+                    ))
+                else:
+                    lines.append(get_text('subscription_digest_expiring', lang).format(
+                        tariff_name=package_name(sub),
+                        expires_at=sub.expires_at.strftime('%d.%m.%Y %H:%M'),
+                    ))
+            text = get_text('subscription_digest', lang).format(items='\n'.join(lines))
+            
+            packages = list({
+                sub.package_id: sub.package for sub, _ in items if sub.package is not None
+            }.values())
+            keyboard = renew_subscriptions_keyboard(packages, lang)
+        
+        # Общий с рассылками бюджет Bot API
+        await get_global_bucket().acquire()
+        await bot.send_message(
+            chat_id=user.telegram_id,
+            text=text,
+            reply_markup=keyboard,
+            parse_mode=ParseMode.HTML,
+        )
+        logger.info(f"Sent {len(items)} subscription notice(s) to user {user.telegram_id}")
 
 
-async def run_single_check() -> None:
-    """Выполнить одну проверку (для ручного запуска)."""
+async def run_single_check(dry_run: bool = False) -> Optional[CheckPlan]:
+    """
+    Выполнить одну проверку (для ручного запуска).
+    
+    Args:
+        dry_run: Только спланировать проверку, без Telegram и записи в БД
+    
+    Returns:
+        План проверки в режиме dry_run
+    """
+    from bot.services.bot_session import close_bot
+    
     checker = SubscriptionChecker()
-    await checker.check_subscriptions()
-    await checker.stop()
+    try:
+        if dry_run:
+            return await checker.plan_check()
+        await checker.check_subscriptions()
+        return None
+    finally:
+        await checker.stop()
+        await close_bot()
@@ -0,0 +1,246 @@
+"""
+Очередь задач userbot (инвайты и кики) на таблице tasks.
+
+Продюсеры (обработчики бота, админка) только добавляют строки и не
+ждут userbot. Воркер в процессе userbot забирает порции задач одним
+условным UPDATE: статус pending -> processing с арендой до
+locked_until. Задачи упавшего воркера возвращаются в работу, когда
+аренда истекает. Неудачные попытки повторяются с экспоненциальной
+задержкой, после max_attempts задача остаётся в статусе failed
+(dead letter) до ручного перезапуска.
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.models import Task
+
+logger = logging.getLogger(__name__)
+
+# Типы задач
+TASK_INVITE = 'invite'
+TASK_KICK = 'kick'
+
+# Приоритет по типу (меньше - раньше): оплатившие ждут доступа,
+# а кик истекших может подождать
+TASK_PRIORITIES = {
+    TASK_INVITE: 0,
+    TASK_KICK: 10,
+}
+
+
+def enqueue_task(
+    session: AsyncSession,
+    task_type: str,
+    user_telegram_id: int,
+    channel_id: int,
+    payload: Optional[dict] = None,
+    priority: Optional[int] = None,
+) -> Task:
+    """
+    Добавить задачу в очередь.
+    
+    Коммит - за вызывающим, поэтому задача сохраняется в одной
+    транзакции с изменением, которое её породило.
+    
+    Args:
+        session: Сессия БД
+        task_type: Тип задачи (invite / kick)
+        user_telegram_id: Telegram ID пользователя
+        channel_id: Telegram ID канала
+        payload: Дополнительные данные (сохраняются в JSON)
+        priority: Приоритет (по умолчанию по типу задачи)
+    
+    Returns:
+        Созданная задача
+    """
+    task = Task(
+        type=task_type,
+        user_telegram_id=user_telegram_id,
+        channel_id=channel_id,
+        payload=json.dumps(payload) if payload is not None else None,
+        status='pending',
+        priority=TASK_PRIORITIES.get(task_type, 0) if priority is None else priority,
+        attempts=0,
+        available_at=datetime.utcnow(),
+    )
+    session.add(task)
+    return task
+
+
+def enqueue_for_channels(
+    session: AsyncSession,
+    task_type: str,
+    user_telegram_id: int,
+    channel_ids: Iterable[int],
+    payload: Optional[dict] = None,
+) -> list[Task]:
+    """Добавить задачу одного типа для пользователя в каждом канале."""
+    return [
+        enqueue_task(session, task_type, user_telegram_id, channel_id, payload)
+        for channel_id in channel_ids
+    ]
+
+
+def _claimable(now: datetime):
+    """Условие: задачу можно взять в работу."""
+    return or_(
+        and_(
+            Task.status == 'pending',
+            or_(Task.available_at == None, Task.available_at <= now),
+        ),
+        # Аренда истекла - воркер упал или завис
+        and_(Task.status == 'processing', Task.locked_until <= now),
+    )
+
+
+async def claim_tasks(
+    session: AsyncSession,
+    limit: int,
+    lease_seconds: float,
+    types: Optional[Iterable[str]] = None,
+) -> list[Task]:
+    """
+    Атомарно забрать порцию задач в работу.
+    
+    Один UPDATE помечает задачи токеном воркера, поэтому два воркера
+    не получат одну задачу. Попытка засчитывается при взятии: задача,
+    на которой воркер падает, всё равно дойдёт до dead letter.
+    
+    Транзакцией владеет claim_tasks: взятие коммитится сразу, чтобы
+    аренда была видна другим воркерам до выполнения задач. Вместе с
+    ним закоммитится и всё, что уже есть в сессии, поэтому передавать
+    нужно отдельную сессию воркера без своих изменений.
+    
+    Args:
+        session: Сессия БД (коммитится)
+        limit: Сколько задач взять
+        lease_seconds: Аренда: через сколько секунд задачу можно взять снова
+        types: Только задачи этих типов
+    
+    Returns:
+        Взятые задачи в порядке приоритета
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    
+    candidates = select(Task.id).where(_claimable(now))
+    if types is not None:
+        candidates = candidates.where(Task.type.in_(list(types)))
+    candidates = candidates.order_by(Task.priority, Task.available_at, Task.id).limit(limit)
+    
+    result = await session.execute(
+        update(Task)
+        .where(Task.id.in_(candidates.scalar_subquery()), _claimable(now))
+        .values(
+            status='processing',
+            locked_by=token,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=Task.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    
+    if not result.rowcount:
+        return []
+    
+    result = await session.execute(
+        select(Task)
+        .where(Task.locked_by == token, Task.status == 'processing')
+        .order_by(Task.priority, Task.available_at, Task.id)
+    )
+    return list(result.scalars().all())
+
+
+def complete_task(task: Task) -> None:
+    """Отметить задачу выполненной."""
+    task.status = 'completed'
+    task.error = None
+    task.locked_by = None
+    task.locked_until = None
+    task.processed_at = datetime.utcnow()
+
+
+def backoff_delay(attempts: int, base: float, maximum: float) -> float:
+    """Задержка перед повтором: base * 2^(attempts-1), не больше maximum."""
+    return min(maximum, base * 2 ** max(0, attempts - 1))
+
+
+def fail_task(
+    task: Task,
+    error: str,
+    max_attempts: int,
+    backoff_base: float,
+    backoff_max: float,
+    retry: bool = True,
+) -> None:
+    """
+    Отметить неудачную попытку.
+    
+    Задача возвращается в очередь с задержкой по числу попыток или,
+    если попытки кончились (или retry=False), уходит в dead letter.
+    """
+    now = datetime.utcnow()
+    task.error = error
+    task.locked_by = None
+    task.locked_until = None
+    
+    if not retry or task.attempts >= max_attempts:
+        task.status = 'failed'
+        task.processed_at = now
+        logger.warning(f"Task {task.id} ({task.type}) dead-lettered after {task.attempts} attempts: {error}")
+        return
+    
+    task.status = 'pending'
+    task.available_at = now + timedelta(seconds=backoff_delay(task.attempts, backoff_base, backoff_max))
+
+
+async def requeue_failed(
+    session: AsyncSession,
+    task_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Вернуть задачи из dead letter в очередь с обнулёнными попытками.
+    
+    Как и claim_tasks, коммитит переданную сессию.
+    
+    Args:
+        session: Сессия БД (коммитится)
+        task_ids: Какие задачи (по умолчанию все failed)
+    
+    Returns:
+        Сколько задач возвращено
+    """
+    stmt = update(Task).where(Task.status == 'failed')
+    if task_ids is not None:
+        stmt = stmt.where(Task.id.in_(list(task_ids)))
+    
+    result = await session.execute(
+        stmt.values(
+            status='pending',
+            attempts=0,
+            error=None,
+            processed_at=None,
+            available_at=datetime.utcnow(),
+        ).execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def get_queue_stats(session: AsyncSession) -> dict[str, dict[str, int]]:
+    """Количество задач по типу и статусу."""
+    result = await session.execute(
+        select(Task.type, Task.status, func.count(Task.id)).group_by(Task.type, Task.status)
+    )
+    stats: dict[str, dict[str, int]] = {}
+    for task_type, status, count in result.all():
+        stats.setdefault(task_type, {})[status] = count
+    return stats
@@ -90,6 +90,8 @@ export default function Broadcasts() {
   const getStatusBadge = (status) => {
     const styles = {
       draft: 'badge-yellow',
+      scheduled: 'badge-yellow',
+      queued: 'badge-blue',
       running: 'badge-blue',
       paused: 'badge-yellow',
       completed: 'badge-green',
@@ -97,6 +99,8 @@ export default function Broadcasts() {
     }
     const labels = {
       draft: 'Черновик',
+      scheduled: 'Запланировано',
+      queued: 'В очереди',
       running: 'Отправляется',
       paused: 'Приостановлено',
       completed: 'Завершено',
@@ -165,20 +169,20 @@ export default function Broadcasts() {
       icon: Play,
       label: 'Запустить',
       onClick: (row) => openConfirm(row, 'start'),
-      show: (row) => row.status === 'draft' || row.status === 'paused'
+      show: (row) => ['draft', 'scheduled', 'paused'].includes(row.status)
     },
     {
       icon: Pause,
       label: 'Пауза',
       onClick: (row) => openConfirm(row, 'pause'),
-      show: (row) => row.status === 'running'
+      show: (row) => ['queued', 'running'].includes(row.status)
     },
     {
       icon: X,
       label: 'Отменить',
       onClick: (row) => openConfirm(row, 'cancel'),
       className: 'text-red-600 hover:text-red-700',
-      show: (row) => ['draft', 'running', 'paused'].includes(row.status)
+      show: (row) => ['draft', 'scheduled', 'queued', 'running', 'paused'].includes(row.status)
     }
   ]
 
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Broadcast Benchmark
+Замер скорости рассылок на локальном фейковом Bot API
+
+Создаёт временную SQLite базу с пользователями и подписками, поднимает
+aiohttp-заглушку Bot API (задержка, 429, заблокированные пользователи)
+и прогоняет через неё start_broadcast или quick_broadcast.
+
+Отчёт: msg/s, количество записей в БД, p50/p99 задержки отправки, пик RSS.
+
+Пример:
+    python -m scripts.benchmark_broadcast --users 100000 --latency 0.02 --rate 30
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import web
+
+FAKE_TOKEN = "123456:BENCHMARK-fake-token-for-local-api"
+
+
+def parse_args() -> argparse.Namespace:
+    """Параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description="Broadcast throughput benchmark")
+    parser.add_argument("--users", type=int, default=10000, help="Пользователей в базе")
+    parser.add_argument("--subscriptions", type=int, default=5000, help="Активных подписок")
+    parser.add_argument("--mode", choices=["start", "quick"], default="start", help="start_broadcast или quick_broadcast")
+    parser.add_argument("--filter-type", default="all", help="all, active, inactive, tariff_X")
+    parser.add_argument("--latency", type=float, default=0.02, help="Задержка ответа API (сек)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответах 429 (сек)")
+    parser.add_argument("--blocked", type=float, default=0.0, help="Доля пользователей, заблокировавших бота")
+    parser.add_argument("--rate", type=float, default=None, help="Лимит msg/s (по умолчанию из конфига)")
+    parser.add_argument("--workers", type=int, default=None, help="Воркеров отправки (по умолчанию из конфига)")
+    parser.add_argument("--photo", default=None, help="Фото рассылки: file_id, URL или путь")
+    parser.add_argument("--db", default=None, help="Путь к SQLite (по умолчанию временный файл)")
+    return parser.parse_args()
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль (ближайший ранг)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float | None:
+    """Пиковое потребление памяти процессом (только Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт КБ, macOS - байты
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: sendMessage / sendPhoto с задержкой и ошибками."""
+    
+    def __init__(self, latency: float, rate_429: float, retry_after: int, blocked: set[int]):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.blocked = blocked
+        self.requests = 0
+        self.responses_429 = 0
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        data = await request.post()
+        chat_id = int(data.get("chat_id", 0))
+        method = request.match_info["method"]
+        
+        await asyncio.sleep(self.latency)
+        
+        if self.rate_429 and random.random() < self.rate_429:
+            self.responses_429 += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        
+        if chat_id in self.blocked:
+            return web.json_response({
+                "ok": False,
+                "error_code": 403,
+                "description": "Forbidden: bot was blocked by the user",
+            }, status=403)
+        
+        message = {
+            "message_id": self.requests,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+        }
+        if method.lower() == "sendphoto":
+            message["photo"] = [{
+                "file_id": "benchmark-photo-file-id",
+                "file_unique_id": "benchmark-photo",
+                "width": 1,
+                "height": 1,
+            }]
+            message["caption"] = data.get("caption", "")
+        else:
+            message["text"] = data.get("text", "")
+        
+        return web.json_response({"ok": True, "result": message})
+    
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+    
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+async def seed_database(session_factory, users: int, subscriptions: int) -> None:
+    """Заполнить базу пользователями и подписками."""
+    from sqlalchemy import insert
+    from bot.models import User, Subscription
+    
+    now = datetime.utcnow()
+    batch = 5000
+    
+    async with session_factory() as session:
+        for start in range(0, users, batch):
+            rows = [
+                {
+                    "telegram_id": 1_000_000 + i,
+                    "language": "en" if i % 3 == 0 else "ru",
+                    "created_at": now,
+                }
+                for i in range(start, min(start + batch, users))
+            ]
+            await session.execute(insert(User.__table__), rows)
+        
+        for start in range(0, min(subscriptions, users), batch):
+            rows = [
+                {
+                    "user_id": i + 1,
+                    "status": "active",
+                    "starts_at": now,
+                    "expires_at": now + timedelta(days=30),
+                    "created_at": now,
+                }
+                for i in range(start, min(start + batch, subscriptions, users))
+            ]
+            await session.execute(insert(Subscription.__table__), rows)
+        
+        await session.commit()
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    """Прогон рассылки и отчёт."""
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from sqlalchemy import event
+    
+    from bot.config import config
+    from bot.database import engine, async_session_factory, init_db, close_db
+    from bot.services.broadcast import create_broadcast, start_broadcast, quick_broadcast
+    
+    if args.rate:
+        config.broadcast_rate_limit = args.rate
+    if args.workers:
+        config.broadcast_workers = args.workers
+    
+    print(f"🔧 Seeding {args.users} users, {args.subscriptions} subscriptions...")
+    await init_db()
+    await seed_database(async_session_factory, args.users, args.subscriptions)
+    
+    blocked_count = int(args.users * args.blocked)
+    blocked = set(random.sample(range(1_000_000, 1_000_000 + args.users), blocked_count))
+    api = FakeBotAPI(args.latency, args.rate_429, args.retry_after, blocked)
+    await api.start()
+    
+    # Счётчик записей в БД и задержек отправки
+    db_writes = {"statements": 0, "commits": 0}
+    
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            db_writes["statements"] += 1
+    
+    def count_commit(conn):
+        db_writes["commits"] += 1
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    event.listen(engine.sync_engine, "commit", count_commit)
+    
+    latencies: list[float] = []
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api.url))
+    bot = Bot(token=FAKE_TOKEN, session=session)
+    
+    @bot.session.middleware
+    async def measure_latency(make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    
+    print(
+        f"🚀 Running {args.mode} broadcast: rate={config.broadcast_rate_limit} msg/s, "
+        f"workers={config.broadcast_workers}, latency={args.latency}s, "
+        f"429={args.rate_429:.1%}, blocked={args.blocked:.1%}"
+    )
+    
+    started = time.perf_counter()
+    try:
+        async with async_session_factory() as db_session:
+            if args.mode == "quick":
+                result = await quick_broadcast(
+                    db_session, bot, "Benchmark message", filter_type=args.filter_type
+                )
+                sent, failed = result["sent"], result["failed"]
+            else:
+                broadcast = await create_broadcast(
+                    db_session,
+                    "Benchmark message",
+                    message_photo=args.photo,
+                    filter_type=args.filter_type,
+                )
+                # Записи при создании рассылки не относятся к отправке
+                db_writes["statements"] = db_writes["commits"] = 0
+                broadcast = await start_broadcast(db_session, bot, broadcast.id)
+                sent, failed = broadcast.sent_count, broadcast.failed_count
+    finally:
+        elapsed = time.perf_counter() - started
+        await bot.session.close()
+        await api.stop()
+        await close_db()
+    
+    rss = peak_rss_mb()
+    print()
+    print("=" * 50)
+    print("📊 Broadcast benchmark results")
+    print("=" * 50)
+    print(f"Sent / failed:      {sent} / {failed}")
+    print(f"Elapsed:            {elapsed:.2f} s")
+    print(f"Throughput:         {(sent + failed) / elapsed:.1f} msg/s" if elapsed else "Throughput: n/a")
+    print(f"API requests:       {api.requests} ({api.responses_429} x 429)")
+    print(f"DB writes:          {db_writes['statements']} statements, {db_writes['commits']} commits")
+    print(f"Send latency p50:   {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Send latency p99:   {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Peak RSS:           {rss:.1f} MB" if rss is not None else "Peak RSS: n/a")
+
+
+def main() -> None:
+    """Главная функция."""
+    args = parse_args()
+    
+    # Engine бота создаётся при импорте, поэтому путь к БД задаём заранее
+    tmp_dir = None
+    if args.db:
+        db_path = args.db
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "benchmark.db")
+    os.environ["DATABASE_PATH"] = db_path
+    os.environ.setdefault("DEBUG", "false")
+    
+    try:
+        asyncio.run(run_benchmark(args))
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Subscription Queries Benchmark
+Замер запросов checker'а подписок и дашборда на большой таблице
+
+Создаёт временную SQLite базу с N подписками (по умолчанию 1M),
+записывает SQL, который выполняет SubscriptionChecker (перечитывание
+дедлайнов и порция проверки), и прогоняет его вместе с запросами
+админки. Печатает медиану / p95 времени и план запроса (EXPLAIN QUERY PLAN).
+
+С --drop-indexes индексы подписок удаляются - для сравнения "до/после".
+
+Пример:
+    python -m scripts.benchmark_subscriptions --rows 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+# Пакетов при заполнении базы (по два канала в каждом)
+PACKAGES = 5
+
+
+def parse_args() -> argparse.Namespace:
+    """Параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description="Subscription queries benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Подписок в базе")
+    parser.add_argument("--users", type=int, default=100_000, help="Пользователей в базе")
+    parser.add_argument("--due", type=int, default=200, help="Подписок, ожидающих обработки")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого запроса")
+    parser.add_argument("--drop-indexes", action="store_true", help="Удалить индексы подписок")
+    parser.add_argument("--db", default=None, help="Путь к SQLite (по умолчанию временный файл)")
+    return parser.parse_args()
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль (ближайший ранг)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def seed_database(engine, rows: int, users: int, due: int) -> None:
+    """
+    Заполнить базу подписками.
+    
+    Большинство подписок давно истекли и обработаны (auto_kicked),
+    часть активна, 10% бессрочные, 5% отменены без кика (их
+    отбрасывает только статус), due штук истекли и ждут checker'а.
+    Подписки распределены по PACKAGES пакетам, в каждом по два канала.
+    """
+    from sqlalchemy import insert
+    from bot.models import Channel, Package, PackageChannel, User, Subscription
+    
+    now = datetime.utcnow()
+    batch = 10000
+    rnd = random.Random(42)
+    due_rows = set(rnd.sample(range(rows), min(due, rows)))
+    
+    async with engine.begin() as conn:
+        await conn.execute(insert(Channel.__table__), [
+            {"channel_id": -1_000_000_000_000 - i, "title": f"Channel {i}", "is_active": True,
+             "is_deleted": False, "created_at": now}
+            for i in range(1, PACKAGES * 2 + 1)
+        ])
+        await conn.execute(insert(Package.__table__), [
+            {"name_ru": f"Пакет {i}", "name_en": f"Package {i}", "is_active": True,
+             "sort_order": i, "is_deleted": False, "created_at": now}
+            for i in range(1, PACKAGES + 1)
+        ])
+        await conn.execute(insert(PackageChannel.__table__), [
+            {"package_id": i, "channel_id": i * 2 - offset}
+            for i in range(1, PACKAGES + 1)
+            for offset in (0, 1)
+        ])
+        
+        for start in range(0, users, batch):
+            await conn.execute(insert(User.__table__), [
+                {"telegram_id": 1_000_000 + i, "language": "ru", "created_at": now}
+                for i in range(start, min(start + batch, users))
+            ])
+        
+        for start in range(0, rows, batch):
+            chunk = []
+            for i in range(start, min(start + batch, rows)):
+                if i in due_rows:
+                    # Истекли только что, ещё не обработаны
+                    expires_at = now - timedelta(minutes=rnd.randint(1, 60))
+                    status, kicked = "active", False
+                elif rnd.random() < 0.1:
+                    expires_at, status, kicked = None, "active", False
+                elif rnd.random() < 0.05:
+                    expires_at = now + timedelta(days=rnd.uniform(-365, 60))
+                    status, kicked = "cancelled", False
+                else:
+                    expires_at = now + timedelta(days=rnd.uniform(-365, 60))
+                    kicked = expires_at <= now
+                    status = "expired" if kicked else "active"
+                
+                chunk.append({
+                    "user_id": rnd.randint(1, users),
+                    "package_id": rnd.randint(1, PACKAGES),
+                    "status": status,
+                    "starts_at": now - timedelta(days=30),
+                    "expires_at": expires_at,
+                    "auto_kicked": kicked,
+                    "notified_3days": kicked,
+                    "notified_1day": kicked,
+                    "created_at": now - timedelta(days=rnd.uniform(0, 400)),
+                })
+            await conn.execute(insert(Subscription.__table__), chunk)
+
+
+async def capture_checker_statements(engine) -> dict[str, tuple[str, tuple]]:
+    """
+    SQL, который выполняет SubscriptionChecker, с параметрами.
+    
+    Запросы не воспроизводятся вручную, а записываются при вызове
+    _refill_deadlines() и plan_check() - так замеряется ровно то, что
+    уходит в базу.
+    """
+    from sqlalchemy import event
+    from bot.services.subscription_checker import SubscriptionChecker
+    
+    checker = SubscriptionChecker(engine=engine, bot=object())
+    captured: list[tuple[str, tuple]] = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM subscriptions" in statement:
+            captured.append((statement, tuple(parameters)))
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await checker._refill_deadlines()
+        refill = list(captured)
+        captured.clear()
+        await checker.plan_check()
+        chunks = list(captured)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    
+    names = ["checker: refill expiry"] + [
+        f"checker: refill {hours}h notice" for hours in checker.notice_hours
+    ]
+    statements = dict(zip(names, refill))
+    if chunks:
+        statements["checker: due chunk"] = chunks[0]
+    return statements
+
+
+def build_admin_queries() -> dict:
+    """
+    Запросы админки и дашборда.
+    
+    Активные подписки считаются по status - так, как их определяет
+    Subscription.is_active.
+    """
+    from sqlalchemy import select, func, or_
+    from bot.models import Subscription
+    
+    now = datetime.utcnow()
+    active = Subscription.status.in_(("active", "trial"))
+    
+    return {
+        "admin: user subscriptions": (
+            select(Subscription.id)
+            .where(Subscription.user_id == 12345)
+            .order_by(Subscription.created_at.desc())
+        ),
+        "admin: expired count": (
+            select(func.count(Subscription.id))
+            .where(Subscription.expires_at != None, Subscription.expires_at < now)
+        ),
+        "dashboard: active count": (
+            select(func.count(Subscription.id))
+            .where(active, or_(Subscription.expires_at == None, Subscription.expires_at > now))
+        ),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    """Прогон запросов и отчёт."""
+    from sqlalchemy import text
+    from sqlalchemy.dialects import sqlite
+    
+    from bot.database import engine, init_db, close_db
+    from bot.models import Subscription
+    
+    await init_db()
+    
+    print(f"🔧 Seeding {args.rows} subscriptions, {args.users} users...")
+    started = time.perf_counter()
+    await seed_database(engine, args.rows, args.users, args.due)
+    print(f"   done in {time.perf_counter() - started:.1f} s")
+    
+    async with engine.begin() as conn:
+        if args.drop_indexes:
+            for index in Subscription.__table__.indexes:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        await conn.execute(text("ANALYZE"))
+    
+    print()
+    print("=" * 70)
+    print(f"📊 Subscription queries ({'without' if args.drop_indexes else 'with'} indexes)")
+    print("=" * 70)
+    
+    try:
+        checker_statements = await capture_checker_statements(engine)
+        
+        async with engine.connect() as conn:
+            for name, (statement, parameters) in checker_statements.items():
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    result = await conn.exec_driver_sql(statement, parameters)
+                    result.all()
+                    timings.append(time.perf_counter() - started)
+                
+                plan = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                print_result(name, timings, plan.all())
+            
+            for name, stmt in build_admin_queries().items():
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    result = await conn.execute(stmt)
+                    result.all()
+                    timings.append(time.perf_counter() - started)
+                
+                compiled = stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+                plan = await conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+                print_result(name, timings, plan.all())
+        
+        print()
+        print("COUNT-запросы читают все подходящие записи индекса: их время растёт")
+        print("с числом подписок, быстрее - только поддерживаемые счётчики.")
+    finally:
+        await close_db()
+
+
+def print_result(name: str, timings: list[float], plan: list) -> None:
+    """Строка отчёта: перцентили времени и план запроса."""
+    print(
+        f"{name:<30} p50 {percentile(timings, 50) * 1000:8.3f} ms   "
+        f"p95 {percentile(timings, 95) * 1000:8.3f} ms"
+    )
+    for row in plan:
+        print(f"    {row[-1]}")
+
+
+def main() -> None:
+    """Главная функция."""
+    args = parse_args()
+    
+    # Engine бота создаётся при импорте, поэтому путь к БД задаём заранее
+    tmp_dir = None
+    if args.db:
+        db_path = args.db
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "benchmark.db")
+    os.environ["DATABASE_PATH"] = db_path
+    os.environ.setdefault("DEBUG", "false")
+    
+    try:
+        asyncio.run(run_benchmark(args))
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
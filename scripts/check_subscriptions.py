@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Subscription Check Runner
+Ручной запуск проверки подписок, dry-run и повтор на копии БД
+
+По умолчанию выполняет одну настоящую проверку (кики и уведомления).
+С --dry-run только планирует: выборка и раскладка идут тем же кодом,
+что у SubscriptionChecker, но без Telegram и без записи в БД. Печатает
+запланированные действия и разбивку по времени: основной запрос,
+загрузка связей, число запросов к API и прогноз времени выполнения
+при лимитах из конфига.
+
+--at повторяет проверку на заданный момент (например, на копии БД из
+data/backups), --seed заполняет временную базу подписками, как
+benchmark_subscriptions.
+
+Пример:
+    python -m scripts.check_subscriptions --dry-run
+    python -m scripts.check_subscriptions --dry-run --db data/backups/bot.db --at 2026-11-01T00:00
+    python -m scripts.check_subscriptions --dry-run --seed 1000000 --due 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args() -> argparse.Namespace:
+    """Параметры запуска."""
+    parser = argparse.ArgumentParser(description="Subscription check runner")
+    parser.add_argument("--dry-run", action="store_true", help="Только спланировать, без Telegram и записи в БД")
+    parser.add_argument("--at", type=datetime.fromisoformat, default=None, help="Момент проверки (UTC, ISO), только с --dry-run")
+    parser.add_argument("--db", default=None, help="Путь к SQLite (по умолчанию из конфига)")
+    parser.add_argument("--seed", type=int, default=0, help="Заполнить временную базу N подписками")
+    parser.add_argument("--users", type=int, default=100_000, help="Пользователей при --seed")
+    parser.add_argument("--due", type=int, default=200, help="Подписок, ожидающих обработки, при --seed")
+    parser.add_argument("--actions", action="store_true", help="Печатать каждое запланированное действие")
+    parser.add_argument("--json", action="store_true", help="Вывести отчёт в JSON")
+    args = parser.parse_args()
+    if args.at and not args.dry_run:
+        parser.error("--at is only supported with --dry-run")
+    if args.seed and not args.dry_run:
+        parser.error("--seed is only supported with --dry-run")
+    return args
+
+
+def print_plan(plan, show_actions: bool) -> None:
+    """Отчёт dry-run."""
+    report = plan.report()
+    timing = report["timing"]
+    
+    print("=" * 70)
+    print(f"📋 Subscription check plan at {report['now']}")
+    print("=" * 70)
+    print(f"Chunks:            {report['chunks']}")
+    print(f"Reminders:         {report['reminders']}")
+    print(f"Expired:           {report['expired']}")
+    print(f"Deferred (quota):  {report['deferred']}")
+    print(f"Bot messages:      {report['api_calls']['bot_messages']}")
+    print(f"Userbot calls:     {report['api_calls']['userbot_calls']}")
+    print()
+    print(f"Query time:        {timing['query_ms']:10.2f} ms")
+    print(f"Relations loading: {timing['relations_ms']:10.2f} ms")
+    print(f"Selection total:   {timing['total_ms']:10.2f} ms")
+    print(f"Kick drain:        {timing['kick_drain_s']:10.2f} s")
+    print(f"Message drain:     {timing['message_drain_s']:10.2f} s")
+    print(f"Projected drain:   {timing['drain_s']:10.2f} s")
+    
+    if show_actions:
+        print()
+        for sub_id, telegram_id, hours in plan.reminders:
+            print(f"  remind  sub={sub_id} user={telegram_id} horizon={hours}h")
+        for sub_id, telegram_id, channels in plan.expired:
+            print(f"  expire  sub={sub_id} user={telegram_id} kick={channels}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Проверка или dry-run."""
+    from bot.database import engine, init_db, close_db
+    from bot.services.subscription_checker import SubscriptionChecker, run_single_check
+    
+    try:
+        if args.seed:
+            from scripts.benchmark_subscriptions import seed_database
+            
+            await init_db()
+            # В stderr, чтобы не ломать вывод --json
+            print(f"🔧 Seeding {args.seed} subscriptions, {args.users} users...", file=sys.stderr)
+            await seed_database(engine, args.seed, args.users, args.due)
+        
+        if not args.dry_run:
+            await run_single_check()
+            print("✅ Subscription check completed")
+            return
+        
+        checker = SubscriptionChecker()
+        try:
+            plan = await checker.plan_check(now=args.at)
+        finally:
+            await checker.stop()
+        
+        if args.json:
+            report = plan.report()
+            if args.actions:
+                report["actions"] = {"reminders": plan.reminders, "expired": plan.expired}
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_plan(plan, args.actions)
+    finally:
+        await close_db()
+
+
+def main() -> None:
+    """Главная функция."""
+    args = parse_args()
+    
+    # Engine бота создаётся при импорте, поэтому путь к БД задаём заранее
+    tmp_dir = None
+    if args.seed and not args.db:
+        tmp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(tmp_dir.name, "check.db")
+    elif args.db:
+        os.environ["DATABASE_PATH"] = args.db
+    if args.dry_run:
+        os.environ.setdefault("DEBUG", "false")
+    
+    try:
+        asyncio.run(run(args))
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
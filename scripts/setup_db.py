@@ -8,8 +8,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from bot.config import config
-from bot.database import engine, async_session_factory
-from bot.models import Base, Text, Settings, FAQItem
+from bot.database import init_db, async_session_factory
+from bot.models import Text, Settings, FAQItem
 
 
 # Default texts for bot
@@ -342,8 +342,7 @@ async def setup_database() -> None:
     config.ensure_dirs()
     
     # Create all tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await init_db()
     print("✅ Tables created")
     
     # Add default data
@@ -37,6 +37,10 @@ timeout /t 2 /nobreak > nul
 start "Telegram Bot" cmd /k "cd /d "%~dp0" && call venv\Scripts\activate.bat && python -m bot.run"
 echo ✅ Telegram Bot started
 
+:: Start Broadcast Worker in new window
+start "Broadcast Worker" cmd /k "cd /d "%~dp0" && call venv\Scripts\activate.bat && python -m bot.services.broadcast_worker"
+echo ✅ Broadcast Worker started
+
 echo.
 echo ════════════════════════════════════════════
 echo   All services started!
@@ -0,0 +1,10 @@
+"""Общие настройки тестов: отдельная база во временном каталоге и тестовый токен."""
+
+import os
+import tempfile
+
+# Конфиг читается при импорте bot.config, поэтому окружение задаём до него
+_tmp_dir = tempfile.mkdtemp(prefix="tgconst-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_tmp_dir, "bot.db"))
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
@@ -0,0 +1,66 @@
+"""In-memory база с минимальными данными для тестов подписок."""
+
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot.database import make_engine, make_session_factory
+from bot.models import Base, Channel, Package, PackageChannel, Subscription, User
+
+
+async def memory_engine() -> AsyncEngine:
+    """Engine на пустой in-memory базе со всеми таблицами."""
+    return await _create_tables(make_engine("sqlite+aiosqlite:///:memory:"))
+
+
+async def file_engine(path: Path) -> AsyncEngine:
+    """
+    Engine на пустой файловой базе со всеми таблицами.
+    
+    In-memory база - одно соединение на все сессии, поэтому тесты с
+    параллельными сессиями (цикл checker'а) идут на файле.
+    """
+    return await _create_tables(make_engine(f"sqlite+aiosqlite:///{path}"))
+
+
+async def _create_tables(engine: AsyncEngine) -> AsyncEngine:
+    """Создать все таблицы моделей."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def seed_subscriptions(
+    engine: AsyncEngine,
+    expires: dict[str, datetime | None],
+    **fields,
+) -> dict[str, int]:
+    """
+    Создать пакет с одним каналом и по подписке на каждый срок.
+    
+    Args:
+        engine: Engine базы
+        expires: {метка: expires_at} - по пользователю на подписку
+        fields: Общие поля подписок (status, auto_kicked, ...)
+    
+    Returns:
+        {метка: id подписки}
+    """
+    async with make_session_factory(engine)() as session:
+        package = Package(name_ru="Пакет", name_en="Package")
+        channel = Channel(channel_id=-1001, title="Channel")
+        session.add(PackageChannel(package=package, channel=channel))
+        
+        subscriptions = {}
+        for number, (label, expires_at) in enumerate(expires.items(), start=1):
+            user = User(telegram_id=1000 + number)
+            subscriptions[label] = Subscription(
+                user=user,
+                package=package,
+                expires_at=expires_at,
+                **fields,
+            )
+        session.add_all(subscriptions.values())
+        await session.commit()
+        return {label: sub.id for label, sub in subscriptions.items()}
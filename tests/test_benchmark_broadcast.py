@@ -0,0 +1,36 @@
+"""Заглушка Bot API из scripts/benchmark_broadcast."""
+
+import asyncio
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from scripts.benchmark_broadcast import FAKE_TOKEN, FakeBotAPI
+
+
+def test_fake_api_errors_map_to_aiogram_exceptions():
+    """403 и 429 заглушки aiogram разбирает так же, как ответы Telegram."""
+    async def scenario():
+        api = FakeBotAPI(latency=0, rate_429=0, retry_after=3, blocked={5})
+        await api.start()
+        bot = Bot(token=FAKE_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api.url)))
+        errors = []
+        try:
+            for chat_id, rate_429 in ((5, 0), (6, 1)):
+                api.rate_429 = rate_429
+                try:
+                    await bot.send_message(chat_id, "text")
+                except (TelegramForbiddenError, TelegramRetryAfter) as e:
+                    errors.append(e)
+        finally:
+            await bot.session.close()
+            await api.stop()
+        return errors
+    
+    forbidden, retry = asyncio.run(scenario())
+    
+    assert isinstance(forbidden, TelegramForbiddenError)
+    assert isinstance(retry, TelegramRetryAfter)
+    assert retry.retry_after == 3
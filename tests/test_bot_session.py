@@ -0,0 +1,27 @@
+"""Общий Bot процесса."""
+
+import asyncio
+
+from bot.config import config
+from bot.services.bot_session import close_bot, create_bot, get_bot
+
+
+def test_shared_bot_uses_configured_pool_size():
+    """HTTP-пул общего Bot ограничен bot_http_pool_size."""
+    async def scenario():
+        bot = get_bot()
+        try:
+            assert get_bot() is bot
+            session = await bot.session.create_session()
+            return session.connector.limit
+        finally:
+            await close_bot()
+    
+    assert asyncio.run(scenario()) == config.bot_http_pool_size
+
+
+def test_create_bot_has_no_default_parse_mode():
+    """Разметку указывает отправитель, а не Bot по умолчанию."""
+    bot = create_bot(token="42:TEST")
+    
+    assert bot.parse_mode is None
@@ -0,0 +1,46 @@
+"""Запуск scripts/check_subscriptions на заполненной базе."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def run_script(*args: str) -> subprocess.CompletedProcess:
+    """Запустить скрипт отдельным процессом, как из консоли."""
+    env = dict(os.environ, DEBUG="false")
+    return subprocess.run(
+        [sys.executable, "-m", "scripts.check_subscriptions", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_seeded_dry_run_plans_kicks_and_reminders():
+    """Dry-run на временной базе находит все ожидающие подписки и их кики."""
+    result = run_script("--dry-run", "--seed", "2000", "--users", "200", "--due", "20", "--json", "--actions")
+    
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    
+    assert report["expired"] == 20
+    assert report["reminders"] > 0
+    assert report["deferred"] == 0
+    # Каждая истекшая подписка - два канала своего пакета
+    assert all(len(channels) == 2 for _, _, channels in report["actions"]["expired"])
+    assert report["api_calls"]["userbot_calls"] >= 40
+    assert report["timing"]["drain_s"] > 0
+
+
+def test_seed_requires_dry_run():
+    """Заполнение базы доступно только для dry-run."""
+    result = run_script("--seed", "10")
+    
+    assert result.returncode != 0
+    assert "--seed is only supported with --dry-run" in result.stderr
@@ -0,0 +1,52 @@
+"""Пул соединений и настройки SQLite."""
+
+import asyncio
+import os
+
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+def test_import_with_file_database():
+    """Модуль импортируется с файловой базой и пулом из конфига."""
+    import bot.database as database
+    from bot.config import config
+    
+    assert config.database_url.startswith("sqlite+aiosqlite:///")
+    assert ":memory:" not in config.database_url
+    assert isinstance(database.engine.pool, AsyncAdaptedQueuePool)
+    assert database.engine.pool.size() == config.db_pool_size
+
+
+def test_file_engine_applies_pragmas(tmp_path):
+    """Соединения файловой базы открываются в WAL."""
+    from bot.database import make_engine
+    
+    engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    
+    async def journal_mode() -> str:
+        try:
+            async with engine.connect() as conn:
+                return await conn.scalar(text("PRAGMA journal_mode"))
+        finally:
+            await engine.dispose()
+    
+    assert asyncio.run(journal_mode()) == "wal"
+    assert os.path.exists(tmp_path / "pool.db")
+
+
+def test_memory_engine_skips_pool_sizing():
+    """In-memory база работает без параметров очереди."""
+    from bot.database import make_engine
+    
+    engine = make_engine("sqlite+aiosqlite:///:memory:")
+    
+    async def select_one() -> int:
+        try:
+            async with engine.connect() as conn:
+                return await conn.scalar(text("SELECT 1"))
+        finally:
+            await engine.dispose()
+    
+    assert not isinstance(engine.pool, AsyncAdaptedQueuePool)
+    assert asyncio.run(select_one()) == 1
@@ -0,0 +1,41 @@
+"""Общий бюджет MTProto инвайтов и киков."""
+
+from userbot.actions import pacing
+from userbot.config import userbot_config
+
+
+class FakePool:
+    """Пул, у которого подключена часть аккаунтов."""
+    
+    def __init__(self, size: int, connected: int):
+        self.size = size
+        self.connected_count = connected
+    
+    def add_flood_listener(self, listener) -> None:
+        pass
+
+
+def test_bucket_follows_connected_accounts(monkeypatch):
+    """Бюджет считается по подключённым аккаунтам и меняется при переподключении."""
+    monkeypatch.setattr(pacing, '_bucket', None)
+    monkeypatch.setattr(pacing, '_pacers', {})
+    pool = FakePool(size=4, connected=1)
+    rate = userbot_config.MTPROTO_RATE_LIMIT
+    
+    pacer = pacing.get_pacer('kick', pool)
+    assert pacer.bucket.rate == rate
+    
+    pool.connected_count = 3
+    assert pacing.get_pacer('invite', pool).bucket is pacer.bucket
+    assert pacer.bucket.rate == rate * 3
+    assert pacer.bucket.capacity == rate * 3
+
+
+def test_bucket_keeps_one_account_when_none_connected(monkeypatch):
+    """Без подключённых аккаунтов бюджет не обнуляется."""
+    monkeypatch.setattr(pacing, '_bucket', None)
+    monkeypatch.setattr(pacing, '_pacers', {})
+    
+    pacer = pacing.get_pacer('kick', FakePool(size=2, connected=0))
+    
+    assert pacer.bucket.rate == userbot_config.MTPROTO_RATE_LIMIT
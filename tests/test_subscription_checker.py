@@ -0,0 +1,248 @@
+"""Выборки checker'а подписок на настоящей схеме."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, update
+
+from bot.database import make_session_factory
+from bot.models import Subscription
+from bot.services.subscription_checker import SubscriptionChecker
+
+from tests.db import file_engine, memory_engine, seed_subscriptions
+
+NOW = datetime(2026, 1, 10, 12, 0)
+
+
+def make_checker(engine, **kwargs) -> SubscriptionChecker:
+    """Checker без отсрочки киков, с напоминаниями за 3 дня и за 1 день."""
+    kwargs.setdefault('notice_hours', [72, 24])
+    kwargs.setdefault('kick_grace_minutes', 0)
+    return SubscriptionChecker(engine=engine, bot=object(), **kwargs)
+
+
+async def collect_due(checker: SubscriptionChecker, engine, now: datetime):
+    """Все порции _iter_due_chunks: [(id истекших, {id: горизонт})]."""
+    chunks = []
+    async with make_session_factory(engine)() as session:
+        async for expired, reminders in checker._iter_due_chunks(session, now):
+            chunks.append((
+                [sub.id for sub in expired],
+                {sub.id: hours for sub, hours in reminders},
+            ))
+    return chunks
+
+
+def test_iter_due_chunks_returns_each_kind_once():
+    """Один проход отдаёт 3-дневные, 1-дневные и истекшие подписки ровно по разу."""
+    async def scenario():
+        engine = await memory_engine()
+        ids = await seed_subscriptions(engine, {
+            'three_days': NOW + timedelta(hours=60),
+            'one_day': NOW + timedelta(hours=20),
+            'expired': NOW - timedelta(hours=1),
+            'later': NOW + timedelta(days=10),
+            'forever': None,
+        })
+        checker = make_checker(engine, chunk_size=100)
+        statements = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith('SELECT') and 'FROM subscriptions' in statement:
+                statements.append(statement)
+        
+        event.listen(engine.sync_engine, 'before_cursor_execute', count)
+        try:
+            return ids, await collect_due(checker, engine, NOW), statements
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute', count)
+            await engine.dispose()
+    
+    ids, chunks, statements = asyncio.run(scenario())
+    
+    # Одна порция - один запрос по subscriptions (плюс пустой запрос конца выборки)
+    assert len(chunks) == 1
+    assert len(statements) == 2
+    expired, reminders = chunks[0]
+    assert expired == [ids['expired']]
+    assert reminders == {ids['three_days']: 72, ids['one_day']: 24}
+
+
+def test_iter_due_chunks_pages_without_repeats():
+    """Курсор по (expires_at, id) не повторяет строки между порциями."""
+    async def scenario():
+        engine = await memory_engine()
+        ids = await seed_subscriptions(engine, {
+            f'expired_{n}': NOW - timedelta(hours=1) for n in range(5)
+        } | {
+            f'soon_{n}': NOW + timedelta(hours=10) for n in range(4)
+        })
+        checker = make_checker(engine, chunk_size=2)
+        try:
+            return ids, await collect_due(checker, engine, NOW)
+        finally:
+            await engine.dispose()
+    
+    ids, chunks = asyncio.run(scenario())
+    
+    seen = [sub_id for expired, reminders in chunks for sub_id in [*expired, *reminders]]
+    assert len(chunks) == 5
+    assert sorted(seen) == sorted(ids.values())
+
+
+def test_iter_due_chunks_skips_inactive_and_notified():
+    """Неактивные, уже обработанные и уже уведомлённые подписки не выбираются."""
+    async def scenario():
+        engine = await memory_engine()
+        ids = await seed_subscriptions(engine, {
+            'cancelled': NOW - timedelta(hours=1),
+            'kicked': NOW - timedelta(hours=1),
+            'notified': NOW + timedelta(hours=20),
+            'trial': NOW - timedelta(hours=1),
+        })
+        async with make_session_factory(engine)() as session:
+            await session.execute(
+                update(Subscription).where(Subscription.id == ids['cancelled']).values(status='cancelled')
+            )
+            await session.execute(
+                update(Subscription).where(Subscription.id == ids['kicked']).values(auto_kicked=True)
+            )
+            await session.execute(
+                update(Subscription).where(Subscription.id == ids['notified']).values(notice_horizon=24)
+            )
+            await session.execute(
+                update(Subscription).where(Subscription.id == ids['trial']).values(status='trial')
+            )
+            await session.commit()
+        checker = make_checker(engine)
+        try:
+            return ids, await collect_due(checker, engine, NOW)
+        finally:
+            await engine.dispose()
+    
+    ids, chunks = asyncio.run(scenario())
+    
+    assert chunks == [([ids['trial']], {})]
+
+
+def test_refill_deadlines_loads_expiry_and_notices():
+    """Куча получает момент кика и оба горизонта напоминаний."""
+    async def scenario():
+        engine = await memory_engine()
+        now = datetime.utcnow()
+        ids = await seed_subscriptions(engine, {
+            'soon': now + timedelta(days=5),
+            'forever': None,
+        })
+        checker = make_checker(engine, kick_grace_minutes=30)
+        try:
+            await checker._refill_deadlines()
+        finally:
+            await engine.dispose()
+        return ids, now, checker
+    
+    ids, now, checker = asyncio.run(scenario())
+    
+    expires_at = now + timedelta(days=5)
+    assert sorted(checker._deadlines) == [
+        (expires_at - timedelta(hours=72), ids['soon']),
+        (expires_at - timedelta(hours=24), ids['soon']),
+        (expires_at + timedelta(minutes=30), ids['soon']),
+    ]
+    assert checker._horizon is None
+
+
+def test_refill_deadlines_sets_horizon_when_truncated():
+    """Обрезанная выборка ограничивает горизонт последним загруженным дедлайном."""
+    async def scenario():
+        engine = await memory_engine()
+        now = datetime.utcnow()
+        await seed_subscriptions(engine, {
+            f'sub_{n}': now + timedelta(days=10 + n) for n in range(3)
+        })
+        checker = make_checker(engine, deadlines_limit=2, notice_hours=[])
+        try:
+            await checker._refill_deadlines()
+        finally:
+            await engine.dispose()
+        return now, checker
+    
+    now, checker = asyncio.run(scenario())
+    
+    assert len(checker._deadlines) == 2
+    assert checker._horizon == now + timedelta(days=11)
+
+
+def test_check_enqueues_kicks_instead_of_kicking():
+    """Проверка ставит кики в очередь задач и деактивирует подписку один раз."""
+    from sqlalchemy import select
+    from bot.models import Task
+    from bot.services.task_queue import TASK_KICK
+    
+    async def scenario():
+        engine = await memory_engine()
+        ids = await seed_subscriptions(engine, {
+            'expired': datetime.utcnow() - timedelta(hours=1),
+        })
+        nudges = []
+        checker = make_checker(engine, on_tasks=lambda: nudges.append(True))
+        try:
+            # Второй проход не должен поставить задачи повторно
+            await checker.check_subscriptions()
+            await checker.check_subscriptions()
+            async with make_session_factory(engine)() as session:
+                tasks = (await session.execute(select(Task))).scalars().all()
+                sub = await session.get(Subscription, ids['expired'])
+                return tasks, sub, nudges
+        finally:
+            await engine.dispose()
+    
+    tasks, sub, nudges = asyncio.run(scenario())
+    
+    assert [(task.type, task.channel_id, task.status) for task in tasks] == [(TASK_KICK, -1001, 'pending')]
+    assert tasks[0].user_telegram_id == 1001
+    assert sub.kicked_at is not None
+    assert sub.status == 'expired'
+    assert sub.auto_kicked is True
+    assert nudges == [True]
+
+
+def test_run_loop_sleeps_to_heap_head_and_wakes_on_changes_mark(tmp_path):
+    """Опрос отметки не перечитывает дедлайны сам по себе, новая отметка - перечитывает."""
+    from bot.services.subscription_checker import mark_deadlines_changed
+    
+    async def scenario():
+        engine = await file_engine(tmp_path / 'loop.db')
+        checker = make_checker(engine, change_poll_interval=0.02, check_interval=300)
+        refills = []
+        refill_deadlines = checker._refill_deadlines
+        
+        async def counted_refill():
+            refills.append(datetime.utcnow())
+            await refill_deadlines()
+        
+        checker._refill_deadlines = counted_refill
+        task = asyncio.create_task(checker.run_forever())
+        try:
+            # Несколько опросов отметки без изменений - одно начальное перечитывание
+            await asyncio.sleep(0.2)
+            idle_refills = len(refills)
+            
+            # Изменение "из другого процесса": только строка в settings
+            async with make_session_factory(engine)() as session:
+                await mark_deadlines_changed(session)
+                await session.commit()
+            for _ in range(250):
+                if len(refills) > idle_refills:
+                    break
+                await asyncio.sleep(0.02)
+            return idle_refills, len(refills)
+        finally:
+            await checker.stop()
+            await task
+            await engine.dispose()
+    
+    idle_refills, total_refills = asyncio.run(scenario())
+    
+    assert idle_refills == 1
+    assert total_refills == 2
@@ -0,0 +1,41 @@
+"""Воркер очереди задач userbot."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from bot.database import make_session_factory
+from bot.models import Task
+from bot.services.task_queue import TASK_INVITE, TASK_KICK
+from userbot.worker import TaskWorker
+
+from tests.db import memory_engine, seed_subscriptions
+
+
+def test_kick_of_renewed_subscription_is_skipped():
+    """Кик из очереди не выполняется, если подписку успели продлить."""
+    now = datetime.utcnow()
+    
+    async def scenario():
+        engine = await memory_engine()
+        ids = await seed_subscriptions(engine, {
+            'renewed': now + timedelta(days=30),
+            'expired': now - timedelta(hours=1),
+        })
+        tasks = [
+            Task(type=TASK_KICK, user_telegram_id=1, channel_id=-1001,
+                 payload=json.dumps({'subscription_id': sub_id}))
+            for sub_id in ids.values()
+        ] + [
+            Task(type=TASK_INVITE, user_telegram_id=1, channel_id=-1001,
+                 payload=json.dumps({'subscription_id': ids['renewed']})),
+        ]
+        try:
+            async with make_session_factory(engine)() as session:
+                return ids, await TaskWorker._renewed_subscriptions(session, tasks)
+        finally:
+            await engine.dispose()
+    
+    ids, renewed = asyncio.run(scenario())
+    
+    assert renewed == {ids['renewed']}
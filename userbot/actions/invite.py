@@ -12,8 +12,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 if TYPE_CHECKING:
     from bot.models import User, Channel, Tariff, Subscription
 
-from userbot.config import userbot_config
 from userbot.client import get_userbot
+from userbot.actions.pacing import get_pacer
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,9 @@ async def invite_to_channels(
     """
     Добавить пользователя в список каналов.
     
+    Каналы обрабатываются параллельно; темп в каждом канале и общий
+    бюджет аккаунта задаёт ChannelPacer.
+    
     Args:
         user_telegram_id: Telegram ID пользователя
         channels: Список каналов для добавления
@@ -33,29 +36,31 @@ async def invite_to_channels(
         Dict {channel_id: (success, error_message)}
     """
     userbot = await get_userbot()
-    results: dict[int, tuple[bool, str]] = {}
+    pacer = get_pacer('invite', userbot)
     
-    for channel in channels:
-        if not channel.is_active:
-            logger.info(f"Skipping inactive channel {channel.title}")
-            continue
-        
+    async def invite(channel: 'Channel') -> tuple[bool, str]:
+        await pacer.acquire(channel.channel_id)
         success, error = await userbot.invite_user_to_channel(
             channel_id=channel.channel_id,
             user_id=user_telegram_id,
         )
         
-        results[channel.channel_id] = (success, error)
-        
         if success:
+            pacer.on_success(channel.channel_id)
             logger.info(f"User {user_telegram_id} added to {channel.title}")
         else:
             logger.warning(f"Failed to add user {user_telegram_id} to {channel.title}: {error}")
-        
-        # Задержка между инвайтами
-        await asyncio.sleep(userbot_config.INVITE_DELAY)
+        return success, error
+    
+    active = []
+    for channel in channels:
+        if not channel.is_active:
+            logger.info(f"Skipping inactive channel {channel.title}")
+            continue
+        active.append(channel)
     
-    return results
+    results = await asyncio.gather(*(invite(channel) for channel in active))
+    return {channel.channel_id: result for channel, result in zip(active, results)}
 
 
 async def invite_user_to_tariff_channels(
@@ -0,0 +1,118 @@
+"""
+Адаптивный темп инвайтов и киков.
+
+Операции в разных каналах идут параллельно: каждый канал держит свой
+интервал между запросами, а все вместе ограничены общим бюджетом
+MTProto аккаунта. Интервал канала начинается с INVITE_DELAY /
+KICK_DELAY, удваивается после FloodWait (до FLOOD_MAX_DELAY) и
+постепенно возвращается к базовому после успешных запросов.
+
+ChannelPacer - единственное место, где интервал подстраивается под
+FloodWait; клиент (FloodController) только держит окно ожидания.
+"""
+
+from typing import Optional
+
+from bot.services.rate_limiter import TokenBucket, KeyedRateLimiter
+from userbot.config import userbot_config
+
+
+class ChannelPacer:
+    """Интервалы по каналам, подстраивающиеся под FloodWait."""
+    
+    # Во сколько раз растёт интервал после FloodWait и сжимается после успеха
+    BACKOFF_FACTOR = 2.0
+    RECOVERY_FACTOR = 0.9
+    
+    def __init__(
+        self,
+        method: str,
+        base_interval: float,
+        bucket: TokenBucket,
+        max_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            method: Операция клиента (invite / kick), чьи FloodWait учитываются
+            base_interval: Минимальный интервал между запросами в канале (сек)
+            bucket: Общий бюджет запросов аккаунта
+            max_interval: Потолок интервала после FloodWait (сек)
+        """
+        self.method = method
+        self.base_interval = base_interval
+        self.max_interval = max_interval if max_interval is not None else userbot_config.FLOOD_MAX_DELAY
+        self.bucket = bucket
+        self._intervals: dict[int, float] = {}
+        # Очередь запросов в канале; интервал передаётся на каждый запрос
+        self._channels = KeyedRateLimiter(interval=base_interval)
+    
+    def interval(self, channel_id: int) -> float:
+        """Текущий интервал канала."""
+        return self._intervals.get(channel_id, self.base_interval)
+    
+    async def acquire(self, channel_id: int) -> None:
+        """Дождаться слота в канале и токена общего бюджета."""
+        await self._channels.acquire(channel_id, self.interval(channel_id))
+        await self.bucket.acquire()
+    
+    def on_success(self, channel_id: int) -> None:
+        """Успешный запрос: интервал канала возвращается к базовому."""
+        interval = self._intervals.get(channel_id)
+        if interval is None:
+            return
+        interval *= self.RECOVERY_FACTOR
+        if interval <= self.base_interval:
+            self._intervals.pop(channel_id, None)
+        else:
+            self._intervals[channel_id] = interval
+    
+    def on_flood(self, method: str, channel_id: int, seconds: float) -> None:
+        """
+        FloodWait от клиента: замедлить канал и приостановить весь бюджет.
+        
+        Лимиты Telegram на инвайты и кики действуют на аккаунт, поэтому
+        пауза общая для всех каналов.
+        """
+        if method != self.method:
+            return
+        
+        interval = max(self.base_interval, self.interval(channel_id)) * self.BACKOFF_FACTOR
+        self._intervals[channel_id] = min(self.max_interval, interval)
+        self._channels.delay(channel_id, seconds)
+        self.bucket.pause(seconds)
+
+
+# Общий бюджет MTProto для инвайтов и киков процесса
+_bucket: Optional[TokenBucket] = None
+_pacers: dict[str, ChannelPacer] = {}
+
+
+def _connected_accounts(userbot) -> int:
+    """Сколько аккаунтов реально выполняют запросы (не меньше одного)."""
+    return max(1, getattr(userbot, 'connected_count', 1))
+
+
+def get_pacer(method: str, userbot) -> ChannelPacer:
+    """
+    Получить темп для операции (invite / kick) и подписать его на FloodWait.
+    
+    Args:
+        method: Операция клиента
+        userbot: Запущенный пул userbot (или UserbotClient)
+    """
+    global _bucket
+    # Лимит на аккаунт: N подключённых аккаунтов выдерживают в N раз больше.
+    # Считаем при каждом вызове - аккаунты отключаются и переподключаются
+    rate = userbot_config.MTPROTO_RATE_LIMIT * _connected_accounts(userbot)
+    if _bucket is None:
+        _bucket = TokenBucket(rate=rate)
+    elif _bucket.rate != rate:
+        _bucket.set_rate(rate)
+    
+    pacer = _pacers.get(method)
+    if pacer is None:
+        base = userbot_config.INVITE_DELAY if method == 'invite' else userbot_config.KICK_DELAY
+        pacer = _pacers[method] = ChannelPacer(method, base, _bucket)
+    
+    userbot.add_flood_listener(pacer.on_flood)
+    return pacer
@@ -0,0 +1,89 @@
+"""
+Сверка банов после киков.
+
+Кик делается одним запросом ban_chat_member, поэтому в канале могут
+остаться бессрочные баны: в режиме deferred разбан отложен сюда, в
+остальных режимах бан остаётся, если процесс упал между баном и
+разбаном. Раз в UNBAN_SWEEP_INTERVAL сверка обходит каналы и снимает
+такие баны пачкой, так что ни один пользователь не остаётся забаненным
+навсегда и может снова купить доступ.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models import Channel
+
+from .config import userbot_config
+from .client import get_userbot
+
+logger = logging.getLogger(__name__)
+
+
+class BanSweeper:
+    """Периодическое снятие бессрочных банов, оставшихся после киков."""
+    
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            session_maker: Фабрика сессий БД
+            interval: Период сверки (сек)
+        """
+        self._session_maker = session_maker
+        self.interval = interval or userbot_config.UNBAN_SWEEP_INTERVAL
+        self._running = False
+        self._wakeup = asyncio.Event()
+    
+    def stop(self) -> None:
+        """Остановить после текущего прохода."""
+        self._running = False
+        self._wakeup.set()
+    
+    async def run_forever(self) -> None:
+        """Цикл: проход сразу при запуске, дальше раз в interval."""
+        self._running = True
+        logger.info(f"Ban sweeper started (mode {userbot_config.KICK_MODE}, every {self.interval}s)")
+        
+        while self._running:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error in ban sweeper: {e}", exc_info=True)
+            
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        
+        logger.info("Ban sweeper stopped")
+    
+    async def sweep(self) -> int:
+        """
+        Снять бессрочные баны от киков во всех каналах.
+        
+        Returns:
+            Сколько банов снято
+        """
+        async with self._session_maker() as session:
+            result = await session.execute(
+                select(Channel.channel_id).where(Channel.is_deleted == False)
+            )
+            channel_ids = list(result.scalars().all())
+        
+        userbot = await get_userbot()
+        released = 0
+        for channel_id in channel_ids:
+            released += await userbot.release_bans(channel_id)
+        
+        if released:
+            logger.info(f"Ban sweep released {released} bans in {len(channel_ids)} channels")
+        return released
@@ -1,14 +1,26 @@
 """
 Pyrogram Client для userbot.
 
-Singleton клиент для работы с Telegram API.
+Клиент одного аккаунта для работы с Telegram API; аккаунты собирает
+UserbotPool (userbot/pool.py). Все запросы инвайтов и киков проходят
+через FloodController: на время FloodWait он останавливает всех
+вызывающих и ограничивает повторы. Темп запросов задаёт ChannelPacer
+(userbot/actions/pacing.py).
+
+Кик - один запрос ban_chat_member (см. KICK_MODE): бан с until_date,
+который Telegram снимает сам, или бессрочный бан, который снимает
+release_bans при сверке (userbot/ban_sweeper.py).
 """
 
 import asyncio
 import logging
-from typing import Optional
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
 
 from pyrogram import Client
+from pyrogram.enums import ChatMembersFilter
 from pyrogram.errors import (
     FloodWait,
     UserNotParticipant,
@@ -24,50 +36,190 @@ from pyrogram.errors import (
     UserDeactivatedBan,
 )
 
-from .config import userbot_config
+from .config import userbot_config, UserbotAccount
 
 logger = logging.getLogger(__name__)
 
+# Начало сообщения об ошибке, когда запрос не выполнен из-за FloodWait
+FLOOD_ERROR_PREFIX = "FloodWait"
+# Ошибка: у аккаунта нет прав администратора в канале
+ADMIN_REQUIRED_ERROR = "Bot is not admin in channel"
+
+
+def is_flood_error(error: str) -> bool:
+    """Ошибка - FloodWait, операцию можно повторить позже."""
+    return error.startswith(FLOOD_ERROR_PREFIX)
+
+
+class FloodController:
+    """
+    Окна FloodWait аккаунта.
+    
+    Для каждого метода и для каждой пары (метод, чат) хранит, до
+    какого момента Telegram просил не повторять запросы. FloodWait
+    открывает окно для всех вызывающих метода; интервалы между
+    запросами подстраивает ChannelPacer (userbot/actions/pacing.py),
+    которому FloodWait приходит через add_flood_listener.
+    """
+    
+    def __init__(self):
+        self._wait_until: dict[Any, float] = {}  # ключ -> конец окна FloodWait
+        self._floods: dict[str, int] = {}  # метод -> сколько FloodWait получено
+    
+    @staticmethod
+    def _keys(method: str, chat_id: int) -> tuple[str, tuple[str, int]]:
+        return method, (method, chat_id)
+    
+    async def gate(self, method: str, chat_id: int, max_wait: Optional[float] = None) -> None:
+        """
+        Дождаться конца окна FloodWait метода и чата.
+        
+        Если ждать дольше max_wait, сразу поднимается FloodWait с
+        оставшимся временем - вызывающий может уйти на другой аккаунт.
+        """
+        keys = self._keys(method, chat_id)
+        while True:
+            now = time.monotonic()
+            ready_at = max(self._wait_until.get(key, 0.0) for key in keys)
+            if ready_at <= now:
+                return
+            if max_wait is not None and ready_at - now > max_wait:
+                raise FloodWait(value=math.ceil(ready_at - now))
+            await asyncio.sleep(ready_at - now)
+    
+    def on_flood(self, method: str, chat_id: int, seconds: float) -> None:
+        """FloodWait: открыть окно ожидания метода и чата."""
+        until = time.monotonic() + seconds
+        for key in self._keys(method, chat_id):
+            self._wait_until[key] = max(self._wait_until.get(key, 0.0), until)
+        self._floods[method] = self._floods.get(method, 0) + 1
+    
+    def wait_remaining(self, method: str) -> float:
+        """Сколько секунд ещё длится окно FloodWait метода."""
+        return max(0.0, self._wait_until.get(method, 0.0) - time.monotonic())
+    
+    def state(self) -> dict:
+        """Текущее состояние: открытые окна по методам и чатам."""
+        now = time.monotonic()
+        methods: dict[str, dict] = {}
+        chats: dict[str, dict] = {}
+        
+        for key, until in list(self._wait_until.items()):
+            wait_seconds = round(max(0.0, until - now), 1)
+            if isinstance(key, tuple):
+                if wait_seconds:
+                    chats[f"{key[0]}:{key[1]}"] = {'wait_seconds': wait_seconds}
+            else:
+                methods[key] = {'wait_seconds': wait_seconds, 'floods': self._floods.get(key, 0)}
+        
+        return {'methods': methods, 'chats': chats}
+
 
 class UserbotClient:
-    """Singleton Pyrogram client."""
+    """Pyrogram client одного аккаунта userbot."""
     
-    _instance: Optional['UserbotClient'] = None
-    _client: Optional[Client] = None
-    _is_connected: bool = False
+    # Минимальный срок бана в режиме timed (с запасом на расхождение часов)
+    MIN_BAN_SECONDS = 60
     
-    def __new__(cls) -> 'UserbotClient':
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    def __init__(self, account: Optional[UserbotAccount] = None):
+        """
+        Args:
+            account: Аккаунт (по умолчанию основной из USERBOT_*)
+        """
+        self.account = account or userbot_config.accounts()[0]
+        self._client: Optional[Client] = None
+        self._is_connected = False
+        # Подписчики на FloodWait: (метод, chat_id, секунды)
+        self._flood_listeners: list[Callable[[str, int, float], None]] = []
+        self.flood = FloodController()
+        self._me_id: Optional[int] = None
+        self._create_client()
     
-    def __init__(self):
-        if self._client is None:
-            self._create_client()
+    @property
+    def name(self) -> str:
+        """Имя аккаунта в пуле."""
+        return self.account.name
     
     def _create_client(self) -> None:
         """Создать Pyrogram клиент."""
-        if userbot_config.has_session_string():
+        account = self.account
+        if account.has_session_string():
             # Используем session string
-            logger.info("Using session string for authentication")
+            logger.info(f"[{account.name}] Using session string for authentication")
             self._client = Client(
-                name=userbot_config.SESSION_NAME,
-                api_id=userbot_config.API_ID,
-                api_hash=userbot_config.API_HASH,
-                session_string=userbot_config.SESSION_STRING,
+                name=account.session_name,
+                api_id=account.api_id,
+                api_hash=account.api_hash,
+                session_string=account.session_string,
                 in_memory=True,
             )
         else:
             # Используем файл сессии
-            logger.info("Using session file for authentication")
-            session_path = userbot_config.SESSION_DIR / userbot_config.SESSION_NAME
+            logger.info(f"[{account.name}] Using session file for authentication")
+            session_path = userbot_config.SESSION_DIR / account.session_name
             self._client = Client(
                 name=str(session_path),
-                api_id=userbot_config.API_ID,
-                api_hash=userbot_config.API_HASH,
-                phone_number=userbot_config.PHONE,
+                api_id=account.api_id,
+                api_hash=account.api_hash,
+                phone_number=account.phone,
             )
     
+    def add_flood_listener(self, listener: Callable[[str, int, float], None]) -> None:
+        """Подписаться на FloodWait: listener(метод, chat_id, секунды)."""
+        if listener not in self._flood_listeners:
+            self._flood_listeners.append(listener)
+    
+    def _notify_flood(self, method: str, chat_id: int, seconds: float) -> None:
+        """Сообщить подписчикам о FloodWait."""
+        for listener in self._flood_listeners:
+            try:
+                listener(method, chat_id, seconds)
+            except Exception as e:
+                logger.error(f"Flood listener error: {e}")
+    
+    def get_flood_state(self) -> dict:
+        """Текущие окна FloodWait."""
+        return self.flood.state()
+    
+    async def _call(
+        self,
+        method: str,
+        chat_id: int,
+        request: Callable[[], Awaitable[Any]],
+        max_wait: Optional[float] = None,
+    ) -> Any:
+        """
+        Выполнить запрос через FloodController.
+        
+        FloodWait открывает окно ожидания для всех вызывающих метода,
+        после чего запрос повторяется не больше MAX_RETRIES раз. Слишком
+        долгий FloodWait (больше max_wait) не ждём: исключение уходит
+        вызывающему, чтобы задача повторилась позже или ушла на другой
+        аккаунт пула.
+        
+        Args:
+            method: Имя метода для учёта лимитов (invite / kick / unban)
+            chat_id: ID чата
+            request: Фабрика корутины запроса
+            max_wait: Сколько готовы ждать FloodWait (по умолчанию FLOOD_MAX_WAIT)
+        """
+        if max_wait is None:
+            max_wait = userbot_config.FLOOD_MAX_WAIT
+        
+        for attempt in range(userbot_config.MAX_RETRIES + 1):
+            await self.flood.gate(method, chat_id, max_wait)
+            try:
+                result = await request()
+            except FloodWait as e:
+                logger.warning(f"FloodWait on {method} in {chat_id}: {e.value} seconds")
+                self.flood.on_flood(method, chat_id, e.value)
+                self._notify_flood(method, chat_id, e.value)
+                if e.value > max_wait or attempt == userbot_config.MAX_RETRIES:
+                    raise
+                continue
+            
+            return result
+    
     @property
     def client(self) -> Client:
         """Получить клиент."""
@@ -90,7 +242,8 @@ class UserbotClient:
             await self._client.start()
             self._is_connected = True
             me = await self._client.get_me()
-            logger.info(f"Userbot started as @{me.username} ({me.id})")
+            self._me_id = me.id
+            logger.info(f"[{self.name}] Userbot started as @{me.username} ({me.id})")
         except Exception as e:
             logger.error(f"Failed to start userbot: {e}")
             raise
@@ -103,7 +256,7 @@ class UserbotClient:
         try:
             await self._client.stop()
             self._is_connected = False
-            logger.info("Userbot stopped")
+            logger.info(f"[{self.name}] Userbot stopped")
         except Exception as e:
             logger.error(f"Error stopping userbot: {e}")
     
@@ -111,6 +264,7 @@ class UserbotClient:
         self,
         channel_id: int,
         user_id: int,
+        max_wait: Optional[float] = None,
     ) -> tuple[bool, str]:
         """
         Добавить пользователя в канал.
@@ -118,6 +272,7 @@ class UserbotClient:
         Args:
             channel_id: ID канала
             user_id: Telegram ID пользователя
+            max_wait: Дольше этого FloodWait не ждать (сек), см. _call
             
         Returns:
             Tuple (успех, сообщение об ошибке)
@@ -125,19 +280,26 @@ class UserbotClient:
         if not self._is_connected:
             return False, "Userbot not connected"
         
+        def add() -> Awaitable[Any]:
+            return self._client.add_chat_members(chat_id=channel_id, user_ids=user_id)
+        
         try:
-            await self._client.add_chat_members(
-                chat_id=channel_id,
-                user_ids=user_id,
-            )
+            try:
+                await self._call('invite', channel_id, add, max_wait)
+            except UserKicked:
+                # Бан после кика ещё не снят (until_date или ждёт сверки)
+                await self._call('unban', channel_id, lambda: self._client.unban_chat_member(
+                    chat_id=channel_id,
+                    user_id=user_id,
+                ), max_wait)
+                await self._call('invite', channel_id, add, max_wait)
             logger.info(f"User {user_id} added to channel {channel_id}")
             return True, ""
             
         except FloodWait as e:
-            logger.warning(f"FloodWait: waiting {e.value} seconds")
-            await asyncio.sleep(e.value)
-            # Попробуем ещё раз
-            return await self.invite_user_to_channel(channel_id, user_id)
+            msg = f"{FLOOD_ERROR_PREFIX} {e.value}s"
+            logger.warning(f"User {user_id}, Channel {channel_id}: {msg}, giving up for now")
+            return False, msg
         
         except UserPrivacyRestricted:
             msg = "User privacy settings prevent adding"
@@ -145,7 +307,7 @@ class UserbotClient:
             return False, msg
         
         except ChatAdminRequired:
-            msg = "Bot is not admin in channel"
+            msg = ADMIN_REQUIRED_ERROR
             logger.error(f"Channel {channel_id}: {msg}")
             return False, msg
         
@@ -183,13 +345,19 @@ class UserbotClient:
         self,
         channel_id: int,
         user_id: int,
+        max_wait: Optional[float] = None,
     ) -> tuple[bool, str]:
         """
         Удалить пользователя из канала.
         
+        В режимах timed и deferred - один запрос: бан с until_date
+        или бессрочный бан, который снимет сверка. В режиме unban -
+        бан и сразу разбан.
+        
         Args:
             channel_id: ID канала
             user_id: Telegram ID пользователя
+            max_wait: Дольше этого FloodWait не ждать (сек), см. _call
             
         Returns:
             Tuple (успех, сообщение об ошибке)
@@ -197,24 +365,32 @@ class UserbotClient:
         if not self._is_connected:
             return False, "Userbot not connected"
         
+        ban_kwargs = {}
+        if userbot_config.KICK_MODE == 'timed':
+            # Бан короче 30 секунд Telegram считает бессрочным
+            seconds = max(self.MIN_BAN_SECONDS, userbot_config.KICK_BAN_SECONDS)
+            ban_kwargs['until_date'] = datetime.now() + timedelta(seconds=seconds)
+        
         try:
-            await self._client.ban_chat_member(
+            await self._call('kick', channel_id, lambda: self._client.ban_chat_member(
                 chat_id=channel_id,
                 user_id=user_id,
-            )
-            # Сразу разбаним, чтобы можно было добавить снова
-            await asyncio.sleep(0.5)
-            await self._client.unban_chat_member(
-                chat_id=channel_id,
-                user_id=user_id,
-            )
+                **ban_kwargs,
+            ), max_wait)
+            if userbot_config.KICK_MODE == 'unban':
+                # Сразу разбаним, чтобы можно было добавить снова
+                await asyncio.sleep(0.5)
+                await self._call('kick', channel_id, lambda: self._client.unban_chat_member(
+                    chat_id=channel_id,
+                    user_id=user_id,
+                ), max_wait)
             logger.info(f"User {user_id} kicked from channel {channel_id}")
             return True, ""
             
         except FloodWait as e:
-            logger.warning(f"FloodWait: waiting {e.value} seconds")
-            await asyncio.sleep(e.value)
-            return await self.kick_user_from_channel(channel_id, user_id)
+            msg = f"{FLOOD_ERROR_PREFIX} {e.value}s"
+            logger.warning(f"User {user_id}, Channel {channel_id}: {msg}, giving up for now")
+            return False, msg
         
         except UserNotParticipant:
             msg = "User is not in channel"
@@ -222,7 +398,7 @@ class UserbotClient:
             return True, ""  # Считаем успехом, если юзера и так нет
         
         except ChatAdminRequired:
-            msg = "Bot is not admin in channel"
+            msg = ADMIN_REQUIRED_ERROR
             logger.error(f"Channel {channel_id}: {msg}")
             return False, msg
         
@@ -279,6 +455,50 @@ class UserbotClient:
             logger.error(f"Error checking user {user_id} in channel {channel_id}: {e}")
             return False
     
+    async def release_bans(self, channel_id: int) -> int:
+        """
+        Снять бессрочные баны, выданные этим аккаунтом в канале.
+        
+        Userbot банит только при кике, поэтому любой бессрочный бан от
+        этого аккаунта - кик, чей разбан отложен (deferred) или не
+        дошёл (сбой между баном и разбаном). Баны с until_date и баны
+        других администраторов не трогаем.
+        
+        Args:
+            channel_id: ID канала
+            
+        Returns:
+            Сколько банов снято
+        """
+        if not self._is_connected or self._me_id is None:
+            return 0
+        
+        stale = []
+        async for member in self._client.get_chat_members(channel_id, filter=ChatMembersFilter.BANNED):
+            if member.until_date is not None or member.user is None:
+                continue
+            if member.restricted_by is None or member.restricted_by.id != self._me_id:
+                continue
+            stale.append(member.user.id)
+        
+        released = 0
+        for user_id in stale:
+            try:
+                await self._call('unban', channel_id, lambda: self._client.unban_chat_member(
+                    chat_id=channel_id,
+                    user_id=user_id,
+                ))
+                released += 1
+            except FloodWait as e:
+                logger.warning(f"[{self.name}] FloodWait {e.value}s releasing bans in {channel_id}, stopping")
+                break
+            except Exception as e:
+                logger.error(f"[{self.name}] Error unbanning user {user_id} in {channel_id}: {e}")
+        
+        if released:
+            logger.info(f"[{self.name}] Released {released} bans in channel {channel_id}")
+        return released
+    
     async def get_session_string(self) -> str:
         """Получить session string для сохранения."""
         if not self._is_connected:
@@ -286,12 +506,19 @@ class UserbotClient:
         return await self._client.export_session_string()
 
 
-# Глобальный экземпляр
+# Клиент основного аккаунта
 userbot_client = UserbotClient()
 
 
-async def get_userbot() -> UserbotClient:
-    """Получить экземпляр userbot клиента."""
-    if not userbot_client.is_connected:
-        await userbot_client.start()
-    return userbot_client
+async def get_userbot() -> 'UserbotPool':
+    """
+    Получить пул userbot.
+    
+    Пул повторяет интерфейс UserbotClient (инвайт, кик, проверка,
+    подписка на FloodWait) и с одним аккаунтом ведёт себя как клиент.
+    """
+    from .pool import userbot_pool
+    
+    if not userbot_pool.is_connected:
+        await userbot_pool.start()
+    return userbot_pool
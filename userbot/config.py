@@ -12,6 +12,41 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+class UserbotAccount:
+    """Учётные данные одного аккаунта userbot."""
+    
+    def __init__(
+        self,
+        name: str,
+        api_id: int,
+        api_hash: str,
+        phone: str,
+        session_string: str,
+        session_name: str,
+    ):
+        self.name = name
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.phone = phone
+        self.session_string = session_string
+        self.session_name = session_name
+    
+    def has_session_string(self) -> bool:
+        """Проверить наличие session string."""
+        return bool(self.session_string and len(self.session_string) > 50)
+    
+    def validate(self) -> bool:
+        """Проверить обязательные настройки аккаунта."""
+        prefix = 'USERBOT' if self.name == 'main' else f'USERBOT_{self.name.upper()}'
+        if not self.api_id:
+            raise ValueError(f"{prefix}_API_ID is required")
+        if not self.api_hash:
+            raise ValueError(f"{prefix}_API_HASH is required")
+        if not self.session_string and not self.phone:
+            raise ValueError(f"Either {prefix}_SESSION_STRING or {prefix}_PHONE is required")
+        return True
+
+
 class UserbotConfig:
     """Конфигурация userbot."""
     
@@ -37,23 +72,92 @@ class UserbotConfig:
     
     # Таймауты
     INVITE_DELAY: float = 1.0  # Задержка между инвайтами (секунды)
-    KICK_DELAY: float = 0.5    # Задержка между киками
+    KICK_DELAY: float = 0.5    # Задержка между киками (в одном канале)
+    FLOOD_MAX_DELAY: float = 30.0  # Потолок адаптивного интервала в канале после FloodWait
+    MTPROTO_RATE_LIMIT: float = float(os.getenv('USERBOT_MTPROTO_RATE_LIMIT', '5'))  # Инвайтов/киков в секунду на аккаунт
+    
+    # Обработка истекших подписок
+    KICK_GRACE_MINUTES: int = int(os.getenv('USERBOT_KICK_GRACE_MINUTES', '0'))  # Отсрочка кика после истечения
+    KICK_SLA_MINUTES: int = int(os.getenv('USERBOT_KICK_SLA_MINUTES', '60'))  # Окно, за которое кик гарантирован
+    KICK_CHANNEL_QUOTA: int = int(os.getenv('USERBOT_KICK_CHANNEL_QUOTA', '20'))  # Киков в минуту на канал (0 - без квоты)
+    
+    # Как удалять из канала:
+    #   timed    - один бан с until_date: Telegram сам снимает его через KICK_BAN_SECONDS
+    #   deferred - один бессрочный бан, разбан - пакетно в BanSweeper
+    #   unban    - бан и сразу разбан (два запроса)
+    KICK_MODE: str = os.getenv('USERBOT_KICK_MODE', 'timed').lower()
+    KICK_BAN_SECONDS: int = int(os.getenv('USERBOT_KICK_BAN_SECONDS', '60'))  # Срок бана в режиме timed
+    UNBAN_SWEEP_INTERVAL: float = float(os.getenv('USERBOT_UNBAN_SWEEP_INTERVAL', '600'))  # Период сверки банов (сек)
     
     # Ретраи
-    MAX_RETRIES: int = 3
+    MAX_RETRIES: int = 3  # Повторов запроса после FloodWait
     RETRY_DELAY: float = 5.0
+    FLOOD_MAX_WAIT: float = float(os.getenv('USERBOT_FLOOD_MAX_WAIT', '300'))  # Дольше не ждём, а возвращаем ошибку
+    
+    # Пул аккаунтов
+    # Дополнительные аккаунты через запятую: для имени X читаются USERBOT_X_PHONE,
+    # USERBOT_X_SESSION_STRING и (если отличаются от основных) USERBOT_X_API_ID / _API_HASH
+    EXTRA_ACCOUNTS: str = os.getenv('USERBOT_ACCOUNTS', '')
+    # Явное закрепление каналов: "channel_id:имя,channel_id:имя" (остальные - по хешу)
+    CHANNEL_OWNERS: str = os.getenv('USERBOT_CHANNEL_OWNERS', '')
+    POOL_FAILOVER_WAIT: float = float(os.getenv('USERBOT_POOL_FAILOVER_WAIT', '30'))  # FloodWait дольше - уходим на другой аккаунт
+    POOL_MAX_IN_FLIGHT: int = int(os.getenv('USERBOT_POOL_MAX_IN_FLIGHT', '10'))  # Одновременных запросов на аккаунт
+    POOL_ADMIN_RECHECK: float = 3600.0  # Через сколько секунд снова пробовать аккаунт без прав в канале
+    
+    # Очередь задач (tasks)
+    TASK_BATCH_SIZE: int = int(os.getenv('USERBOT_TASK_BATCH_SIZE', '20'))  # Задач за одно взятие
+    TASK_LEASE_SECONDS: float = float(os.getenv('USERBOT_TASK_LEASE_SECONDS', '300'))  # Аренда взятой порции
+    TASK_POLL_INTERVAL: float = float(os.getenv('USERBOT_TASK_POLL_INTERVAL', '2'))  # Опрос пустой очереди (сек)
+    TASK_MAX_ATTEMPTS: int = int(os.getenv('USERBOT_TASK_MAX_ATTEMPTS', '5'))  # Попыток до dead letter
+    TASK_BACKOFF_BASE: float = 30.0  # Первая задержка повтора (сек), дальше x2
+    TASK_BACKOFF_MAX: float = 3600.0  # Максимальная задержка повтора (сек)
     
     @classmethod
     def validate(cls) -> bool:
-        """Проверить обязательные настройки."""
-        if not cls.API_ID or cls.API_ID == 0:
-            raise ValueError("USERBOT_API_ID is required")
-        if not cls.API_HASH:
-            raise ValueError("USERBOT_API_HASH is required")
-        if not cls.SESSION_STRING and not cls.PHONE:
-            raise ValueError("Either USERBOT_SESSION_STRING or USERBOT_PHONE is required")
+        """Проверить обязательные настройки всех аккаунтов."""
+        if cls.KICK_MODE not in ('timed', 'deferred', 'unban'):
+            raise ValueError("USERBOT_KICK_MODE must be one of: timed, deferred, unban")
+        for account in cls.accounts():
+            account.validate()
         return True
     
+    @classmethod
+    def accounts(cls) -> list[UserbotAccount]:
+        """Аккаунты пула: основной (main) и дополнительные из USERBOT_ACCOUNTS."""
+        accounts = [UserbotAccount(
+            name='main',
+            api_id=cls.API_ID,
+            api_hash=cls.API_HASH,
+            phone=cls.PHONE,
+            session_string=cls.SESSION_STRING,
+            session_name=cls.SESSION_NAME,
+        )]
+        
+        for name in (x.strip().lower() for x in cls.EXTRA_ACCOUNTS.split(',')):
+            if not name or name == 'main':
+                continue
+            prefix = f'USERBOT_{name.upper()}'
+            accounts.append(UserbotAccount(
+                name=name,
+                api_id=int(os.getenv(f'{prefix}_API_ID', str(cls.API_ID))),
+                api_hash=os.getenv(f'{prefix}_API_HASH', cls.API_HASH),
+                phone=os.getenv(f'{prefix}_PHONE', ''),
+                session_string=os.getenv(f'{prefix}_SESSION_STRING', ''),
+                session_name=f'{cls.SESSION_NAME}_{name}',
+            ))
+        return accounts
+    
+    @classmethod
+    def channel_owners(cls) -> dict[int, str]:
+        """Явно закреплённые каналы: {channel_id: имя аккаунта}."""
+        owners: dict[int, str] = {}
+        for item in cls.CHANNEL_OWNERS.split(','):
+            if ':' not in item:
+                continue
+            channel_id, name = item.rsplit(':', 1)
+            owners[int(channel_id.strip())] = name.strip().lower()
+        return owners
+    
     @classmethod
     def has_session_string(cls) -> bool:
         """Проверить наличие session string."""
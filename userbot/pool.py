@@ -0,0 +1,282 @@
+"""
+Пул аккаунтов userbot.
+
+Каждый канал закреплён за аккаунтом: явно (USERBOT_CHANNEL_OWNERS) или
+по rendezvous-хешу, который при добавлении аккаунта переносит только
+часть каналов. Запрос идёт владельцу канала; если владелец в долгом
+FloodWait, перегружен или потерял права администратора в канале,
+запрос уходит следующему аккаунту в порядке хеша.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Callable, Optional
+
+from .client import (
+    UserbotClient,
+    userbot_client,
+    is_flood_error,
+    ADMIN_REQUIRED_ERROR,
+)
+from .config import userbot_config
+
+logger = logging.getLogger(__name__)
+
+
+class AccountMetrics:
+    """Счётчики одного аккаунта пула."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.floods = 0
+        self.failovers = 0
+        self.in_flight = 0
+        self.last_error: Optional[str] = None
+
+
+class UserbotPool:
+    """Маршрутизация инвайтов и киков по аккаунтам userbot."""
+    
+    def __init__(
+        self,
+        clients: list[UserbotClient],
+        channel_owners: Optional[dict[int, str]] = None,
+        failover_wait: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        """
+        Args:
+            clients: Клиенты аккаунтов (первый - основной)
+            channel_owners: Явное закрепление {channel_id: имя аккаунта}
+            failover_wait: FloodWait дольше этого (сек) - аккаунт пропускается
+            max_in_flight: Одновременных запросов на аккаунт до перехода к следующему
+        """
+        self.clients = {client.name: client for client in clients}
+        self.channel_owners = channel_owners if channel_owners is not None else userbot_config.channel_owners()
+        self.failover_wait = failover_wait if failover_wait is not None else userbot_config.POOL_FAILOVER_WAIT
+        self.max_in_flight = max_in_flight or userbot_config.POOL_MAX_IN_FLIGHT
+        self.metrics = {name: AccountMetrics() for name in self.clients}
+        # (аккаунт, канал) -> когда аккаунт потерял права в канале
+        self._no_admin: dict[tuple[str, int], float] = {}
+        self._flood_listeners: list[Callable[[str, int, float], None]] = []
+    
+    @property
+    def size(self) -> int:
+        """Аккаунтов в пуле."""
+        return len(self.clients)
+    
+    @property
+    def connected_count(self) -> int:
+        """Подключённых аккаунтов."""
+        return sum(client.is_connected for client in self.clients.values())
+    
+    @property
+    def is_connected(self) -> bool:
+        """Подключён хотя бы один аккаунт."""
+        return any(client.is_connected for client in self.clients.values())
+    
+    async def start(self) -> None:
+        """
+        Подключить аккаунты.
+        
+        Ошибка одного аккаунта не останавливает пул, пока подключён
+        хотя бы один.
+        """
+        for client in self.clients.values():
+            if client.is_connected:
+                continue
+            try:
+                await client.start()
+                client.add_flood_listener(self._on_client_flood)
+            except Exception as e:
+                logger.error(f"Userbot account {client.name} failed to start: {e}")
+        
+        if not self.is_connected:
+            raise RuntimeError("No userbot account could be started")
+        logger.info(f"Userbot pool started: {self.connected_count}/{self.size} accounts")
+    
+    async def stop(self) -> None:
+        """Отключить все аккаунты."""
+        for client in self.clients.values():
+            await client.stop()
+    
+    def owner_order(self, channel_id: int) -> list[UserbotClient]:
+        """Подключённые аккаунты в порядке предпочтения для канала."""
+        def score(name: str) -> bytes:
+            return hashlib.sha1(f"{name}:{channel_id}".encode()).digest()
+        
+        order = sorted(
+            (client for client in self.clients.values() if client.is_connected),
+            key=lambda client: score(client.name),
+            reverse=True,
+        )
+        
+        owner = self.channel_owners.get(channel_id)
+        order.sort(key=lambda client: client.name != owner)
+        return order
+    
+    def _has_admin(self, client: UserbotClient, channel_id: int) -> bool:
+        """Нет отметки о потере прав (или её пора перепроверить)."""
+        lost_at = self._no_admin.get((client.name, channel_id))
+        if lost_at is None:
+            return True
+        if time.monotonic() - lost_at >= userbot_config.POOL_ADMIN_RECHECK:
+            del self._no_admin[(client.name, channel_id)]
+            return True
+        return False
+    
+    def _route(self, method: str, channel_id: int) -> list[UserbotClient]:
+        """
+        Аккаунты, которые стоит попробовать, по порядку.
+        
+        Сначала владелец и аккаунты с правами, не в долгом FloodWait и
+        не перегруженные; если таких нет - все подключённые, начиная с
+        того, чей FloodWait закончится раньше.
+        """
+        order = self.owner_order(channel_id)
+        healthy = [
+            client for client in order
+            if self._has_admin(client, channel_id)
+            and client.flood.wait_remaining(method) <= self.failover_wait
+        ]
+        if not healthy:
+            return sorted(order, key=lambda client: client.flood.wait_remaining(method))
+        
+        # Перегруженные - в конец, порядок хеша среди остальных сохраняется
+        healthy.sort(key=lambda client: self.metrics[client.name].in_flight >= self.max_in_flight)
+        return healthy
+    
+    async def _execute(self, method: str, channel_id: int, user_id: int) -> tuple[bool, str]:
+        """Выполнить инвайт или кик с переходом на другой аккаунт при сбое."""
+        candidates = self._route(method, channel_id)
+        if not candidates:
+            return False, "Userbot not connected"
+        
+        success, error = False, ""
+        for index, client in enumerate(candidates):
+            metrics = self.metrics[client.name]
+            if index:
+                metrics.failovers += 1
+            
+            # Пока есть запасной аккаунт, долгий FloodWait не ждём, а уходим на него
+            max_wait = self.failover_wait if index < len(candidates) - 1 else None
+            
+            metrics.calls += 1
+            metrics.in_flight += 1
+            try:
+                if method == 'invite':
+                    success, error = await client.invite_user_to_channel(channel_id, user_id, max_wait)
+                else:
+                    success, error = await client.kick_user_from_channel(channel_id, user_id, max_wait)
+            finally:
+                metrics.in_flight -= 1
+            
+            if success:
+                metrics.successes += 1
+                return success, error
+            
+            metrics.failures += 1
+            metrics.last_error = error
+            
+            if is_flood_error(error):
+                metrics.floods += 1
+            elif error == ADMIN_REQUIRED_ERROR:
+                logger.warning(f"Userbot account {client.name} has no admin rights in {channel_id}")
+                self._no_admin[(client.name, channel_id)] = time.monotonic()
+            else:
+                # Ошибка не из-за аккаунта - другой аккаунт не поможет
+                return success, error
+        
+        return success, error
+    
+    async def invite_user_to_channel(self, channel_id: int, user_id: int) -> tuple[bool, str]:
+        """Добавить пользователя в канал через подходящий аккаунт."""
+        return await self._execute('invite', channel_id, user_id)
+    
+    async def kick_user_from_channel(self, channel_id: int, user_id: int) -> tuple[bool, str]:
+        """Удалить пользователя из канала через подходящий аккаунт."""
+        return await self._execute('kick', channel_id, user_id)
+    
+    async def check_user_in_channel(self, channel_id: int, user_id: int) -> bool:
+        """Проверить участие пользователя через владельца канала."""
+        order = self.owner_order(channel_id)
+        if not order:
+            return False
+        return await order[0].check_user_in_channel(channel_id, user_id)
+    
+    async def release_bans(self, channel_id: int) -> int:
+        """
+        Снять бессрочные баны от киков в канале.
+        
+        Каждый аккаунт снимает только свои баны: кик мог пройти через
+        любой аккаунт пула.
+        """
+        released = 0
+        for client in self.clients.values():
+            if not client.is_connected:
+                continue
+            try:
+                released += await client.release_bans(channel_id)
+            except Exception as e:
+                logger.error(f"Userbot account {client.name} failed to release bans in {channel_id}: {e}")
+        return released
+    
+    def add_flood_listener(self, listener: Callable[[str, int, float], None]) -> None:
+        """
+        Подписаться на FloodWait пула.
+        
+        Событие приходит, только когда в канале не осталось аккаунта,
+        свободного от FloodWait: пока есть куда переключиться, вызывающим
+        замедляться не нужно.
+        """
+        if listener not in self._flood_listeners:
+            self._flood_listeners.append(listener)
+    
+    def _on_client_flood(self, method: str, chat_id: int, seconds: float) -> None:
+        """FloodWait одного аккаунта."""
+        if any(
+            client.flood.wait_remaining(method) <= self.failover_wait
+            and self._has_admin(client, chat_id)
+            for client in self.owner_order(chat_id)
+        ):
+            return
+        
+        for listener in self._flood_listeners:
+            try:
+                listener(method, chat_id, seconds)
+            except Exception as e:
+                logger.error(f"Flood listener error: {e}")
+    
+    def health(self) -> dict[str, dict]:
+        """Состояние и счётчики по аккаунтам."""
+        report = {}
+        for name, client in self.clients.items():
+            metrics = self.metrics[name]
+            report[name] = {
+                'connected': client.is_connected,
+                'calls': metrics.calls,
+                'successes': metrics.successes,
+                'failures': metrics.failures,
+                'floods': metrics.floods,
+                'failovers': metrics.failovers,
+                'in_flight': metrics.in_flight,
+                'last_error': metrics.last_error,
+                'no_admin_channels': sorted(
+                    channel_id for account, channel_id in self._no_admin if account == name
+                ),
+                'flood': client.get_flood_state()['methods'],
+            }
+        return report
+
+
+def _build_pool() -> UserbotPool:
+    """Пул из основного клиента и дополнительных аккаунтов конфига."""
+    accounts = userbot_config.accounts()
+    clients = [userbot_client] + [UserbotClient(account) for account in accounts[1:]]
+    return UserbotPool(clients)
+
+
+userbot_pool = _build_pool()
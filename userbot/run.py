@@ -13,8 +13,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from userbot.config import userbot_config
-from userbot.client import userbot_client
+from userbot.pool import userbot_pool
+from bot.database import async_session_factory, init_db, close_db
+from bot.services.bot_session import get_bot, close_bot
 from bot.services.subscription_checker import SubscriptionChecker
+from userbot.worker import TaskWorker
+from userbot.ban_sweeper import BanSweeper
 
 # Настройка логирования
 logging.basicConfig(
@@ -31,6 +35,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Сколько ждать завершения текущей работы фоновых задач при остановке (сек)
+SHUTDOWN_TIMEOUT = 30
+
 
 async def main() -> None:
     """Главная функция."""
@@ -52,34 +59,62 @@ async def main() -> None:
     
     # Запускаем userbot
     try:
-        await userbot_client.start()
+        await userbot_pool.start()
         logger.info("Userbot connected successfully!")
     except Exception as e:
         logger.error(f"Failed to start userbot: {e}")
         return
     
-    # Создаём и запускаем checker подписок
-    checker = SubscriptionChecker()
+    # Таблица задач и новые колонки могут отсутствовать в старой БД
+    await init_db()
+    
+    # Воркер очереди инвайтов/киков из таблицы tasks
+    worker = TaskWorker(async_session_factory)
+    # Checker подписок на общих пуле БД и Bot процесса: кики ставит в
+    # очередь и будит воркер
+    checker = SubscriptionChecker(
+        session_factory=async_session_factory,
+        bot=get_bot(),
+        on_tasks=worker.nudge,
+    )
+    # Сверка: снимает бессрочные баны, оставшиеся после киков
+    sweeper = BanSweeper(async_session_factory)
     
+    tasks: list[asyncio.Task] = []
     try:
-        # Запускаем проверку в фоне
-        checker_task = asyncio.create_task(checker.run_forever())
+        # Запускаем проверку и очередь в фоне
+        tasks = [
+            asyncio.create_task(checker.run_forever()),
+            asyncio.create_task(worker.run_forever()),
+            asyncio.create_task(sweeper.run_forever()),
+        ]
         
-        logger.info("Subscription checker started")
+        logger.info("Subscription checker, task worker and ban sweeper started")
         logger.info("Press Ctrl+C to stop")
         
         # Держим процесс запущенным
-        await checker_task
+        await asyncio.gather(*tasks)
         
     except asyncio.CancelledError:
         logger.info("Shutting down...")
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
     finally:
-        # Останавливаем checker
+        # Останавливаем checker, воркер очереди и сверку банов
+        worker.stop()
+        sweeper.stop()
         await checker.stop()
+        # Дожидаемся их выхода, пока БД, Bot и пул ещё открыты: текущая
+        # порция задач успевает записать результат. Зависшие - отменяем
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await close_bot()
+        await close_db()
         # Останавливаем userbot
-        await userbot_client.stop()
+        await userbot_pool.stop()
         logger.info("Userbot stopped")
 
 
@@ -0,0 +1,182 @@
+"""
+Воркер очереди задач userbot.
+
+Забирает из таблицы tasks порции задач (инвайты и кики) и выполняет
+их через UserbotClient. Задачи разных каналов идут параллельно, темп
+в канале и общий бюджет аккаунта - общие с userbot/actions (ChannelPacer).
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models import Subscription, Task
+from bot.services.task_queue import (
+    TASK_INVITE,
+    TASK_KICK,
+    claim_tasks,
+    complete_task,
+    fail_task,
+)
+
+from .config import userbot_config
+from .client import get_userbot
+from .actions.pacing import get_pacer
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, которые не исправятся повтором - задача сразу в dead letter
+PERMANENT_ERRORS = {
+    "User privacy settings prevent adding",
+    "User must be mutual contact",
+    "User is banned in channel",
+    "User account is deactivated",
+}
+
+
+class TaskWorker:
+    """Выполнение задач userbot из очереди."""
+    
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        """
+        Args:
+            session_maker: Фабрика сессий БД
+            batch_size: Сколько задач брать за раз
+            lease_seconds: Аренда порции (после неё задачи может взять другой воркер)
+            poll_interval: Пауза, когда очередь пуста (сек)
+            max_attempts: Попыток до dead letter
+        """
+        self._session_maker = session_maker
+        self.batch_size = batch_size or userbot_config.TASK_BATCH_SIZE
+        self.lease_seconds = lease_seconds or userbot_config.TASK_LEASE_SECONDS
+        self.poll_interval = poll_interval or userbot_config.TASK_POLL_INTERVAL
+        self.max_attempts = max_attempts or userbot_config.TASK_MAX_ATTEMPTS
+        self._running = False
+        self._wakeup = asyncio.Event()
+    
+    def nudge(self) -> None:
+        """Разбудить воркер (например, после добавления задач в этом процессе)."""
+        self._wakeup.set()
+    
+    def stop(self) -> None:
+        """Остановить после текущей порции."""
+        self._running = False
+        self._wakeup.set()
+    
+    async def run_forever(self) -> None:
+        """Цикл: забрать порцию, выполнить, при пустой очереди подождать."""
+        self._running = True
+        logger.info("Userbot task worker started")
+        
+        while self._running:
+            try:
+                processed = await self.run_batch()
+            except Exception as e:
+                logger.error(f"Error in task worker: {e}", exc_info=True)
+                processed = 0
+            
+            if processed:
+                continue
+            
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        
+        logger.info("Userbot task worker stopped")
+    
+    async def run_batch(self) -> int:
+        """
+        Забрать и выполнить одну порцию задач.
+        
+        Returns:
+            Сколько задач обработано
+        """
+        async with self._session_maker() as session:
+            tasks = await claim_tasks(
+                session,
+                limit=self.batch_size,
+                lease_seconds=self.lease_seconds,
+                types=(TASK_INVITE, TASK_KICK),
+            )
+            if not tasks:
+                return 0
+            
+            renewed = await self._renewed_subscriptions(session, tasks)
+            await asyncio.gather(*(self._run_task(task, renewed) for task in tasks))
+            await session.commit()
+        
+        return len(tasks)
+    
+    @staticmethod
+    async def _renewed_subscriptions(session: AsyncSession, tasks: list[Task]) -> set[int]:
+        """
+        Подписки из задач кика, которые снова активны.
+        
+        Checker ставит кик в очередь при истечении; если подписку
+        продлили раньше, чем воркер дошёл до задачи, кикать нельзя.
+        """
+        ids = set()
+        for task in tasks:
+            if task.type == TASK_KICK and task.payload:
+                subscription_id = json.loads(task.payload).get('subscription_id')
+                if subscription_id is not None:
+                    ids.add(subscription_id)
+        if not ids:
+            return set()
+        
+        result = await session.execute(select(Subscription).where(Subscription.id.in_(ids)))
+        return {sub.id for sub in result.scalars().all() if sub.is_active}
+    
+    async def _run_task(self, task: Task, renewed: set[int]) -> None:
+        """Выполнить задачу и записать результат (коммит - в run_batch)."""
+        if task.type == TASK_KICK and task.payload:
+            if json.loads(task.payload).get('subscription_id') in renewed:
+                logger.info(f"Task {task.id} skipped: subscription renewed before the kick")
+                complete_task(task)
+                return
+        
+        try:
+            userbot = await get_userbot()
+            pacer = get_pacer(task.type, userbot)
+            await pacer.acquire(task.channel_id)
+            
+            if task.type == TASK_INVITE:
+                success, error = await userbot.invite_user_to_channel(
+                    channel_id=task.channel_id,
+                    user_id=task.user_telegram_id,
+                )
+            else:
+                success, error = await userbot.kick_user_from_channel(
+                    channel_id=task.channel_id,
+                    user_id=task.user_telegram_id,
+                )
+        except Exception as e:
+            success, error = False, str(e)
+        
+        if success:
+            pacer.on_success(task.channel_id)
+            complete_task(task)
+            return
+        
+        logger.warning(f"Task {task.id} ({task.type}) attempt {task.attempts} failed: {error}")
+        fail_task(
+            task,
+            error,
+            max_attempts=self.max_attempts,
+            backoff_base=userbot_config.TASK_BACKOFF_BASE,
+            backoff_max=userbot_config.TASK_BACKOFF_MAX,
+            retry=error not in PERMANENT_ERRORS,
+        )